@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+WebSocket broadcast serialization benchmark
+
+For 1k and 10k subscribers, measures the time spent producing the
+notification frames for one event:
+
+    per-subscriber - building a notification dict and json.dumps per
+                     subscriber (the previous broadcast code)
+    template       - encoding the result once and splicing each
+                     subscription id into it (notification_suffix)
+    broadcast      - a full FanaticoWebSocketServer.broadcast_* call with
+                     connections that discard what they are sent; this
+                     only queues the frames, the per-connection writer
+                     tasks deliver them afterwards
+
+It then gives every subscriber a narrow logs filter (one contract address,
+as indexers use) and compares finding the matches for a 100-log block by a
+linear LogFilter.matches scan and through the subscription index.
+
+Usage:
+    python3 bench_ws_broadcast.py [--subscribers 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+logging.disable(logging.CRITICAL)
+
+from websocket_server import (  # noqa: E402
+    FanaticoWebSocketServer, NOTIFICATION_PREFIX, notification_suffix
+)
+
+HEADER = {
+    "difficulty": "0x0",
+    "extraData": "0x",
+    "gasLimit": "0xe4e1c0",
+    "gasUsed": "0x5208",
+    "hash": "0x" + "ab" * 32,
+    "logsBloom": "0x" + "0" * 512,
+    "miner": "0x" + "0" * 40,
+    "mixHash": "0x" + "0" * 64,
+    "nonce": "0x0000000000000000",
+    "number": "0x2a",
+    "parentHash": "0x" + "cd" * 32,
+    "receiptsRoot": "0x" + "0" * 64,
+    "sha3Uncles": "0x" + "0" * 64,
+    "stateRoot": "0x" + "0" * 64,
+    "timestamp": "0x65b7a1c0",
+    "transactionsRoot": "0x" + "0" * 64,
+    "baseFeePerGas": "0x4a817c800",
+}
+
+LOG = {
+    "address": "0x" + "11" * 20,
+    "topics": ["0x" + "dd" * 32, "0x" + "00" * 12 + "22" * 20],
+    "data": "0x" + "00" * 31 + "01",
+    "blockNumber": "0x2a",
+    "transactionHash": "0x" + "ef" * 32,
+    "transactionIndex": "0x0",
+    "blockHash": "0x" + "ab" * 32,
+    "logIndex": "0x0",
+    "removed": False,
+}
+
+
+class NullConnection:
+    """Stands in for a websocket connection; discards every frame"""
+    remote_address = ("127.0.0.1", 0)
+
+    async def send(self, message):
+        pass
+
+
+def per_subscriber(sub_ids, result):
+    return [json.dumps({
+        "jsonrpc": "2.0",
+        "method": "eth_subscription",
+        "params": {"subscription": sub_id, "result": result}
+    }) for sub_id in sub_ids]
+
+
+def template(sub_ids, result):
+    suffix = notification_suffix(result)
+    return [NOTIFICATION_PREFIX + sub_id + suffix for sub_id in sub_ids]
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def best_ms_async(coro_fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def run(subscribers: int, repeat: int):
+    server = FanaticoWebSocketServer()
+    manager = server.subscription_manager
+    connections = [NullConnection() for _ in range(subscribers)]
+    for connection in connections:
+        server.add_connection(connection)
+    for sub_type in ('newHeads', 'logs', 'newPendingTransactions'):
+        for connection in connections:
+            await manager.add_subscription(sub_type, connection, {})
+    sub_ids = [sub.id for sub in await manager.get_subscriptions_by_type('newHeads')]
+
+    assert [json.loads(m) for m in per_subscriber(sub_ids[:3], HEADER)] == \
+           [json.loads(m) for m in template(sub_ids[:3], HEADER)]
+
+    print(f"\n{subscribers} subscribers (ms per event, best of {repeat})")
+    print(f"  {'event':<24} {'per-subscriber':>15} {'template':>10} {'broadcast':>10}")
+    events = (
+        ('newHeads', HEADER, lambda: server.broadcast_new_head(HEADER)),
+        ('logs (1 log)', LOG, lambda: server.broadcast_logs([LOG])),
+        ('newPendingTransactions', "0x" + "ef" * 32,
+         lambda: server.broadcast_pending_transaction("0x" + "ef" * 32)),
+    )
+    for name, result, broadcast in events:
+        old = best_ms(lambda: per_subscriber(sub_ids, result), repeat)
+        new = best_ms(lambda: template(sub_ids, result), repeat)
+        full = await best_ms_async(broadcast, repeat)
+        print(f"  {name:<24} {old:>15.2f} {new:>10.2f} {full:>10.2f}")
+        await asyncio.sleep(0)  # let the writer tasks drain the queues
+    for connection in connections:
+        await server.remove_connection(connection)
+
+    await narrow_logs(subscribers, repeat)
+
+
+async def narrow_logs(subscribers: int, repeat: int):
+    server = FanaticoWebSocketServer()
+    manager = server.subscription_manager
+    for index in range(subscribers):
+        await manager.add_subscription('logs', NullConnection(), {
+            "address": "0x" + f"{index:040x}", "topics": [LOG["topics"][0]]
+        })
+    subscriptions = await manager.get_subscriptions_by_type('logs')
+    logs = [dict(LOG, address="0x" + f"{index * 7:040x}") for index in range(100)]
+
+    def linear():
+        return [(sub, log) for sub in subscriptions for log in logs if sub.filter.matches(log)]
+
+    def indexed():
+        return [(sub, log) for log in logs for sub in manager.log_index.match(log)]
+
+    assert len(linear()) == len(indexed())
+    print(f"  {'logs, 100-log block':<24} {'linear':>15} {'indexed':>10}")
+    print(f"  {'(one address per sub)':<24} {best_ms(linear, repeat):>15.2f} {best_ms(indexed, repeat):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WebSocket broadcast serialization benchmark')
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for subscribers in args.subscribers:
+        asyncio.run(run(subscribers, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
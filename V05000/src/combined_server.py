@@ -5,17 +5,27 @@ January 29, 2026
 
 This module runs both:
 - HTTP JSON-RPC server on port 8545
-- WebSocket server on port 8546
+- WebSocket server on port 8546, which also serves every JSON-RPC method
+  in-process through the node's dispatch_rpc (no HTTP hop)
 
-Integrates event broadcasting from blockchain to WebSocket subscribers.
+Integrates event broadcasting from blockchain to WebSocket subscribers:
+a pump thread consumes the node's event bus (Blockchain.events) and hands
+sealed blocks, their logs and pending transactions to the WebSocket loop.
+
+With --ws-workers N the WebSocket side instead runs in N worker processes
+sharing the WebSocket port, fed through an event broker (event_broker.py);
+--broker also lets workers on replica nodes subscribe to this node.
 """
 
 import asyncio
+import importlib
+import os
+import tempfile
 import threading
 import signal
 import sys
 import logging
-from typing import Optional
+from typing import Optional, Tuple
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -32,18 +42,29 @@ class CombinedServer:
         http_host: str = "0.0.0.0",
         http_port: int = 8545,
         ws_host: str = "0.0.0.0",
-        ws_port: int = 8546
+        ws_port: int = 8546,
+        broker_url: Optional[str] = None,
+        ws_workers: int = 0,
+        trusted_proxies: Tuple[str, ...] = ()
     ):
         self.http_host = http_host
         self.http_port = http_port
         self.ws_host = ws_host
         self.ws_port = ws_port
+        self.ws_workers = ws_workers
+        self.trusted_proxies = tuple(trusted_proxies)  # added to both servers' TRUSTED_PROXIES
+        if ws_workers and not broker_url:
+            broker_url = f"unix://{tempfile.gettempdir()}/fanatico-events-{ws_port}.sock"
+        self.broker_url = broker_url
 
         self._ws_server = None
         self._ws_loop = None
         self._ws_thread = None
         self._http_thread = None
         self._running = False
+        self._blockchain_module = None
+        self._publisher = None
+        self._ws_worker_processes = []
 
     def _run_websocket_server(self):
         """Run WebSocket server in a separate thread with its own event loop"""
@@ -52,7 +73,9 @@ class CombinedServer:
         self._ws_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._ws_loop)
 
-        self._ws_server = FanaticoWebSocketServer()
+        self._ws_server = FanaticoWebSocketServer(
+            rpc_session=self._rpc_session if hasattr(self._blockchain_module, 'dispatch_rpc') else None
+        )
         WebSocketEventHooks.set_server(self._ws_server, self._ws_loop)
 
         try:
@@ -64,14 +87,50 @@ class CombinedServer:
         finally:
             self._ws_loop.close()
 
+    def _rpc_session(self, websocket):
+        """
+        Call function for one WebSocket connection: runs decoded requests
+        through the node's handlers, charged to the connection's
+        rate-limit bucket like an HTTP keep-alive connection.
+        """
+        node = self._blockchain_module
+        peer = websocket.remote_address[0] if websocket.remote_address else None
+        headers = websocket.request_headers
+        budget = node.rate_limiter.bucket(
+            node.client_address(peer, headers.get('X-Forwarded-For')), headers.get('X-Api-Key')
+        )
+
+        def call(data) -> bytes:
+            return node.dispatch_rpc(data, budget)
+        return call
+
     def _run_http_server(self, blockchain_module):
-        """Run HTTP Flask server in a separate thread"""
+        """Run the HTTP JSON-RPC server (blocking)"""
         # Import the blockchain and Flask app
         app = blockchain_module.app
         blockchain_module.blockchain = blockchain_module.Blockchain()
 
-        # Patch the blockchain to emit events to WebSocket
-        self._patch_blockchain_events(blockchain_module.blockchain)
+        # Feed the node's events to WebSocket subscribers: in-process, or
+        # through the broker to worker processes (local and/or on replicas)
+        if self.broker_url:
+            from event_broker import start_publisher
+            self._publisher = start_publisher(
+                blockchain_module.blockchain.events, blockchain_module.blockchain.block_event, self.broker_url
+            )
+        if self.ws_workers:
+            from event_broker import spawn_ws_workers
+            rpc_host = '127.0.0.1' if self.http_host in ('0.0.0.0', '') else self.http_host
+            self._ws_worker_processes = spawn_ws_workers(
+                self.ws_workers, self.broker_url, self.ws_host, self.ws_port,
+                rpc_url=f"http://{rpc_host}:{self.http_port}", trusted_proxies=self.trusted_proxies
+            )
+        else:
+            self._start_event_pump(blockchain_module.blockchain)
+
+        # Prefer the asyncio front end; Flask's app.run is a development server
+        if hasattr(blockchain_module, 'AsyncRPCServer'):
+            blockchain_module.AsyncRPCServer(self.http_host, self.http_port).run()
+            return
 
         app.run(
             host=self.http_host,
@@ -81,38 +140,56 @@ class CombinedServer:
             threaded=True
         )
 
-    def _patch_blockchain_events(self, blockchain):
-        """Patch blockchain to emit events to WebSocket subscribers"""
+    def _start_event_pump(self, blockchain):
+        """Start the thread forwarding the node's event bus to WebSocket subscribers"""
+        if not hasattr(blockchain, 'events'):
+            logger.warning("Blockchain has no event bus; WebSocket subscriptions will not receive events")
+            return
+        threading.Thread(
+            target=self._pump_events,
+            args=(blockchain,),
+            daemon=True,
+            name="WebSocket-Events"
+        ).start()
+
+    def _pump_events(self, blockchain):
+        """
+        Event bus consumer: reads at its own cursor and hands events to the
+        WebSocket loop, so block production only pays for the publish.
+        """
         from websocket_server import WebSocketEventHooks
 
-        # Store original methods
-        original_add_block = blockchain.add_block if hasattr(blockchain, 'add_block') else None
-        original_add_transaction = blockchain.add_transaction if hasattr(blockchain, 'add_transaction') else None
-
-        # Patch add_block to emit newHeads
-        if original_add_block:
-            def patched_add_block(*args, **kwargs):
-                result = original_add_block(*args, **kwargs)
-                if result:
-                    block = blockchain.get_latest_block() if hasattr(blockchain, 'get_latest_block') else None
-                    if block:
-                        WebSocketEventHooks.on_new_block(block)
-                return result
-            blockchain.add_block = patched_add_block
-
-        logger.info("Blockchain patched for WebSocket event emission")
+        bus = blockchain.events
+        cursor = bus.seq
+        while self._running:
+            if not bus.wait(cursor, timeout=1.0):
+                continue
+            cursor, events, missed = bus.read(cursor)
+            if missed:
+                logger.warning(f"WebSocket event pump fell behind; {missed} events skipped")
+            for _, kind, payload in events:
+                if kind == 'block':
+                    WebSocketEventHooks.on_block(*blockchain.block_event(payload))
+                elif kind == 'pendingTransaction':
+                    WebSocketEventHooks.on_pending_transaction(payload['hash'], payload)
 
     def start(self, blockchain_module):
         """Start both servers"""
         self._running = True
-
-        # Start WebSocket server in background thread
-        self._ws_thread = threading.Thread(
-            target=self._run_websocket_server,
-            daemon=True,
-            name="WebSocket-Server"
-        )
-        self._ws_thread.start()
+        self._blockchain_module = blockchain_module
+        if self.trusted_proxies:
+            import websocket_server
+            websocket_server.TRUSTED_PROXIES += self.trusted_proxies
+            blockchain_module.TRUSTED_PROXIES += self.trusted_proxies
+
+        # Start WebSocket server in background thread (unless worker processes serve it)
+        if not self.ws_workers:
+            self._ws_thread = threading.Thread(
+                target=self._run_websocket_server,
+                daemon=True,
+                name="WebSocket-Server"
+            )
+            self._ws_thread.start()
 
         logger.info(f"""
         ╔═══════════════════════════════════════════════════════════════╗
@@ -120,6 +197,8 @@ class CombinedServer:
         ╠═══════════════════════════════════════════════════════════════╣
         ║  HTTP  JSON-RPC: http://{self.http_host}:{self.http_port}
         ║  WebSocket RPC:  ws://{self.ws_host}:{self.ws_port}
+        ║  WebSocket workers: {self.ws_workers or 'in-process'}
+        ║  Event broker:   {self.broker_url or 'none'}
         ║
         ║  Chain ID: 11111111111 (0x2964619c7)
         ║  Client: Fanatico/v0.5.0.0/python
@@ -143,6 +222,9 @@ class CombinedServer:
                 self._ws_loop
             )
 
+        for worker in self._ws_worker_processes:
+            worker.terminate()
+
     def get_ws_stats(self) -> dict:
         """Get WebSocket server statistics"""
         if self._ws_server:
@@ -159,18 +241,29 @@ def main():
     parser.add_argument('--http-port', type=int, default=8545, help='HTTP server port')
     parser.add_argument('--ws-host', default='0.0.0.0', help='WebSocket server host')
     parser.add_argument('--ws-port', type=int, default=8546, help='WebSocket server port')
+    parser.add_argument('--node', default='web3_api_v0494_fully_fixed',
+                        help='Node module to serve (looked up next to the repository root first)')
+    parser.add_argument('--broker', help='Publish events to this broker (tcp://host:port, unix:///path, '
+                                         'redis://host:port/db) for WebSocket workers, local or on replicas')
+    parser.add_argument('--ws-workers', type=int, default=0,
+                        help='Serve WebSocket from N worker processes sharing --ws-port (0 = in-process)')
+    parser.add_argument('--trusted-proxy', action='append', default=[], metavar='IP',
+                        help='Also believe X-Forwarded-For from this peer (HAProxy not on this host, or a '
+                             'replica running WebSocket workers). May be repeated')
     args = parser.parse_args()
 
-    # Import the blockchain module
-    import sys
-    sys.path.insert(0, '/Users/sebastian/CODE/L1/V04998')
-    import web3_api_v04998 as blockchain_module
+    # Import the blockchain module from the repository root
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    blockchain_module = importlib.import_module(args.node)
 
     server = CombinedServer(
         http_host=args.http_host,
         http_port=args.http_port,
         ws_host=args.ws_host,
-        ws_port=args.ws_port
+        ws_port=args.ws_port,
+        broker_url=args.broker,
+        ws_workers=args.ws_workers,
+        trusted_proxies=args.trusted_proxy
     )
 
     # Handle signals
@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Event broker for Fanatico L1 WebSocket fan-out - v0.5.0.0
+
+Lets WebSocket subscribers be served by several worker processes, on the
+node's host or on replica nodes, instead of the single asyncio thread
+inside the node process:
+
+    node process                                   WebSocket worker processes
+    Blockchain.events -> EventPublisher      ==tcp/unix==>  EventSubscriber -> FanaticoWebSocketServer
+                      -> RedisEventPublisher ==redis===>
+
+Broker URLs:
+    tcp://host:port        built-in broker over TCP (default port 8547)
+    unix:///path/to.sock   built-in broker over a Unix socket
+    redis://host:port/db   Redis pub/sub (needs the redis package)
+
+The built-in protocol is newline-delimited JSON. A subscriber opens with
+{"epoch": e, "cursor": seq}; the publisher answers {"kind": "hello",
+"epoch": ..., "seq": ...} and then streams every retained event after the
+cursor (when the epoch matches, i.e. the node has not restarted since)
+followed by live events:
+
+    {"seq": 7, "kind": "block", "block": {header}, "logs": [...]}
+    {"seq": 8, "kind": "pendingTransaction", "tx": {...}}
+    {"kind": "gap", "missed": 120}     (the subscriber fell out of the node's event window)
+
+Every publisher client reads the node's event bus at its own cursor, so a
+slow worker only delays itself, and each event is encoded once. Redis
+pub/sub keeps no history: a worker that reconnects resumes live.
+
+Replica nodes run workers against the node's broker, behind HAProxy's
+8546 frontend:
+
+    python3 event_broker.py --broker tcp://10.0.0.1:8547 --rpc-url http://10.0.0.1:8545 --workers 4
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from urllib.parse import urlparse
+
+try:
+    import redis
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis = None
+    redis_asyncio = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Configuration
+BROKER_PORT = 8547
+REDIS_CHANNEL = "fanatico:events"
+READ_BATCH = 1000  # events a publisher client takes from the bus at a time
+ENCODED_CACHE_SIZE = 4096  # encoded events shared by publisher clients
+MAX_LINE = 64 * 1024 * 1024  # one block with all its logs per line
+HELLO_TIMEOUT = 10  # seconds
+RECONNECT_DELAY = 1.0  # seconds; doubles up to RECONNECT_DELAY_MAX
+RECONNECT_DELAY_MAX = 30.0
+
+# Blockchain.block_event: header and logs of a block, from its number
+BlockEvent = Callable[[int], Tuple[dict, list]]
+
+BROKER_ERRORS = (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) + \
+    ((redis.RedisError,) if redis else ())
+
+
+def parse_broker_url(url: str) -> Tuple[str, Any]:
+    """('tcp', (host, port)), ('unix', path) or ('redis', url)"""
+    parsed = urlparse(url)
+    if parsed.scheme == "tcp":
+        return "tcp", (parsed.hostname or "127.0.0.1", parsed.port or BROKER_PORT)
+    if parsed.scheme == "unix":
+        return "unix", parsed.path
+    if parsed.scheme in ("redis", "rediss"):
+        if redis is None:
+            raise ValueError("a redis:// broker needs the redis package (pip install redis)")
+        return "redis", url
+    raise ValueError(f"Unsupported broker URL: {url}")
+
+
+def event_message(seq: int, kind: str, payload: Any, block_event: BlockEvent) -> Optional[dict]:
+    """Wire form of a node EventBus event"""
+    if kind == "block":
+        header, logs = block_event(payload)
+        return {"seq": seq, "kind": "block", "block": header, "logs": logs}
+    if kind == "pendingTransaction":
+        return {"seq": seq, "kind": kind, "tx": payload}
+    return None
+
+
+def parse_hello(line: bytes) -> Tuple[Optional[str], Optional[int]]:
+    """(epoch, cursor) from a subscriber's hello; ValueError if it is malformed"""
+    hello = json.loads(line)
+    if not isinstance(hello, dict):
+        raise ValueError("hello must be a JSON object")
+    epoch, cursor = hello.get("epoch"), hello.get("cursor")
+    if epoch is not None and not isinstance(epoch, str):
+        raise ValueError("hello epoch must be a string or null")
+    if cursor is not None and (not isinstance(cursor, int) or isinstance(cursor, bool) or cursor < 0):
+        raise ValueError("hello cursor must be a non-negative integer or null")
+    return epoch, cursor
+
+
+def _encode_line(message: dict) -> bytes:
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class EventPublisher:
+    """
+    Built-in broker: serves a node EventBus to subscribers over TCP or a
+    Unix socket, from its own thread and event loop.
+    """
+
+    def __init__(self, bus, block_event: BlockEvent, url: str):
+        self.bus = bus
+        self.block_event = block_event
+        self.url = url
+        self.kind, self.address = parse_broker_url(url)
+        if self.kind == "redis":
+            raise ValueError("use RedisEventPublisher for redis:// brokers")
+        self.epoch = uuid.uuid4().hex  # identifies this run of the node's event sequence
+        self.clients = 0
+        self._encoded: 'OrderedDict[int, bytes]' = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._advanced: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
+    def start(self):
+        """Start serving; returns once the socket is listening"""
+        ready = threading.Event()
+        threading.Thread(target=self._run, args=(ready,), name="event-publisher", daemon=True).start()
+        ready.wait()
+        if self._error:
+            raise self._error
+        logger.info(f"Event broker listening on {self.url}")
+
+    def _run(self, ready: threading.Event):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._advanced = asyncio.Event()
+        try:
+            if self.kind == "unix":
+                if os.path.exists(self.address):
+                    os.unlink(self.address)  # Stale socket from a previous run
+                server = asyncio.start_unix_server(self._serve, self.address)
+            else:
+                server = asyncio.start_server(self._serve, *self.address)
+            self._loop.run_until_complete(server)
+        except OSError as e:
+            self._error = e
+            ready.set()
+            return
+        threading.Thread(target=self._watch_bus, name="event-publisher-bus", daemon=True).start()
+        ready.set()
+        self._loop.run_forever()
+
+    def _watch_bus(self):
+        """Wake the client tasks whenever the bus advances"""
+        cursor = self.bus.seq
+        while True:
+            if self.bus.wait(cursor, timeout=1.0):
+                cursor = self.bus.seq
+                self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        advanced, self._advanced = self._advanced, asyncio.Event()
+        advanced.set()
+
+    def _encode(self, seq: int, kind: str, payload: Any) -> bytes:
+        line = self._encoded.get(seq)
+        if line is None:
+            message = event_message(seq, kind, payload, self.block_event)
+            line = self._encoded[seq] = _encode_line(message) if message else b""
+            if len(self._encoded) > ENCODED_CACHE_SIZE:
+                self._encoded.popitem(last=False)
+        return line
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients += 1
+        try:
+            epoch, cursor = parse_hello(await asyncio.wait_for(reader.readline(), HELLO_TIMEOUT) or b"{}")
+            if epoch != self.epoch or cursor is None or cursor > self.bus.seq:
+                cursor = self.bus.seq  # New subscriber, or one from before a restart: live from here
+            writer.write(_encode_line({"kind": "hello", "epoch": self.epoch, "seq": cursor}))
+
+            while True:
+                advanced = self._advanced
+                cursor, events, missed = self.bus.read(cursor, limit=READ_BATCH)
+                if missed:
+                    logger.warning(f"Broker subscriber missed {missed} events")
+                    writer.write(_encode_line({"kind": "gap", "missed": missed}))
+                if not events:
+                    await writer.drain()
+                    await advanced.wait()
+                    continue
+                for seq, kind, payload in events:
+                    writer.write(self._encode(seq, kind, payload))
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Closing broker subscriber: {e}")
+        finally:
+            self.clients -= 1
+            writer.close()
+
+
+class RedisEventPublisher:
+    """Publishes a node EventBus to a Redis pub/sub channel from its own thread"""
+
+    def __init__(self, bus, block_event: BlockEvent, url: str, channel: str = REDIS_CHANNEL):
+        if redis is None:
+            raise ValueError("a redis:// broker needs the redis package (pip install redis)")
+        self.bus = bus
+        self.block_event = block_event
+        self.url = url
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+
+    def start(self):
+        threading.Thread(target=self._run, name="event-publisher", daemon=True).start()
+        logger.info(f"Publishing events to {self.url} ({self.channel})")
+
+    def _run(self):
+        cursor = self.bus.seq
+        while True:
+            if not self.bus.wait(cursor, timeout=1.0):
+                continue
+            cursor, events, missed = self.bus.read(cursor, limit=READ_BATCH)
+            if missed:
+                logger.warning(f"Redis publisher missed {missed} events")
+            pipeline = self.client.pipeline(transaction=False)
+            for seq, kind, payload in events:
+                message = event_message(seq, kind, payload, self.block_event)
+                if message:
+                    pipeline.publish(self.channel, _encode_line(message))
+            try:
+                pipeline.execute()
+            except redis.RedisError as e:
+                logger.error(f"Redis publish failed: {e}")
+                time.sleep(RECONNECT_DELAY)
+
+
+def start_publisher(bus, block_event: BlockEvent, url: str):
+    """Start the publisher for a broker URL"""
+    kind, _ = parse_broker_url(url)
+    publisher_class = RedisEventPublisher if kind == "redis" else EventPublisher
+    publisher = publisher_class(bus, block_event, url)
+    publisher.start()
+    return publisher
+
+
+class EventSubscriber:
+    """
+    Feeds events from a broker into a FanaticoWebSocketServer running in
+    this process, reconnecting with backoff. On the built-in broker it
+    resumes at its cursor, so a broker blip loses nothing the node still
+    retains.
+    """
+
+    def __init__(self, url: str, server):
+        self.kind, self.address = parse_broker_url(url)
+        self.url = url
+        self.server = server
+        self.epoch: Optional[str] = None
+        self.cursor: Optional[int] = None
+        self.connected = False
+        self.received = 0
+        self.missed = 0
+        self._delay = RECONNECT_DELAY
+
+    async def run(self):
+        """Consume events until cancelled"""
+        while True:
+            try:
+                if self.kind == "redis":
+                    await self._run_redis()
+                else:
+                    await self._run_socket()
+            except asyncio.CancelledError:
+                raise
+            except BROKER_ERRORS as e:
+                logger.warning(f"Event broker {self.url} unavailable ({e}); retrying in {self._delay:.0f}s")
+            self.connected = False
+            await asyncio.sleep(self._delay)
+            self._delay = min(self._delay * 2, RECONNECT_DELAY_MAX)
+
+    async def _run_socket(self):
+        if self.kind == "unix":
+            reader, writer = await asyncio.open_unix_connection(self.address, limit=MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(*self.address, limit=MAX_LINE)
+        try:
+            writer.write(_encode_line({"epoch": self.epoch, "cursor": self.cursor}))
+            hello = json.loads(await reader.readline() or b"{}")
+            if hello.get("kind") != "hello":
+                raise ValueError("not an event broker")
+            self.epoch, self.cursor = hello["epoch"], hello["seq"]
+            self._connected()
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("broker closed the connection")
+                await self.dispatch(json.loads(line))
+        finally:
+            writer.close()
+
+    async def _run_redis(self):
+        client = redis_asyncio.from_url(self.address)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(REDIS_CHANNEL)
+            self._connected()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    await self.dispatch(json.loads(message["data"]))
+        finally:
+            await pubsub.close()
+            await client.close()
+
+    def _connected(self):
+        self.connected = True
+        self._delay = RECONNECT_DELAY
+        logger.info(f"Subscribed to events from {self.url}")
+
+    async def dispatch(self, message: dict):
+        """Hand one broker message to the WebSocket server"""
+        kind = message.get("kind")
+        if "seq" in message:
+            self.cursor = message["seq"]
+        self.received += 1
+        if kind == "block":
+            await self.server.broadcast_block(message["block"], message["logs"])
+        elif kind == "pendingTransaction":
+            tx = message["tx"]
+            await self.server.broadcast_pending_transaction(tx["hash"], tx)
+        elif kind == "gap":
+            self.missed += message["missed"]
+            logger.warning(f"Missed {message['missed']} events from the broker")
+
+    def get_stats(self) -> dict:
+        return {
+            "broker": self.url,
+            "connected": self.connected,
+            "cursor": self.cursor,
+            "received": self.received,
+            "missed": self.missed
+        }
+
+
+def http_rpc_session(rpc_url: str):
+    """
+    rpc_session for workers without an in-process node: forwards JSON-RPC
+    to the node's HTTP endpoint over one keep-alive connection per thread,
+    passing the WebSocket client's address as X-Forwarded-For
+    """
+    parsed = urlparse(rpc_url)
+    connections = threading.local()
+
+    def post(data: Any, client: str) -> bytes:
+        body = json.dumps(data).encode()
+        headers = {"Content-Type": "application/json", "X-Forwarded-For": client}
+        for attempt in range(2):
+            conn = getattr(connections, "conn", None)
+            if conn is None:
+                conn = connections.conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 8545, timeout=60)
+            try:
+                conn.request("POST", parsed.path or "/", body, headers)
+                return conn.getresponse().read()
+            except (ConnectionError, http.client.HTTPException):
+                conn.close()
+                connections.conn = None  # Stale keep-alive connection: reconnect once
+                if attempt:
+                    raise
+
+    def session(websocket) -> Callable[[Any], bytes]:
+        client = getattr(websocket, "client_ip", None)  # set at admission, honours X-Forwarded-For
+        if client is None:
+            client = websocket.remote_address[0] if websocket.remote_address else ""
+        return lambda data: post(data, client)
+
+    return session
+
+
+def run_ws_worker(broker_url: str, host: str, port: int, rpc_url: Optional[str] = None,
+                  trusted_proxies: Tuple[str, ...] = ()):
+    """
+    WebSocket worker process: serves subscriptions fed by the broker on a
+    port shared with the other workers (SO_REUSEPORT), forwarding other
+    JSON-RPC methods to rpc_url if given
+    """
+    import websocket_server
+    from websocket_server import FanaticoWebSocketServer
+
+    websocket_server.TRUSTED_PROXIES += tuple(trusted_proxies)
+
+    parent = os.getppid()
+
+    def exit_with_parent():
+        while os.getppid() == parent:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=exit_with_parent, daemon=True).start()
+
+    async def serve():
+        server = FanaticoWebSocketServer(rpc_session=http_rpc_session(rpc_url) if rpc_url else None)
+        server.event_subscriber = EventSubscriber(broker_url, server)
+        subscriber_task = asyncio.ensure_future(server.event_subscriber.run())
+        try:
+            await server.start(host, port, reuse_port=True)
+        finally:
+            subscriber_task.cancel()
+
+    asyncio.run(serve())
+
+
+def spawn_ws_workers(count: int, broker_url: str, host: str, port: int,
+                     rpc_url: Optional[str] = None, trusted_proxies: Tuple[str, ...] = ()) -> list:
+    """Start count WebSocket worker processes sharing host:port"""
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_ws_worker, args=(broker_url, host, port, rpc_url, tuple(trusted_proxies)),
+                        name=f"ws-worker-{i}", daemon=True)
+        for i in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+    logger.info(f"Started {count} WebSocket workers on {host}:{port} (events from {broker_url})")
+    return workers
+
+
+def main():
+    """Run WebSocket workers against a remote node's broker (replica nodes)"""
+    parser = argparse.ArgumentParser(description="Fanatico L1 WebSocket workers fed by an event broker")
+    parser.add_argument("--broker", required=True, help="Broker URL (tcp://, unix:// or redis://)")
+    parser.add_argument("--rpc-url", help="Node HTTP JSON-RPC URL for non-subscription methods")
+    parser.add_argument("--ws-host", default="0.0.0.0", help="WebSocket server host")
+    parser.add_argument("--ws-port", type=int, default=8546, help="WebSocket server port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--trusted-proxy", action="append", default=[], metavar="IP",
+                        help="Also believe X-Forwarded-For from this peer (HAProxy not on this host). May be repeated")
+    args = parser.parse_args()
+
+    parse_broker_url(args.broker)  # Fail fast on a bad URL
+    workers = spawn_ws_workers(args.workers, args.broker, args.ws_host, args.ws_port, args.rpc_url,
+                               trusted_proxies=args.trusted_proxy)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,18 @@ January 29, 2026
 Implements Ethereum JSON-RPC WebSocket API:
 - eth_subscribe: Subscribe to real-time events
 - eth_unsubscribe: Unsubscribe from events
+- coalesced newPendingTransactions: opt-in batching of pending hashes
+  (or full transactions) into one notification per window
+- resumable newHeads/logs subscriptions: eth_subscribe accepts a
+  fromBlock and first replays the retained recent blocks
+- admission control: connections over MAX_CONNECTIONS, the per-IP cap,
+  the per-IP or server-wide handshake rate or the outbound memory budget
+  are refused before the handshake with a Retry-After; GET /ws-stats
+  reports counts and memory
+- every other JSON-RPC method and batch, when the server is given an
+  rpc_session (see combined_server.py), served in-process by the node's
+  handlers; requests on one connection are pipelined and their responses
+  sent as they complete
 
 Subscription Types:
 - newHeads: New block headers
@@ -17,13 +29,17 @@ Port: 8546 (standard Ethereum WebSocket port)
 """
 
 import asyncio
+import functools
 import json
 import logging
+import random
 import uuid
 import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
 from typing import Dict, Set, Optional, Any, Callable
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
 import websockets
 from websockets.server import WebSocketServerProtocol
 
@@ -34,42 +50,113 @@ logger = logging.getLogger(__name__)
 WS_HOST = "0.0.0.0"
 WS_PORT = 8546
 MAX_CONNECTIONS = 1000
+MAX_CONNECTIONS_PER_IP = 32
+ADMISSION_RATE = 100  # new connections accepted per second, so a reconnect storm is spread out
+ADMISSION_BURST = 200
+ADMISSION_RATE_PER_IP = 5  # new connections per second from one client IP, so one client cannot take them all
+ADMISSION_BURST_PER_IP = 20
+MAX_ADMISSION_CLIENTS = 100000  # per-IP admission buckets kept (least recently used are dropped)
+RETRY_AFTER_MAX = 10  # refused clients are told to retry after 1..RETRY_AFTER_MAX seconds (jittered)
+TRUSTED_PROXIES = ('127.0.0.1', '::1')  # peers whose X-Forwarded-For is believed; may read /ws-stats
+STATS_PATH = '/ws-stats'
 PING_INTERVAL = 30  # seconds
 PING_TIMEOUT = 10  # seconds
 MAX_SUBSCRIPTIONS_PER_CONNECTION = 100
+SEND_QUEUE_SIZE = 1024  # outbound frames buffered per connection
+MAX_SEND_LAG = 10.0  # seconds a queued frame may wait before the connection is dropped
+DEGRADE_QUEUE_SIZE = SEND_QUEUE_SIZE // 2  # above this, droppable frames (pending txs) are skipped
+SEND_BUFFER_BYTES = 4 * 2**20  # outbound bytes queued per connection before it is dropped
+MAX_SEND_BUFFER_BYTES = 256 * 2**20  # across all connections; the heaviest queues are dropped beyond it
+MAX_MESSAGE_SIZE = 2**20  # largest incoming message
+READ_QUEUE_SIZE = 8  # incoming messages buffered per connection while reading is paused
+RPC_WORKERS = 16  # threads running JSON-RPC calls for all connections
+MAX_INFLIGHT_REQUESTS = 32  # pipelined requests per connection before reading pauses
+SHED_QUEUE_DEPTH = 2048  # RPC requests queued for RPC_WORKERS (all connections) before new ones are refused
+
+REPLAY_WINDOW_BLOCKS = 1024  # recent blocks (header + logs) kept for resuming subscriptions
+REPLAY_WINDOW_LOGS = 200000  # ... and at most this many logs across them
+MAX_REPLAY_NOTIFICATIONS = 20000  # per resumed subscription
+MAX_CONCURRENT_REPLAYS = 32
+
+PENDING_BATCH_MS = 50  # default newPendingTransactions batching window
+PENDING_BATCH_SIZE = 1000  # default (and cap of) pending items per batched notification
+MAX_PENDING_BATCH_MS = 1000
+
+SUBSCRIPTION_METHODS = ('eth_subscribe', 'eth_unsubscribe')
+REPLAYABLE_TYPES = ('newHeads', 'logs')
+
+# rpc_session(websocket) returns the connection's call function: it takes a
+# decoded JSON-RPC request or batch and returns the encoded response.
+RPCSession = Callable[[WebSocketServerProtocol], Callable[[Any], bytes]]
+
+# eth_subscription notifications are rendered as PREFIX + subscription id + suffix,
+# so a broadcast encodes its result once however many subscribers receive it
+NOTIFICATION_PREFIX = '{"jsonrpc":"2.0","method":"eth_subscription","params":{"subscription":"'
+
+
+def notification_suffix(result: Any) -> str:
+    """Encode everything after the subscription id of an eth_subscription notification"""
+    return '","result":' + json.dumps(result, separators=(',', ':')) + '}}'
+
+
+def rpc_error(request_id: Any, code: int, message: str) -> str:
+    """Encoded JSON-RPC error response"""
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message}
+    })
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str]) -> str:
+    """Client IP, taken from X-Forwarded-For only when the peer is a trusted proxy"""
+    if forwarded_for and peer in TRUSTED_PROXIES:
+        return forwarded_for.split(',')[-1].strip()
+    return peer or ''
+
+
+def _lowercase_set(values: Any, what: str) -> frozenset:
+    """Normalize a filter value (string, list or null) to a set of lowercase hex strings"""
+    if values is None:
+        return frozenset()
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list) or not all(v is None or isinstance(v, str) for v in values):
+        raise ValueError(f"Invalid log filter {what}: {values!r}")
+    return frozenset(v.lower() for v in values if v is not None)
 
 
 @dataclass
 class LogFilter:
-    """Filter for log subscriptions"""
-    address: Optional[str] = None
+    """
+    Filter for log subscriptions. Addresses and topics are normalized once,
+    at subscribe time, into lowercase sets; an empty set (or null) at a
+    topic position is a wildcard.
+    """
+    address: Any = None  # a single address or a list of them
     addresses: list = field(default_factory=list)
     topics: list = field(default_factory=list)
 
+    def __post_init__(self):
+        self.address_set = _lowercase_set(self.address, 'address') | _lowercase_set(self.addresses, 'address')
+        if self.topics is not None and not isinstance(self.topics, list):
+            raise ValueError(f"Invalid log filter topics: {self.topics!r}")
+        # (position, accepted topics) for every non-wildcard position
+        self.topic_sets = tuple(
+            (i, accepted) for i, accepted in
+            ((i, _lowercase_set(topic, 'topic')) for i, topic in enumerate(self.topics or []))
+            if accepted
+        )
+        self.topic0: frozenset = self.topic_sets[0][1] if self.topic_sets and self.topic_sets[0][0] == 0 else frozenset()
+
     def matches(self, log: dict) -> bool:
         """Check if a log matches this filter"""
-        # Address filter
-        if self.address:
-            if log.get('address', '').lower() != self.address.lower():
-                return False
-        if self.addresses:
-            if log.get('address', '').lower() not in [a.lower() for a in self.addresses]:
+        if self.address_set and log.get('address', '').lower() not in self.address_set:
+            return False
+        log_topics = log.get('topics', [])
+        for i, accepted in self.topic_sets:
+            if i >= len(log_topics) or log_topics[i].lower() not in accepted:
                 return False
-
-        # Topics filter
-        if self.topics:
-            log_topics = log.get('topics', [])
-            for i, topic in enumerate(self.topics):
-                if topic is None:
-                    continue
-                if i >= len(log_topics):
-                    return False
-                if isinstance(topic, list):
-                    if log_topics[i] not in topic:
-                        return False
-                elif log_topics[i] != topic:
-                    return False
-
         return True
 
 
@@ -81,22 +168,366 @@ class Subscription:
     connection: WebSocketServerProtocol
     created_at: float = field(default_factory=time.time)
     filter: Optional[LogFilter] = None
+    live: bool = True  # False while a resumed subscription is still replaying
+    from_block: int = 0  # resumed subscriptions: no notifications for earlier blocks
+    full: bool = False  # newPendingTransactions: send transaction objects, not hashes
+    batch: Optional['PendingBatcher'] = None  # newPendingTransactions: coalesced delivery
+
+
+def _block_number(value: Any) -> Optional[int]:
+    """Block number from an int or hex quantity, None if absent or malformed"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value, 16)
+        except ValueError:
+            return None
+    return None
+
+
+class ReplayWindow:
+    """
+    The most recent blocks' newHeads payloads and logs, retained so that
+    a subscription can resume from a block number (eth_subscribe with
+    fromBlock). Bounded by REPLAY_WINDOW_BLOCKS blocks and
+    REPLAY_WINDOW_LOGS logs; the oldest blocks are evicted first.
+    """
+
+    def __init__(self, max_blocks: int = REPLAY_WINDOW_BLOCKS, max_logs: int = REPLAY_WINDOW_LOGS):
+        self.max_blocks = max_blocks
+        self.max_logs = max_logs
+        self.blocks: 'OrderedDict[int, list]' = OrderedDict()  # number -> [header suffix, logs]
+        self.log_count = 0
+
+    @property
+    def oldest(self) -> Optional[int]:
+        return next(iter(self.blocks)) if self.blocks else None
+
+    @property
+    def head(self) -> Optional[int]:
+        return next(reversed(self.blocks)) if self.blocks else None
+
+    def _entry(self, number: int) -> list:
+        entry = self.blocks.get(number)
+        if entry is None:
+            entry = self.blocks[number] = [None, []]
+        return entry
+
+    def add(self, number: int, header_suffix: Optional[str] = None, logs: Optional[list] = None):
+        """Record a block's newHeads payload and/or logs"""
+        entry = self._entry(number)
+        if header_suffix is not None:
+            entry[0] = header_suffix
+        if logs:
+            entry[1].extend(logs)
+            self.log_count += len(logs)
+        while len(self.blocks) > self.max_blocks or (self.log_count > self.max_logs and len(self.blocks) > 1):
+            _, (_, evicted) = self.blocks.popitem(last=False)
+            self.log_count -= len(evicted)
+
+    def count(self, sub: 'Subscription', from_block: int) -> int:
+        """Notifications a replay of sub from from_block would send"""
+        if self.head is None:
+            return 0
+        numbers = range(from_block, self.head + 1)
+        if sub.type == 'newHeads':
+            return sum(1 for n in numbers if self.blocks.get(n, (None,))[0] is not None)
+        return sum(
+            1 for n in numbers for log in self.blocks.get(n, (None, ()))[1]
+            if sub.filter is None or sub.filter.matches(log)
+        )
+
+    def get_stats(self) -> dict:
+        return {"oldest": self.oldest, "head": self.head, "blocks": len(self.blocks), "logs": self.log_count}
+
+
+class PendingBatcher:
+    """
+    Coalesces newPendingTransactions items for every subscription that
+    asked for the same (window ms, batch size, full) setting: items are
+    collected once for the group and flushed as one notification per
+    subscriber when the window closes or the batch is full, with the
+    item array encoded once per flush.
+    """
+
+    def __init__(self, server: 'FanaticoWebSocketServer', key: tuple):
+        self.server = server
+        self.key = key
+        self.window_ms, self.max_items, self.full = key
+        self.items: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, item: Any):
+        self.items.append(item)
+        if len(self.items) >= self.max_items:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window_ms / 1000, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self.items = self.items, []
+        if items:
+            self.server._send_pending_batch(self, items)
+
+
+class ConnectionSender:
+    """
+    Outbound side of one connection: a bounded frame queue drained by the
+    connection's own writer task, so a broadcast only appends and never
+    waits on a slow client. A client that falls too far behind first
+    loses droppable frames (pending tx hashes), then is disconnected.
+    Queued bytes are charged to the server-wide SendBudget.
+    """
+
+    def __init__(self, websocket: WebSocketServerProtocol, budget: Optional['SendBudget'] = None):
+        self.websocket = websocket
+        self.budget = budget
+        self.queue: deque = deque()  # (enqueued_at, frame)
+        self.queued_bytes = 0  # including the frame being written
+        self.sent = 0
+        self.skipped = 0
+        self.last_lag = 0.0  # queueing delay of the last frame written
+        self.closed = False
+        self.dropped: Optional[str] = None  # reason, if disconnected for being slow
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()  # set when the queue is below DEGRADE_QUEUE_SIZE
+        self._task = asyncio.ensure_future(self._run())
+
+    def lag(self) -> float:
+        """Seconds the oldest queued frame has been waiting"""
+        return time.monotonic() - self.queue[0][0] if self.queue else 0.0
+
+    def send(self, frame: str, droppable: bool = False) -> bool:
+        """Queue a frame without blocking; False if it was not queued"""
+        if self.closed:
+            return False
+        size = len(frame)
+        if droppable and (len(self.queue) >= DEGRADE_QUEUE_SIZE or self.queued_bytes >= SEND_BUFFER_BYTES // 2):
+            self.skipped += 1
+            return False
+        # A frame larger than the whole budget (a big RPC response) still goes through an empty queue
+        if len(self.queue) >= SEND_QUEUE_SIZE or self.lag() > MAX_SEND_LAG or \
+                (self.queued_bytes and self.queued_bytes + size > SEND_BUFFER_BYTES):
+            self.drop("client too slow")
+            return False
+        if self.budget and not self.budget.reserve(size, self):
+            return False
+        self.queued_bytes += size
+        self.queue.append((time.monotonic(), frame))
+        self._ready.set()
+        return True
+
+    async def _run(self):
+        try:
+            while True:
+                while not self.queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                enqueued_at, frame = self.queue.popleft()
+                await self.websocket.send(frame)
+                self.queued_bytes -= len(frame)
+                if self.budget:
+                    self.budget.release(len(frame))
+                self.sent += 1
+                self.last_lag = time.monotonic() - enqueued_at
+                if len(self.queue) < DEGRADE_QUEUE_SIZE:
+                    self._space.set()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.closed = True
+            self._clear()
+            self._space.set()
+
+    async def wait_for_space(self):
+        """Wait until the queue is below DEGRADE_QUEUE_SIZE (or the connection closed)"""
+        while not self.closed and len(self.queue) >= DEGRADE_QUEUE_SIZE:
+            self._space.clear()
+            await self._space.wait()
+
+    def drop(self, reason: str):
+        """Disconnect a client that cannot keep up"""
+        if self.closed:
+            return
+        logger.warning(f"Dropping {self.websocket.remote_address}: {reason} "
+                       f"({len(self.queue)} frames queued, lag {self.lag():.1f}s)")
+        self.dropped = reason
+        self.close()
+        self._close_task = asyncio.ensure_future(self.websocket.close(code=1013, reason=reason))
+
+    def close(self):
+        self.closed = True
+        self._clear()
+        self._space.set()
+        self._task.cancel()
+
+    def _clear(self):
+        self.queue.clear()
+        if self.budget:
+            self.budget.release(self.queued_bytes)
+        self.queued_bytes = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "remote": str(self.websocket.remote_address),
+            "queued": len(self.queue),
+            "queued_bytes": self.queued_bytes,
+            "lag_seconds": round(self.lag(), 3),
+            "last_lag_seconds": round(self.last_lag, 3),
+            "sent": self.sent,
+            "skipped": self.skipped
+        }
+
+
+class SendBudget:
+    """
+    Outbound bytes queued across all connections. A frame that would take
+    the total past the limit first drops the connections holding the most
+    until it fits, so a burst to many slow clients cannot exhaust memory.
+    """
+
+    def __init__(self, senders: Dict[WebSocketServerProtocol, 'ConnectionSender'],
+                 limit: int = MAX_SEND_BUFFER_BYTES):
+        self.senders = senders
+        self.limit = limit
+        self.used = 0
+        self.evicted = 0
+
+    def reserve(self, size: int, sender: 'ConnectionSender') -> bool:
+        """Charge size bytes for sender; False if sender itself was dropped to make room"""
+        while self.used + size > self.limit:
+            heaviest = max(self.senders.values(), key=lambda s: s.queued_bytes, default=None)
+            if heaviest is None or not heaviest.queued_bytes:
+                break  # Only in-flight frames left; let this one through
+            heaviest.drop("server send buffer full")
+            self.evicted += 1
+            if heaviest is sender:
+                return False
+        self.used += size
+        return True
+
+    def release(self, size: int):
+        self.used -= size
+
+    def get_stats(self) -> dict:
+        return {"used_bytes": self.used, "limit_bytes": self.limit, "evicted_connections": self.evicted}
+
+
+class AdmissionProtocol(WebSocketServerProtocol):
+    """Server protocol that lets FanaticoWebSocketServer answer or refuse a request before the handshake"""
+
+    def __init__(self, *args, fanatico: 'FanaticoWebSocketServer', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fanatico = fanatico
+        self.client_ip: Optional[str] = None
+
+    async def process_request(self, path: str, request_headers):
+        return self.fanatico.process_request(self, path, request_headers)
+
+
+class LogSubscriptionIndex:
+    """
+    logs subscriptions bucketed by the most selective part of their filter:
+    by address when the filter names addresses, otherwise by topic0, and
+    otherwise in a wildcard bucket. Each subscription sits in exactly one
+    kind of bucket, so matching a log only tests the subscriptions in its
+    address bucket, its topic0 bucket and the wildcard bucket.
+
+    Buckets are immutable tuples replaced on every change, so matching
+    never sees a bucket mid-update.
+    """
+
+    def __init__(self):
+        self.by_address: Dict[str, tuple] = {}
+        self.by_topic0: Dict[str, tuple] = {}
+        self.wildcard: tuple = ()
+
+    def _placement(self, sub: Subscription):
+        """(index, keys) the subscription is filed under, or (None, ()) for the wildcard bucket"""
+        log_filter = sub.filter
+        if log_filter is not None and log_filter.address_set:
+            return self.by_address, log_filter.address_set
+        if log_filter is not None and log_filter.topic0:
+            return self.by_topic0, log_filter.topic0
+        return None, ()
+
+    def add(self, sub: Subscription):
+        index, keys = self._placement(sub)
+        if index is None:
+            self.wildcard += (sub,)
+        for key in keys:
+            index[key] = index.get(key, ()) + (sub,)
+
+    def remove(self, sub: Subscription):
+        index, keys = self._placement(sub)
+        if index is None:
+            self.wildcard = tuple(s for s in self.wildcard if s is not sub)
+        for key in keys:
+            bucket = tuple(s for s in index.get(key, ()) if s is not sub)
+            if bucket:
+                index[key] = bucket
+            else:
+                index.pop(key, None)
+
+    def match(self, log: dict):
+        """Yield the subscriptions whose filter matches the log"""
+        topics = log.get('topics') or ()
+        for bucket in (
+            self.by_address.get(log.get('address', '').lower()),
+            self.by_topic0.get(topics[0].lower()) if topics else None,
+            self.wildcard
+        ):
+            if not bucket:
+                continue
+            for sub in bucket:
+                if sub.filter is None or sub.filter.matches(log):
+                    yield sub
 
 
 class SubscriptionManager:
-    """Manages all WebSocket subscriptions"""
+    """
+    Manages all WebSocket subscriptions.
+
+    Subscribe and unsubscribe serialize on a lock and publish, per type, a
+    new immutable tuple of subscriptions (copy-on-write). Broadcasts read
+    the current tuple with snapshot(), without the lock and without
+    allocating, so subscription churn never contends with delivery.
+    """
 
     def __init__(self):
         self.subscriptions: Dict[str, Subscription] = {}
         self.connections: Dict[WebSocketServerProtocol, Set[str]] = defaultdict(set)
         self.type_subscriptions: Dict[str, Set[str]] = defaultdict(set)
+        self.log_index = LogSubscriptionIndex()
+        self._snapshots: Dict[str, tuple] = {}
         self._lock = asyncio.Lock()
 
+    def snapshot(self, sub_type: str) -> tuple:
+        """Current subscriptions of a type; an immutable tuple that is safe to iterate"""
+        return self._snapshots.get(sub_type, ())
+
+    def _unpublish(self, removed: list):
+        """Swap in snapshots without the removed subscriptions"""
+        by_type: Dict[str, Set[str]] = defaultdict(set)
+        for subscription in removed:
+            by_type[subscription.type].add(subscription.id)
+            if subscription.type == 'logs':
+                self.log_index.remove(subscription)
+        for sub_type, sub_ids in by_type.items():
+            self._snapshots[sub_type] = tuple(
+                sub for sub in self._snapshots.get(sub_type, ()) if sub.id not in sub_ids
+            )
+
     async def add_subscription(
         self,
         sub_type: str,
         connection: WebSocketServerProtocol,
-        filter_params: Optional[dict] = None
+        filter_params: Optional[dict] = None,
+        live: bool = True
     ) -> str:
         """Add a new subscription and return subscription ID"""
         async with self._lock:
@@ -119,12 +550,16 @@ class SubscriptionManager:
                 id=sub_id,
                 type=sub_type,
                 connection=connection,
-                filter=log_filter
+                filter=log_filter,
+                live=live
             )
 
             self.subscriptions[sub_id] = subscription
             self.connections[connection].add(sub_id)
             self.type_subscriptions[sub_type].add(sub_id)
+            if sub_type == 'logs':
+                self.log_index.add(subscription)
+            self._snapshots[sub_type] = self._snapshots.get(sub_type, ()) + (subscription,)
 
             logger.info(f"Added subscription {sub_id} type={sub_type}")
             return sub_id
@@ -139,6 +574,7 @@ class SubscriptionManager:
             self.connections[subscription.connection].discard(sub_id)
             self.type_subscriptions[subscription.type].discard(sub_id)
             del self.subscriptions[sub_id]
+            self._unpublish([subscription])
 
             logger.info(f"Removed subscription {sub_id}")
             return True
@@ -147,22 +583,23 @@ class SubscriptionManager:
         """Remove all subscriptions for a connection"""
         async with self._lock:
             sub_ids = list(self.connections.get(connection, set()))
+            removed = []
             for sub_id in sub_ids:
                 if sub_id in self.subscriptions:
                     subscription = self.subscriptions[sub_id]
                     self.type_subscriptions[subscription.type].discard(sub_id)
                     del self.subscriptions[sub_id]
+                    removed.append(subscription)
+            self._unpublish(removed)
 
             if connection in self.connections:
                 del self.connections[connection]
 
             logger.info(f"Removed {len(sub_ids)} subscriptions for disconnected client")
 
-    async def get_subscriptions_by_type(self, sub_type: str) -> list:
+    async def get_subscriptions_by_type(self, sub_type: str) -> tuple:
         """Get all subscriptions of a specific type"""
-        async with self._lock:
-            sub_ids = self.type_subscriptions.get(sub_type, set())
-            return [self.subscriptions[sid] for sid in sub_ids if sid in self.subscriptions]
+        return self.snapshot(sub_type)
 
     def get_stats(self) -> dict:
         """Get subscription statistics"""
@@ -176,79 +613,253 @@ class SubscriptionManager:
 class FanaticoWebSocketServer:
     """Main WebSocket server for Fanatico L1"""
 
-    def __init__(self, blockchain_ref=None):
+    def __init__(self, blockchain_ref=None, rpc_session: Optional[RPCSession] = None):
         self.subscription_manager = SubscriptionManager()
         self.blockchain = blockchain_ref
+        self.rpc_session = rpc_session
+        self._executor = ThreadPoolExecutor(max_workers=RPC_WORKERS, thread_name_prefix='ws-rpc') \
+            if rpc_session else None
         self._server = None
         self._running = False
         self._broadcast_tasks: Set[asyncio.Task] = set()
+        self.rpc_queued = 0  # RPC requests waiting for or running on the thread pool
+        self.rpc_shed = 0
+        self.senders: Dict[WebSocketServerProtocol, ConnectionSender] = {}
+        self.send_budget = SendBudget(self.senders)
+        self.dropped_connections = 0
+        self.connections_per_ip: Dict[str, int] = defaultdict(int)
+        self.refused: Dict[str, int] = defaultdict(int)  # reason -> connections refused
+        self._admission_tokens = float(ADMISSION_BURST)
+        self._admission_updated = time.monotonic()
+        self._ip_admission: 'OrderedDict[str, list]' = OrderedDict()  # ip -> [tokens, updated]
+        self.replay_window = ReplayWindow()
+        self.active_replays = 0
+        self.pending_batchers: Dict[tuple, PendingBatcher] = {}
+        self.event_subscriber = None  # event_broker.EventSubscriber, in WebSocket worker processes
+
+    @staticmethod
+    def _client_ip(websocket: WebSocketServerProtocol) -> str:
+        ip = getattr(websocket, 'client_ip', None)
+        if ip is None:
+            ip = websocket.remote_address[0] if websocket.remote_address else ''
+        return ip
+
+    def _over_capacity(self, ip: str) -> Optional[str]:
+        """Why a connection from ip cannot be accepted now, if it cannot"""
+        if len(self.senders) >= MAX_CONNECTIONS:
+            return 'max_connections'
+        if self.connections_per_ip.get(ip, 0) >= MAX_CONNECTIONS_PER_IP:
+            return 'per_ip'
+        if self.send_budget.used >= self.send_budget.limit // 2:
+            return 'send_buffer'  # Already backed up; new subscribers would make it worse
+        return None
+
+    def _take_admission(self, ip: str) -> Optional[str]:
+        """
+        Charge a handshake to ip's token bucket and to the server-wide one,
+        or return why not ('ip_rate' or 'rate'); a refusal charges neither
+        """
+        now = time.monotonic()
+        bucket = self._ip_admission.get(ip)
+        if bucket is None:
+            bucket = self._ip_admission[ip] = [float(ADMISSION_BURST_PER_IP), now]
+            if len(self._ip_admission) > MAX_ADMISSION_CLIENTS:
+                self._ip_admission.popitem(last=False)
+        else:
+            self._ip_admission.move_to_end(ip)
+        bucket[0] = min(ADMISSION_BURST_PER_IP, bucket[0] + (now - bucket[1]) * ADMISSION_RATE_PER_IP)
+        bucket[1] = now
+        self._admission_tokens = min(ADMISSION_BURST,
+                                     self._admission_tokens + (now - self._admission_updated) * ADMISSION_RATE)
+        self._admission_updated = now
+        if bucket[0] < 1:
+            return 'ip_rate'
+        if self._admission_tokens < 1:
+            return 'rate'
+        bucket[0] -= 1
+        self._admission_tokens -= 1
+        return None
+
+    def process_request(self, websocket: AdmissionProtocol, path: str, headers) -> Optional[tuple]:
+        """
+        Runs before the WebSocket handshake: serves GET /ws-stats to trusted
+        peers and refuses connections over the limits with an HTTP error
+        (429 for the per-IP cap and rate, 503 otherwise) and a jittered Retry-After.
+        """
+        peer = websocket.remote_address[0] if websocket.remote_address else None
+        if path.split('?', 1)[0] == STATS_PATH:
+            if peer not in TRUSTED_PROXIES:
+                return HTTPStatus.FORBIDDEN, [], b"Forbidden\n"
+            body = json.dumps(self.get_stats(connections=False)).encode()
+            return HTTPStatus.OK, [("Content-Type", "application/json")], body
+
+        websocket.client_ip = client_ip(peer, headers.get('X-Forwarded-For'))
+        reason = self._over_capacity(websocket.client_ip) or self._take_admission(websocket.client_ip)
+        if reason is None:
+            return None
+        self.refused[reason] += 1
+        status = HTTPStatus.TOO_MANY_REQUESTS if reason in ('per_ip', 'ip_rate') else HTTPStatus.SERVICE_UNAVAILABLE
+        retry_after = str(random.randint(1, RETRY_AFTER_MAX))
+        return status, [("Retry-After", retry_after)], f"Connection refused: {reason}\n".encode()
+
+    def add_connection(self, websocket: WebSocketServerProtocol) -> ConnectionSender:
+        """Start the outbound queue for a new connection"""
+        self.connections_per_ip[self._client_ip(websocket)] += 1
+        sender = self.senders[websocket] = ConnectionSender(websocket, self.send_budget)
+        return sender
+
+    async def remove_connection(self, websocket: WebSocketServerProtocol):
+        """Stop a connection's outbound queue and drop its subscriptions"""
+        sender = self.senders.pop(websocket, None)
+        if sender:
+            ip = self._client_ip(websocket)
+            self.connections_per_ip[ip] -= 1
+            if not self.connections_per_ip[ip]:
+                del self.connections_per_ip[ip]
+            if sender.dropped:
+                self.dropped_connections += 1
+            sender.close()
+        await self.subscription_manager.remove_connection(websocket)
+
+    def _send(self, sub: Subscription, frame: str, droppable: bool = False):
+        sender = self.senders.get(sub.connection)
+        if sender is not None and sub.live:
+            sender.send(frame, droppable)
 
     async def handle_connection(self, websocket: WebSocketServerProtocol, path: str):
         """Handle a new WebSocket connection"""
         client_addr = websocket.remote_address
+        # Handshakes admitted together can still overshoot the limits checked in process_request
+        reason = self._over_capacity(self._client_ip(websocket))
+        if reason in ('max_connections', 'per_ip'):
+            self.refused[reason] += 1
+            await websocket.close(code=1013, reason=f"connection refused: {reason}")
+            return
         logger.info(f"New WebSocket connection from {client_addr}")
+        sender = self.add_connection(websocket)
+        call = self.rpc_session(websocket) if self.rpc_session else None
+
+        # Each message is served by its own task so requests pipeline and
+        # complete out of order; reading pauses at MAX_INFLIGHT_REQUESTS.
+        inflight = asyncio.Semaphore(MAX_INFLIGHT_REQUESTS)
+        tasks: Set[asyncio.Task] = set()
+
+        def finished(task: asyncio.Task):
+            tasks.discard(task)
+            inflight.release()
 
         try:
             async for message in websocket:
-                try:
-                    response = await self.handle_message(websocket, message)
-                    if response:
-                        await websocket.send(json.dumps(response))
-                except Exception as e:
-                    logger.error(f"Error handling message: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32603,
-                            "message": str(e)
-                        }
-                    }
-                    await websocket.send(json.dumps(error_response))
+                await inflight.acquire()
+                task = asyncio.ensure_future(self._serve_message(websocket, sender, call, message))
+                tasks.add(task)
+                task.add_done_callback(finished)
         except websockets.exceptions.ConnectionClosed:
             logger.info(f"Connection closed from {client_addr}")
         finally:
-            await self.subscription_manager.remove_connection(websocket)
+            for task in tasks:
+                task.cancel()
+            await self.remove_connection(websocket)
 
-    async def handle_message(self, websocket: WebSocketServerProtocol, message: str) -> Optional[dict]:
-        """Handle incoming JSON-RPC message"""
+    async def _serve_message(self, websocket: WebSocketServerProtocol, sender: ConnectionSender,
+                             call: Optional[Callable[[Any], bytes]], message: str):
+        replays: list = []
+        try:
+            frame = await self.handle_message(websocket, message, call, replays)
+        except Exception as e:
+            logger.error(f"Error handling message: {e}")
+            frame = rpc_error(None, -32603, str(e))
+        if frame:
+            sender.send(frame)
+        # Subscriptions this message resumed replay only once their id has been sent
+        for sub, from_block in replays:
+            task = asyncio.ensure_future(self._replay(sub, sender, from_block))
+            self._broadcast_tasks.add(task)
+            task.add_done_callback(self._broadcast_tasks.discard)
+
+    async def handle_message(
+        self,
+        websocket: WebSocketServerProtocol,
+        message: str,
+        call: Optional[Callable[[Any], bytes]] = None,
+        replays: Optional[list] = None
+    ) -> Optional[str]:
+        """
+        Handle an incoming JSON-RPC message (single or batch) and return the
+        response frame. Replays of subscriptions resumed with fromBlock are
+        appended to replays, for the caller to start once the frame is sent.
+        """
         try:
             data = json.loads(message)
         except json.JSONDecodeError:
-            return {
-                "jsonrpc": "2.0",
-                "id": None,
-                "error": {
-                    "code": -32700,
-                    "message": "Parse error"
-                }
-            }
+            return rpc_error(None, -32700, "Parse error")
+
+        if isinstance(data, list):
+            if not data:
+                return rpc_error(None, -32600, "Invalid request")
+            if call is not None and not any(
+                isinstance(request, dict) and request.get("method") in SUBSCRIPTION_METHODS
+                for request in data
+            ):
+                return await self._dispatch(call, data)
+            responses = await asyncio.gather(*(self.handle_request(websocket, request, call, replays)
+                                               for request in data))
+            return '[' + ','.join(responses) + ']'
+
+        return await self.handle_request(websocket, data, call, replays)
+
+    async def handle_request(
+        self,
+        websocket: WebSocketServerProtocol,
+        request: Any,
+        call: Optional[Callable[[Any], bytes]] = None,
+        replays: Optional[list] = None
+    ) -> str:
+        """Handle a single JSON-RPC request and return the encoded response"""
+        if not isinstance(request, dict):
+            return rpc_error(None, -32600, "Invalid request")
 
-        request_id = data.get("id")
-        method = data.get("method", "")
-        params = data.get("params", [])
+        request_id = request.get("id")
+        method = request.get("method", "")
+        params = request.get("params", [])
 
         # Route to appropriate handler
         if method == "eth_subscribe":
-            return await self.handle_subscribe(request_id, params, websocket)
+            return json.dumps(await self.handle_subscribe(request_id, params, websocket, replays))
         elif method == "eth_unsubscribe":
-            return await self.handle_unsubscribe(request_id, params)
+            return json.dumps(await self.handle_unsubscribe(request_id, params))
+        elif call is not None:
+            try:
+                return await self._dispatch(call, request)
+            except Exception as e:
+                logger.error(f"Error handling {method}: {e}")
+                return rpc_error(request_id, -32603, str(e))
         else:
-            # Forward other methods to HTTP RPC (if available)
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {method}. Use HTTP RPC on port 8545 for non-subscription methods."
-                }
-            }
+            return rpc_error(
+                request_id, -32601,
+                f"Method not found: {method}. Use HTTP RPC on port 8545 for non-subscription methods."
+            )
+
+    async def _dispatch(self, call: Callable[[Any], bytes], data: Any) -> str:
+        """Run a request or batch through the node's handlers on the RPC thread pool"""
+        if self.rpc_queued >= SHED_QUEUE_DEPTH:
+            # Overloaded: refuse now instead of queueing behind everyone else (as the HTTP server does)
+            self.rpc_shed += 1
+            return rpc_error(data.get("id") if isinstance(data, dict) else None,
+                             -32005, "server overloaded, retry later")
+        self.rpc_queued += 1
+        try:
+            payload = await asyncio.get_running_loop().run_in_executor(self._executor, call, data)
+        finally:
+            self.rpc_queued -= 1
+        return payload.decode()
 
     async def handle_subscribe(
         self,
         request_id: Any,
         params: list,
-        websocket: WebSocketServerProtocol
+        websocket: WebSocketServerProtocol,
+        replays: Optional[list] = None
     ) -> dict:
         """Handle eth_subscribe request"""
         if not params:
@@ -263,6 +874,31 @@ class FanaticoWebSocketServer:
 
         sub_type = params[0]
         filter_params = params[1] if len(params) > 1 else None
+        pending_options = None
+        if sub_type == 'newPendingTransactions' and filter_params is not None:
+            pending_options = self._pending_options(filter_params)
+            if pending_options is None:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": -32602,
+                        "message": (f"Invalid params: expected true or {{batchMs, batchSize, fullTransactions}} "
+                                    f"with batchMs <= {MAX_PENDING_BATCH_MS} and batchSize <= {PENDING_BATCH_SIZE}")
+                    }
+                }
+        from_block = None
+        if sub_type in REPLAYABLE_TYPES and isinstance(filter_params, dict) and 'fromBlock' in filter_params:
+            from_block = _block_number(filter_params['fromBlock'])
+            if from_block is None:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": -32602,
+                        "message": "Invalid params: fromBlock must be a block number"
+                    }
+                }
 
         # Validate subscription type
         valid_types = ['newHeads', 'logs', 'newPendingTransactions', 'syncing']
@@ -278,8 +914,23 @@ class FanaticoWebSocketServer:
 
         try:
             sub_id = await self.subscription_manager.add_subscription(
-                sub_type, websocket, filter_params
+                sub_type, websocket, filter_params, live=from_block is None
             )
+            if pending_options is not None:
+                self._configure_pending(self.subscription_manager.subscriptions[sub_id], pending_options)
+            if from_block is not None:
+                error = self._schedule_replay(self.subscription_manager.subscriptions[sub_id], from_block, replays)
+                if error:
+                    await self.subscription_manager.remove_subscription(sub_id)
+                    code, message = error
+                    return {
+                        "jsonrpc": "2.0",
+                        "id": request_id,
+                        "error": {
+                            "code": code,
+                            "message": message
+                        }
+                    }
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -295,6 +946,98 @@ class FanaticoWebSocketServer:
                 }
             }
 
+    @staticmethod
+    def _pending_options(params: Any) -> Optional[tuple]:
+        """
+        (window ms, batch size, full) from newPendingTransactions params, or
+        None if invalid. true asks for full transactions (as geth does); a
+        dict may also set batchMs and/or batchSize to coalesce. A window of
+        0 means one notification per transaction.
+        """
+        if params is True or params is False:
+            return 0, 0, params
+        if not isinstance(params, dict):
+            return None
+        full = params.get("fullTransactions", False)
+        window_ms = params.get("batchMs")
+        max_items = params.get("batchSize")
+        if not isinstance(full, bool):
+            return None
+        if window_ms is None and max_items is None:
+            return 0, 0, full
+        window_ms = PENDING_BATCH_MS if window_ms is None else window_ms
+        max_items = PENDING_BATCH_SIZE if max_items is None else max_items
+        if (not isinstance(window_ms, int) or isinstance(window_ms, bool) or not 0 < window_ms <= MAX_PENDING_BATCH_MS
+                or not isinstance(max_items, int) or isinstance(max_items, bool)
+                or not 0 < max_items <= PENDING_BATCH_SIZE):
+            return None
+        return window_ms, max_items, full
+
+    def _configure_pending(self, sub: Subscription, options: tuple):
+        window_ms, _, sub.full = options
+        if window_ms:
+            batcher = self.pending_batchers.get(options)
+            if batcher is None:
+                batcher = self.pending_batchers[options] = PendingBatcher(self, options)
+            sub.batch = batcher
+
+    def _schedule_replay(self, sub: Subscription, from_block: int, replays: Optional[list]) -> Optional[tuple]:
+        """
+        Queue the replay of a resumed subscription on replays (the message's
+        list, started after its response), or return (code, message) if it
+        cannot be served from the window or within the replay budget
+        """
+        if replays is None:
+            return -32000, "fromBlock is only supported on WebSocket connections"
+        window = self.replay_window
+        # The window must hold from_block on, or end at from_block - 1, to resume without a gap
+        if window.head is None or not window.oldest <= from_block <= window.head + 1:
+            return -32000, "fromBlock not in replay window; use eth_getLogs"
+        sub.from_block = from_block
+        if from_block > window.head:
+            sub.live = True  # Caught up already: deliver live from here on
+            return None
+        if self.active_replays >= MAX_CONCURRENT_REPLAYS:
+            return -32005, "too many subscriptions replaying, retry later"
+        notifications = window.count(sub, from_block)
+        if notifications > MAX_REPLAY_NOTIFICATIONS:
+            return -32005, (f"replay from block {from_block} would send {notifications} notifications "
+                            f"(limit {MAX_REPLAY_NOTIFICATIONS}); use eth_getLogs for the gap")
+        self.active_replays += 1
+        replays.append((sub, from_block))
+        return None
+
+    async def _replay(self, sub: Subscription, sender: ConnectionSender, from_block: int):
+        """
+        Send a resumed subscription's retained notifications from from_block
+        on, paced by the connection's send queue, then switch it to live
+        delivery. The catch-up check and the switch happen without an await
+        in between, so no block is missed or sent twice.
+        """
+        window = self.replay_window
+        number = from_block
+        try:
+            while not sender.closed and sub.id in self.subscription_manager.subscriptions:
+                if number > window.head:
+                    sub.live = True
+                    return
+                entry = window.blocks.get(number)
+                if entry is None:
+                    sender.drop(f"replay fell behind the retained window at block {number}")
+                    return
+                header_suffix, logs = entry
+                if sub.type == 'newHeads':
+                    frames = [NOTIFICATION_PREFIX + sub.id + header_suffix] if header_suffix else []
+                else:
+                    frames = [NOTIFICATION_PREFIX + sub.id + notification_suffix(log) for log in logs
+                              if sub.filter is None or sub.filter.matches(log)]
+                for frame in frames:
+                    await sender.wait_for_space()
+                    sender.send(frame)
+                number += 1
+        finally:
+            self.active_replays -= 1
+
     async def handle_unsubscribe(self, request_id: Any, params: list) -> dict:
         """Handle eth_unsubscribe request"""
         if not params:
@@ -318,7 +1061,7 @@ class FanaticoWebSocketServer:
 
     async def broadcast_new_head(self, block: dict):
         """Broadcast new block header to all newHeads subscribers"""
-        subscriptions = await self.subscription_manager.get_subscriptions_by_type('newHeads')
+        subscriptions = self.subscription_manager.snapshot('newHeads')
 
         # Format block header according to Ethereum spec
         header = {
@@ -341,83 +1084,92 @@ class FanaticoWebSocketServer:
             "baseFeePerGas": block.get("baseFeePerGas", "0x4a817c800"),  # 20 Gwei
         }
 
+        suffix = notification_suffix(header)
+        number = _block_number(header["number"])
+        if number is not None:
+            self.replay_window.add(number, header_suffix=suffix)
         for sub in subscriptions:
-            notification = {
-                "jsonrpc": "2.0",
-                "method": "eth_subscription",
-                "params": {
-                    "subscription": sub.id,
-                    "result": header
-                }
-            }
-            try:
-                await sub.connection.send(json.dumps(notification))
-            except Exception as e:
-                logger.error(f"Error sending newHead notification: {e}")
+            if number is not None and number < sub.from_block:
+                continue
+            self._send(sub, NOTIFICATION_PREFIX + sub.id + suffix)
+
+    async def broadcast_block(self, block: dict, logs: list):
+        """
+        Broadcast a block's header and then its logs. Prefer this to separate
+        broadcast_new_head/broadcast_logs calls: the block enters the replay
+        window complete, so a subscription that is resuming cannot pass it
+        between the two.
+        """
+        await self.broadcast_new_head(block)
+        if logs:
+            await self.broadcast_logs(logs)
 
     async def broadcast_logs(self, logs: list):
         """Broadcast logs to matching log subscribers"""
-        subscriptions = await self.subscription_manager.get_subscriptions_by_type('logs')
-
-        for sub in subscriptions:
-            matching_logs = []
-            for log in logs:
-                if sub.filter is None or sub.filter.matches(log):
-                    matching_logs.append(log)
-
-            if matching_logs:
-                for log in matching_logs:
-                    notification = {
-                        "jsonrpc": "2.0",
-                        "method": "eth_subscription",
-                        "params": {
-                            "subscription": sub.id,
-                            "result": log
-                        }
-                    }
-                    try:
-                        await sub.connection.send(json.dumps(notification))
-                    except Exception as e:
-                        logger.error(f"Error sending log notification: {e}")
-
-    async def broadcast_pending_transaction(self, tx_hash: str):
-        """Broadcast pending transaction hash to subscribers"""
-        subscriptions = await self.subscription_manager.get_subscriptions_by_type('newPendingTransactions')
-
+        match = self.subscription_manager.log_index.match
+        numbers = [_block_number(log.get("blockNumber")) for log in logs]
+        by_block: Dict[int, list] = defaultdict(list)
+        for log, number in zip(logs, numbers):
+            if number is not None:
+                by_block[number].append(log)
+        for number, block_logs in by_block.items():
+            self.replay_window.add(number, logs=block_logs)
+
+        for log, number in zip(logs, numbers):
+            suffix = None  # Each log is encoded once, on first match
+            for sub in match(log):
+                if number is not None and number < sub.from_block:
+                    continue
+                if suffix is None:
+                    suffix = notification_suffix(log)
+                self._send(sub, NOTIFICATION_PREFIX + sub.id + suffix)
+
+    async def broadcast_pending_transaction(self, tx_hash: str, tx: Optional[dict] = None):
+        """
+        Broadcast a pending transaction (its hash, or tx for subscriptions
+        that asked for full transactions) to subscribers; batched
+        subscriptions get it with their batcher's next flush
+        """
+        subscriptions = self.subscription_manager.snapshot('newPendingTransactions')
+        full_tx = tx if tx is not None else {"hash": tx_hash}
+
+        hash_suffix = full_suffix = None
         for sub in subscriptions:
-            notification = {
-                "jsonrpc": "2.0",
-                "method": "eth_subscription",
-                "params": {
-                    "subscription": sub.id,
-                    "result": tx_hash
-                }
-            }
-            try:
-                await sub.connection.send(json.dumps(notification))
-            except Exception as e:
-                logger.error(f"Error sending pending tx notification: {e}")
+            if sub.batch is not None:
+                continue
+            if sub.full:
+                if full_suffix is None:
+                    full_suffix = notification_suffix(full_tx)
+                self._send(sub, NOTIFICATION_PREFIX + sub.id + full_suffix, droppable=True)
+            else:
+                if hash_suffix is None:
+                    hash_suffix = notification_suffix(tx_hash)
+                self._send(sub, NOTIFICATION_PREFIX + sub.id + hash_suffix, droppable=True)
+
+        for batcher in tuple(self.pending_batchers.values()):
+            batcher.add(full_tx if batcher.full else tx_hash)
+
+    def _send_pending_batch(self, batcher: PendingBatcher, items: list):
+        """Flush one batcher: a single notification with all its items to each of its subscribers"""
+        suffix = None
+        for sub in self.subscription_manager.snapshot('newPendingTransactions'):
+            if sub.batch is batcher:
+                if suffix is None:
+                    suffix = notification_suffix(items)
+                self._send(sub, NOTIFICATION_PREFIX + sub.id + suffix, droppable=True)
+        if suffix is None:
+            self.pending_batchers.pop(batcher.key, None)  # No subscribers left
 
     async def broadcast_syncing(self, syncing_status: Any):
         """Broadcast syncing status changes"""
-        subscriptions = await self.subscription_manager.get_subscriptions_by_type('syncing')
+        subscriptions = self.subscription_manager.snapshot('syncing')
 
+        suffix = notification_suffix(syncing_status)
         for sub in subscriptions:
-            notification = {
-                "jsonrpc": "2.0",
-                "method": "eth_subscription",
-                "params": {
-                    "subscription": sub.id,
-                    "result": syncing_status
-                }
-            }
-            try:
-                await sub.connection.send(json.dumps(notification))
-            except Exception as e:
-                logger.error(f"Error sending syncing notification: {e}")
+            self._send(sub, NOTIFICATION_PREFIX + sub.id + suffix)
 
-    async def start(self, host: str = WS_HOST, port: int = WS_PORT):
-        """Start the WebSocket server"""
+    async def start(self, host: str = WS_HOST, port: int = WS_PORT, reuse_port: bool = False):
+        """Start the WebSocket server (reuse_port: share the port with other worker processes)"""
         self._running = True
         self._server = await websockets.serve(
             self.handle_connection,
@@ -425,8 +1177,10 @@ class FanaticoWebSocketServer:
             port,
             ping_interval=PING_INTERVAL,
             ping_timeout=PING_TIMEOUT,
-            max_size=2**20,  # 1MB max message size
-            max_queue=32
+            max_size=MAX_MESSAGE_SIZE,
+            max_queue=READ_QUEUE_SIZE,
+            create_protocol=functools.partial(AdmissionProtocol, fanatico=self),
+            reuse_port=reuse_port or None
         )
 
         logger.info(f"""
@@ -434,12 +1188,14 @@ class FanaticoWebSocketServer:
         ║      FANATICO L1 WebSocket Server v0.5.0.0                    ║
         ╠═══════════════════════════════════════════════════════════════╣
         ║  WebSocket URL: ws://{host}:{port}
-        ║  Max Connections: {MAX_CONNECTIONS}
+        ║  Max Connections: {MAX_CONNECTIONS} ({MAX_CONNECTIONS_PER_IP} per IP)
+        ║  Stats: http://{host}:{port}{STATS_PATH}
         ║  Ping Interval: {PING_INTERVAL}s
         ║
         ║  Supported Methods:
         ║  - eth_subscribe
         ║  - eth_unsubscribe
+        ║  - {'all JSON-RPC methods (in-process)' if self.rpc_session else 'subscriptions only'}
         ║
         ║  Subscription Types:
         ║  - newHeads: New block headers
@@ -461,14 +1217,37 @@ class FanaticoWebSocketServer:
         # Cancel all broadcast tasks
         for task in self._broadcast_tasks:
             task.cancel()
+        for batcher in self.pending_batchers.values():
+            batcher.flush()
+
+        if self._executor:
+            self._executor.shutdown(wait=False)
 
         logger.info("WebSocket server stopped")
 
-    def get_stats(self) -> dict:
-        """Get server statistics"""
+    def get_stats(self, connections: bool = True) -> dict:
+        """Get server statistics (connections: include the per-connection send queues)"""
+        senders = list(self.senders.values())
         return {
             "running": self._running,
-            "subscriptions": self.subscription_manager.get_stats()
+            "connections": {
+                "open": len(senders),
+                "max": MAX_CONNECTIONS,
+                "distinct_ips": len(self.connections_per_ip),
+                "max_per_ip": max(self.connections_per_ip.values(), default=0),
+                "refused": dict(self.refused)
+            },
+            "memory": dict(self.send_budget.get_stats(), per_connection_limit_bytes=SEND_BUFFER_BYTES),
+            "rpc": {"queued": self.rpc_queued, "shed": self.rpc_shed},
+            "subscriptions": self.subscription_manager.get_stats(),
+            "replay": dict(self.replay_window.get_stats(), active_replays=self.active_replays),
+            "events": self.event_subscriber.get_stats() if self.event_subscriber else None,
+            "send_queues": {
+                "queued_frames": sum(len(sender.queue) for sender in senders),
+                "max_lag_seconds": round(max((sender.lag() for sender in senders), default=0.0), 3),
+                "dropped_connections": self.dropped_connections,
+                "connections": [sender.get_stats() for sender in senders] if connections else None
+            }
         }
 
 
@@ -497,6 +1276,15 @@ class WebSocketEventHooks:
                 cls._loop
             )
 
+    @classmethod
+    def on_block(cls, block: dict, logs: list):
+        """Called when a block is sealed, with the logs of its receipts"""
+        if cls._server and cls._loop:
+            asyncio.run_coroutine_threadsafe(
+                cls._server.broadcast_block(block, logs),
+                cls._loop
+            )
+
     @classmethod
     def on_logs(cls, logs: list):
         """Called when new logs are emitted"""
@@ -507,11 +1295,11 @@ class WebSocketEventHooks:
             )
 
     @classmethod
-    def on_pending_transaction(cls, tx_hash: str):
-        """Called when a new pending transaction is received"""
+    def on_pending_transaction(cls, tx_hash: str, tx: Optional[dict] = None):
+        """Called when a new pending transaction is received (tx: its RPC form, if known)"""
         if cls._server and cls._loop:
             asyncio.run_coroutine_threadsafe(
-                cls._server.broadcast_pending_transaction(tx_hash),
+                cls._server.broadcast_pending_transaction(tx_hash, tx),
                 cls._loop
             )
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark for the RPC response path
+
+Measures the cost of encoding (1) a full block with receipts and logs as
+an eth_getBlockByNumber response and (2) a 100-element eth_call batch, for
+each codec in web3_api_v0494_fully_fixed.JSON_CODECS, comparing:
+
+    list       - encoding the whole response list in one call
+    concat     - encoding each envelope and joining the bytes
+    raw        - encode_batch() with RawJSON results that are already
+                 encoded (response cache / single-flight hits)
+
+Usage:
+    python3 bench_json_codec.py [--transactions 500] [--batch 100] [--repeat 200]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+logging.disable(logging.CRITICAL)
+
+import web3_api_v0494_fully_fixed as node  # noqa: E402
+
+
+def make_block(transactions: int) -> dict:
+    """A sealed block shaped like the ones the node stores"""
+    receipts = []
+    for index in range(transactions):
+        tx_hash = '0x' + f'{index:064x}'
+        receipts.append({
+            'transactionHash': tx_hash,
+            'transactionIndex': hex(index),
+            'from': '0x742d35cc6634c0532925a3b844bc9e7595f0beb7',
+            'to': '0x' + f'{index:040x}',
+            'status': '0x1',
+            'blockNumber': '0x2a',
+            'gasUsed': hex(21000 + index),
+            'contractAddress': None,
+            'logs': [{
+                'address': '0x' + f'{index:040x}',
+                'topics': ['0x' + 'dd' * 32, '0x' + f'{index:064x}'],
+                'data': '0x' + f'{index:064x}',
+                'blockNumber': '0x2a',
+                'transactionHash': tx_hash,
+                'transactionIndex': hex(index),
+                'blockHash': '0x' + 'ab' * 32,
+                'logIndex': hex(index),
+                'removed': False
+            }],
+            'logsBloom': node.EMPTY_BLOOM
+        })
+    return {
+        'number': '0x2a',
+        'hash': '0x' + 'ab' * 32,
+        'parentHash': '0x' + 'cd' * 32,
+        'timestamp': hex(int(time.time())),
+        'transactions': receipts,
+        'baseFeePerGas': hex(node.BASE_FEE),
+        'logsBloom': node.EMPTY_BLOOM
+    }
+
+
+def per_op(fn, repeat: int) -> float:
+    """Best-of-5 microseconds per call"""
+    best = float('inf')
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1e6
+
+
+def bench(name: str, responses: list, repeat: int):
+    """Time one response list under every codec and assembly strategy"""
+    raw_responses = [dict(r, result=node.RawJSON(node.json_encode(r['result']))) for r in responses]
+    print(f"\n{name}")
+    print(f"  {'codec':<8} {'list':>12} {'concat':>12} {'raw':>12}   (us per response body)")
+    for codec in node.JSON_CODECS:
+        node.set_json_codec(codec)
+        encode = node.json_encode
+
+        def as_list():
+            return encode(responses) if len(responses) > 1 else encode(responses[0])
+
+        def concat():
+            return b'[' + b','.join(map(node.encode_response, responses)) + b']'
+
+        def raw():
+            return node.encode_batch(raw_responses)
+
+        assert json.loads(concat()) == json.loads(raw())
+        print(f"  {codec:<8} {per_op(as_list, repeat):>12.1f} {per_op(concat, repeat):>12.1f} "
+              f"{per_op(raw, repeat):>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON codec benchmark for RPC responses')
+    parser.add_argument('--transactions', type=int, default=500, help='Receipts in the full block')
+    parser.add_argument('--batch', type=int, default=100, help='eth_call responses per batch')
+    parser.add_argument('--repeat', type=int, default=200, help='Encodings per timing run')
+    args = parser.parse_args()
+
+    print(f"codecs available: {', '.join(node.JSON_CODECS)}")
+    block = {'jsonrpc': '2.0', 'result': make_block(args.transactions), 'id': 1}
+    bench(f"eth_getBlockByNumber, full block ({args.transactions} receipts)", [block], max(args.repeat // 10, 5))
+
+    batch = [{'jsonrpc': '2.0', 'result': '0x' + f'{i:064x}', 'id': i} for i in range(args.batch)]
+    bench(f"eth_call batch ({args.batch} responses)", batch, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
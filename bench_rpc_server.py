@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+HTTP front-end load benchmark: Flask development server vs AsyncRPCServer
+
+Starts web3_api_v0494_fully_fixed.py once per front end (--server flask /
+--server async), drives it with N client processes over keep-alive
+connections and reports requests/sec and latency percentiles.
+
+Usage:
+    python3 bench_rpc_server.py [--clients 32] [--duration 10] [--method eth_blockNumber]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+NODE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web3_api_v0494_fully_fixed.py')
+
+
+def free_port() -> int:
+    """Pick an unused TCP port"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    """Block until the server accepts connections"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def client_worker(port: int, body: bytes, duration: float, queue):
+    """Send requests back to back on one keep-alive connection"""
+    latencies = []
+    errors = 0
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = {'Content-Type': 'application/json'}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('POST', '/', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    queue.put((latencies, errors))
+
+
+def run_benchmark(server: str, clients: int, duration: float, body: bytes) -> dict:
+    """Benchmark one front end and return its summary"""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, NODE_SCRIPT, '--server', server, '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        queue = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=client_worker, args=(port, body, duration, queue))
+            for _ in range(clients)
+        ]
+        for w in workers:
+            w.start()
+        results = [queue.get() for _ in workers]
+        for w in workers:
+            w.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    if not latencies:
+        return {'server': server, 'requests': 0, 'errors': errors}
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'server': server,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / duration,
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flask vs async JSON-RPC front-end benchmark')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent keep-alive clients')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per run')
+    parser.add_argument('--method', default='eth_blockNumber', help='JSON-RPC method to call')
+    parser.add_argument('--servers', default='flask,async', help='Comma-separated front ends')
+    args = parser.parse_args()
+
+    body = json.dumps({'jsonrpc': '2.0', 'method': args.method, 'params': [], 'id': 1}).encode()
+
+    print("=" * 70)
+    print(f"JSON-RPC front-end benchmark: {args.method}, {args.clients} clients, {args.duration}s")
+    print("=" * 70)
+    print(f"{'server':<8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for server in args.servers.split(','):
+        r = run_benchmark(server, args.clients, args.duration, body)
+        if not r['requests']:
+            print(f"{server:<8} no successful requests ({r['errors']} errors)")
+            continue
+        print(f"{r['server']:<8} {r['requests']:>9} {r['errors']:>7} {r['rps']:>9.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Shared fixtures: node chains (in memory or in a data directory) wired up
+as the module-level blockchain the RPC handlers use, and a contract that
+emits one log per call.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'V05000', 'src'))
+
+import web3_api_v0494_fully_fixed as node  # noqa: E402
+
+SENDER = '0x742d35cc6634c0532925a3b844bc9e7595f0beb7'
+EMITTER = '0x' + '33' * 20
+OTHER_EMITTER = '0x' + '44' * 20
+# LOG2 with topic0 = calldata[0:32], topic1 = calldata[32:64] and no data
+EMITTER_CODE = '0x60203560003560006000a200'
+
+
+def topic(value: int) -> str:
+    return '0x' + f'{value:064x}'
+
+
+def rpc(method: str, *params):
+    """Call a handler through the node's request path; returns the result or raises on an error"""
+    response = node.process_single_request({'jsonrpc': '2.0', 'method': method, 'params': list(params), 'id': 1})
+    if 'error' in response:
+        raise node.RPCError(response['error']['code'], response['error']['message'])
+    result = response['result']
+    return node.json.loads(bytes(result)) if isinstance(result, node.RawJSON) else result
+
+
+def emit(topic0: int, topic1: int = 0, to: str = EMITTER) -> str:
+    """Seal a block holding one call to an emitter contract; returns the transaction hash"""
+    return rpc('eth_sendTransaction', {
+        'from': SENDER, 'to': to, 'data': topic(topic0) + topic(topic1)[2:], 'gas': '0x100000'
+    })
+
+
+@pytest.fixture
+def make_chain(monkeypatch):
+    """Factory for chains installed as node.blockchain, with fresh RPC caches"""
+    monkeypatch.setattr(node, 'response_cache', node.ResponseCache(node.RESPONSE_CACHE_BYTES))
+    monkeypatch.setattr(node, 'single_flight', node.SingleFlight())
+
+    def make(data_dir=None):
+        chain = node.Blockchain(str(data_dir) if data_dir else None)
+        chain.evm.balances[SENDER] = 10**24
+        chain.evm.contracts[EMITTER] = EMITTER_CODE
+        chain.evm.contracts[OTHER_EMITTER] = EMITTER_CODE
+        monkeypatch.setattr(node, 'blockchain', chain)
+        return chain
+    return make
+
+
+@pytest.fixture
+def chain(make_chain):
+    return make_chain()
@@ -0,0 +1,83 @@
+"""Response cache, eth_call cache and single-flight: keys, invalidation and what is never cached"""
+
+import threading
+import time
+
+from conftest import EMITTER, SENDER, emit, node, rpc
+
+COUNTER = '0x' + '55' * 20
+# Increments storage slot 0 and returns the new value
+COUNTER_CODE = '0x600054600101600055600054600052602060' + '00f3'
+
+
+def test_receipt_lookup_ignores_hash_case(chain):
+    tx_hash = emit(1)
+    mixed = '0x' + tx_hash[2:].upper()
+    receipt = rpc('eth_getTransactionReceipt', mixed)  # Cold cache
+    assert receipt['transactionHash'] == tx_hash
+    assert rpc('eth_getTransactionReceipt', tx_hash) == receipt
+    assert rpc('eth_getTransactionReceipt', mixed) == receipt
+    assert node.response_cache.to_dict()['methods']['eth_getTransactionReceipt']['hits'] == 2
+
+
+def test_unknown_results_are_not_cached(chain):
+    assert rpc('eth_getBlockByNumber', '0x1', False) is None
+    assert rpc('eth_getTransactionReceipt', '0x' + '00' * 32) is None
+    emit(1)
+    assert rpc('eth_getBlockByNumber', '0x1', False)['hash'] == chain.blocks[1]['hash']
+    assert rpc('eth_getBlockByNumber', '0x1', False)['hash'] == chain.blocks[1]['hash']
+    assert node.response_cache.to_dict()['methods']['eth_getBlockByNumber']['hits'] == 1
+
+
+def test_call_cache_is_invalidated_by_writes_to_the_contract(chain):
+    chain.evm.contracts[COUNTER] = COUNTER_CODE
+    emit(0)  # Publish the contract
+
+    def call():
+        return node.from_hex(rpc('eth_call', {'to': COUNTER, 'data': '0x01'}, 'latest'))
+
+    assert call() == 1
+    assert call() == 1
+    assert chain.call_cache.to_dict()['contracts'][COUNTER] == {'hits': 1, 'misses': 1, 'hitRatio': 0.5}
+
+    emit(5, to=EMITTER)  # Another contract: the cached result stays valid
+    assert call() == 1
+    assert chain.call_cache.to_dict()['contracts'][COUNTER]['hits'] == 2
+
+    rpc('eth_sendTransaction', {'from': SENDER, 'to': COUNTER, 'data': '0x01', 'gas': '0x100000'})
+    assert call() == 2
+    assert chain.call_cache.to_dict()['contracts'][COUNTER]['misses'] == 2
+
+
+def test_cheap_reads_are_not_coalesced(chain):
+    response = node.process_single_request({'jsonrpc': '2.0', 'method': 'eth_getBalance',
+                                            'params': [SENDER, 'latest'], 'id': 1})
+    assert not isinstance(response['result'], node.RawJSON)
+    assert node.RPC_METHODS['eth_getBalance'].cost < node.SINGLE_FLIGHT_MIN_COST <= node.RPC_METHODS['eth_call'].cost
+
+
+def test_single_flight_shares_one_execution():
+    flight = node.SingleFlight()
+    release, executions, results = threading.Event(), [], []
+
+    def slow():
+        executions.append(1)
+        release.wait(5)
+        return {'value': 1}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do(('k',), slow))) for _ in range(4)]
+    threads[0].start()
+    while not flight._calls:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flight._calls[('k',)][1] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1 and flight.executions_saved == 3
+    assert all(isinstance(result, node.RawJSON) for result in results)
+    assert {node.json.loads(bytes(result))['value'] for result in results} == {1}
+    assert flight.do(('k',), lambda: {'value': 2}) == {'value': 2}  # Uncontended: not encoded
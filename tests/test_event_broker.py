@@ -0,0 +1,77 @@
+"""Built-in event broker: resuming by epoch and cursor, and malformed hellos"""
+
+import json
+import socket
+
+import pytest
+
+from conftest import emit
+
+from event_broker import EventPublisher
+
+
+@pytest.fixture
+def publisher(chain, tmp_path):
+    publisher = EventPublisher(chain.events, chain.block_event, f"unix://{tmp_path}/events.sock")
+    publisher.start()
+    return publisher
+
+
+class Subscriber:
+    def __init__(self, publisher: EventPublisher, hello: bytes):
+        self.sock = socket.socket(socket.AF_UNIX)
+        self.sock.settimeout(5)
+        self.sock.connect(publisher.address)
+        self.sock.sendall(hello + b"\n")
+        self.lines = self.sock.makefile("rb")
+
+    def message(self) -> dict:
+        return json.loads(self.lines.readline())
+
+    def messages(self, count: int) -> list:
+        return [self.message() for _ in range(count)]
+
+    def close(self):
+        self.lines.close()
+        self.sock.close()
+
+
+def _hello(epoch, cursor) -> bytes:
+    return json.dumps({"epoch": epoch, "cursor": cursor}).encode()
+
+
+def test_resume_by_epoch_and_cursor(chain, publisher):
+    subscriber = Subscriber(publisher, _hello(None, None))
+    hello = subscriber.message()
+    assert hello == {"kind": "hello", "epoch": publisher.epoch, "seq": chain.events.seq}
+    emit(1)  # One pendingTransaction and one block event per transaction
+    first = subscriber.messages(2)
+    assert [m["seq"] for m in first] == [hello["seq"] + 1, hello["seq"] + 2]
+    assert first[1]["kind"] == "block" and first[1]["block"]["hash"] == chain.blocks[1]["hash"]
+    subscriber.close()
+
+    emit(2)
+    emit(3)
+    resumed = Subscriber(publisher, _hello(publisher.epoch, first[1]["seq"]))
+    assert resumed.message()["seq"] == first[1]["seq"]
+    events = resumed.messages(4)
+    assert [m["seq"] for m in events] == list(range(first[1]["seq"] + 1, first[1]["seq"] + 5))
+    assert [m["block"]["hash"] for m in events if m["kind"] == "block"] == \
+        [chain.blocks[2]["hash"], chain.blocks[3]["hash"]]
+    resumed.close()
+
+    # Another epoch (the node restarted): live from the current head
+    restarted = Subscriber(publisher, _hello("0" * 32, 1))
+    assert restarted.message()["seq"] == chain.events.seq
+    restarted.close()
+
+
+@pytest.mark.parametrize("hello", [b"[1, 2]", b"nope", b'{"epoch": 5, "cursor": 1}',
+                                   b'{"epoch": null, "cursor": "0x1"}', b'{"cursor": -1}', b'{"cursor": true}'])
+def test_malformed_hello_closes_the_connection(publisher, hello):
+    subscriber = Subscriber(publisher, hello)
+    assert subscriber.lines.readline() == b""
+    subscriber.close()
+    healthy = Subscriber(publisher, _hello(None, None))
+    assert healthy.message()["kind"] == "hello"
+    healthy.close()
@@ -0,0 +1,53 @@
+"""EventBus: cursors, missed events, the byte bound and block events by number"""
+
+from conftest import EMITTER, emit, node, topic
+
+import event_broker
+
+
+def _tx(size: int) -> dict:
+    return {'hash': '0x01', 'input': '0x' + 'ab' * (size // 2)}
+
+
+def test_read_from_cursor_and_missed():
+    bus = node.EventBus(size=4)
+    for n in range(3):
+        bus.publish('block', n)
+    assert bus.read(0) == (3, [(1, 'block', 0), (2, 'block', 1), (3, 'block', 2)], 0)
+    assert bus.read(1, limit=1) == (2, [(2, 'block', 1)], 0)
+
+    for n in range(3, 9):
+        bus.publish('block', n)
+    cursor, events, missed = bus.read(2)
+    assert [seq for seq, _, _ in events] == [6, 7, 8, 9]
+    assert (cursor, missed) == (9, 3)
+    assert bus.read(cursor) == (9, [], 0)
+
+
+def test_byte_bound_evicts_oldest_events(monkeypatch):
+    monkeypatch.setattr(node, 'EVENT_OVERHEAD', 0)
+    bus = node.EventBus(size=100, max_bytes=10000)
+    for _ in range(5):
+        bus.publish('pendingTransaction', _tx(4000))
+    assert bus.bytes <= 10000
+    cursor, events, missed = bus.read(0)
+    assert [seq for seq, _, _ in events] == [4, 5]
+    assert (cursor, missed) == (5, 3)
+
+    # One event larger than the whole budget is still delivered
+    bus.publish('pendingTransaction', _tx(20000))
+    assert bus.read(5) == (6, [(6, 'pendingTransaction', _tx(20000))], 0)
+    assert bus.bytes == len(_tx(20000)['input'])
+
+
+def test_block_events_carry_the_number(chain):
+    cursor = chain.events.seq
+    emit(5, 6)
+    _, events, _ = chain.events.read(cursor)
+    assert [(kind, payload) for _, kind, payload in events if kind == 'block'] == [('block', 1)]
+
+    header, logs = chain.block_event(1)
+    assert header['hash'] == chain.blocks[1]['hash']
+    assert [(log['address'], log['topics']) for log in logs] == [(EMITTER, [topic(5), topic(6)])]
+    assert event_broker.event_message(9, 'block', 1, chain.block_event) == \
+        {'seq': 9, 'kind': 'block', 'block': header, 'logs': logs}
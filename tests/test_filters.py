@@ -0,0 +1,117 @@
+"""Polling filters: incremental cursors, expiry and concurrent polls"""
+
+import threading
+
+import pytest
+
+from conftest import EMITTER, OTHER_EMITTER, emit, node, rpc, topic
+
+
+def test_block_filter_returns_each_block_once(chain):
+    filter_id = rpc('eth_newBlockFilter')
+    emit(1)
+    emit(2)
+    assert rpc('eth_getFilterChanges', filter_id) == [chain.blocks[1]['hash'], chain.blocks[2]['hash']]
+    assert rpc('eth_getFilterChanges', filter_id) == []
+    emit(3)
+    assert rpc('eth_getFilterChanges', filter_id) == [chain.blocks[3]['hash']]
+
+
+def test_log_filter_is_incremental(chain):
+    emit(7)  # Before the filter: not delivered
+    filter_id = rpc('eth_newFilter', {'address': OTHER_EMITTER})
+    emit(7, to=OTHER_EMITTER)
+    emit(8, to=EMITTER)
+    changes = rpc('eth_getFilterChanges', filter_id)
+    assert [(log['address'], log['topics'][0]) for log in changes] == [(OTHER_EMITTER, topic(7))]
+    assert rpc('eth_getFilterChanges', filter_id) == []
+
+
+def test_log_filter_from_block_replays_history(chain):
+    emit(1)
+    emit(2)
+    filter_id = rpc('eth_newFilter', {'fromBlock': '0x2', 'topics': [[topic(1), topic(2)]]})
+    assert [log['blockNumber'] for log in rpc('eth_getFilterChanges', filter_id)] == ['0x2']
+    emit(2)
+    assert [log['blockNumber'] for log in rpc('eth_getFilterChanges', filter_id)] == ['0x3']
+    assert [log['blockNumber'] for log in rpc('eth_getFilterLogs', filter_id)] == ['0x2', '0x3']
+
+
+def test_pending_transaction_filter(chain):
+    filter_id = rpc('eth_newPendingTransactionFilter')
+    hashes = [emit(1), emit(2)]
+    assert rpc('eth_getFilterChanges', filter_id) == hashes
+    assert rpc('eth_getFilterChanges', filter_id) == []
+
+
+def test_uninstall_and_expiry(chain, monkeypatch):
+    filter_id = rpc('eth_newBlockFilter')
+    assert rpc('eth_uninstallFilter', filter_id) is True
+    with pytest.raises(node.RPCError):
+        rpc('eth_getFilterChanges', filter_id)
+
+    filter_id = rpc('eth_newBlockFilter')
+    monkeypatch.setattr(node, 'FILTER_TTL', -1)
+    monkeypatch.setattr(node, 'FILTER_SWEEP_INTERVAL', 0)
+    with pytest.raises(node.RPCError):
+        rpc('eth_getFilterChanges', filter_id)
+
+
+class RacingFilter:
+    """A PollFilter whose cursor reads wait for a second reader, if one can get there"""
+
+    def __init__(self, poll_filter: node.PollFilter):
+        self.__dict__.update(vars(poll_filter))
+        self._cursor = poll_filter.cursor
+        self._barrier = threading.Barrier(2, timeout=0.5)
+
+    @property
+    def cursor(self):
+        value = self._cursor
+        try:
+            self._barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+        return value
+
+    @cursor.setter
+    def cursor(self, value):
+        self._cursor = value
+
+
+def test_concurrent_polls_get_disjoint_ranges(chain):
+    filter_id = rpc('eth_newBlockFilter')
+    for i in range(3):
+        emit(i)
+    hashes = [chain.blocks[n]['hash'] for n in range(1, 4)]
+    chain.filters.filters[filter_id] = RacingFilter(chain.filters.filters[filter_id])
+
+    results = []
+    pollers = [threading.Thread(target=lambda: results.append(chain.filters.get_changes(filter_id)))
+               for _ in range(2)]
+    for thread in pollers:
+        thread.start()
+    for thread in pollers:
+        thread.join()
+    assert sorted(results, key=len) == [[], hashes]
+
+
+def test_failed_poll_keeps_its_range(chain, monkeypatch):
+    filter_id = rpc('eth_newFilter', {'address': EMITTER})
+    emit(1)
+    emit(2)
+    monkeypatch.setattr(node, 'MAX_LOG_RESULTS', 1)
+    with pytest.raises(node.RPCError) as error:
+        rpc('eth_getFilterChanges', filter_id)
+    assert error.value.code == -32005
+    monkeypatch.setattr(node, 'MAX_LOG_RESULTS', 10)
+    assert [log['blockNumber'] for log in rpc('eth_getFilterChanges', filter_id)] == ['0x1', '0x2']
+
+
+def test_old_from_block_catches_up_over_several_polls(chain, monkeypatch):
+    for i in range(5):
+        emit(i)
+    monkeypatch.setattr(node, 'MAX_LOG_BLOCK_RANGE', 2)
+    filter_id = rpc('eth_newFilter', {'fromBlock': '0x1'})
+    polls = [[log['blockNumber'] for log in rpc('eth_getFilterChanges', filter_id)] for _ in range(4)]
+    assert polls == [['0x1', '0x2'], ['0x3', '0x4'], ['0x5'], []]
@@ -0,0 +1,119 @@
+"""fco_getTransactionsByAddress paging and single-writer state snapshots"""
+
+import threading
+
+import pytest
+
+from conftest import EMITTER, OTHER_EMITTER, SENDER, emit, node, rpc
+
+COUNTER = '0x' + '55' * 20
+# Increments storage slot 0 on every call
+COUNTER_CODE = '0x600054600101600055600054600052602060' + '00f3'
+
+
+@pytest.fixture
+def history_chain(chain):
+    hashes = [emit(i, to=EMITTER if i % 3 else OTHER_EMITTER) for i in range(10)]
+    return chain, hashes
+
+
+def _pages(address: str, limit: int):
+    pages, cursor = [], None
+    while True:
+        page = rpc('fco_getTransactionsByAddress', address, cursor, limit)
+        pages.append([tx['transactionHash'] for tx in page['transactions']])
+        cursor = page['nextCursor']
+        if cursor is None:
+            return pages
+
+
+def test_pages_are_newest_first_and_disjoint(history_chain):
+    _, hashes = history_chain
+    pages = _pages(SENDER, 4)
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert [h for page in pages for h in page] == hashes[::-1]
+
+    emitter_hashes = [h for i, h in enumerate(hashes) if i % 3]
+    assert [h for page in _pages(EMITTER, 5) for h in page] == emitter_hashes[::-1]
+
+
+def test_cursor_is_stable_while_the_chain_grows(history_chain):
+    _, hashes = history_chain
+    first = rpc('fco_getTransactionsByAddress', SENDER, None, 6)
+    emit(99)
+    rest = rpc('fco_getTransactionsByAddress', SENDER, first['nextCursor'], 6)
+    assert [tx['transactionHash'] for tx in rest['transactions']] == hashes[3::-1]
+    assert rest['nextCursor'] is None
+
+
+def test_limit_is_clamped_and_accepts_hex(history_chain):
+    assert len(rpc('fco_getTransactionsByAddress', SENDER, None, 0)['transactions']) == 1
+    assert len(rpc('fco_getTransactionsByAddress', SENDER, None, '0x3')['transactions']) == 3
+    assert rpc('fco_getTransactionsByAddress', '0x' + '99' * 20) == {'transactions': [], 'nextCursor': None}
+
+
+@pytest.mark.parametrize('cursor', ['0xb', '-0x1', 'zz', '0xnope'])
+def test_invalid_cursor_is_invalid_params(history_chain, cursor):
+    with pytest.raises(node.RPCError) as error:
+        rpc('fco_getTransactionsByAddress', SENDER, cursor)
+    assert error.value.code == -32602
+
+
+def test_unpublished_postings_are_ignored(history_chain):
+    chain, hashes = history_chain
+    head = chain.get_latest_block()['number']
+    chain.address_index.append(SENDER, node.pack_position(head + 1, 0))  # Sealed, not yet published
+    page = rpc('fco_getTransactionsByAddress', SENDER, None, 2)
+    assert [tx['transactionHash'] for tx in page['transactions']] == hashes[:-3:-1]
+    with pytest.raises(node.RPCError):
+        rpc('fco_getTransactionsByAddress', SENDER, node.to_hex(len(hashes) + 1))
+
+
+def test_snapshots_are_consistent_and_immutable(chain):
+    chain.evm.contracts[COUNTER] = COUNTER_CODE
+    emit(0)  # Publish the contract
+    base = chain.get_latest_block()['number']
+    done = threading.Event()
+    errors = []
+
+    def reader():
+        while not done.is_set():
+            snapshot = chain.snapshot
+            # One increment per block after base: state always matches its own head
+            if snapshot.get_storage(COUNTER, 0) != snapshot.head['number'] - base:
+                errors.append((snapshot.head['number'], snapshot.get_storage(COUNTER, 0)))
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    kept = []
+    for _ in range(40):
+        rpc('eth_sendTransaction', {'from': SENDER, 'to': COUNTER, 'data': '0x01', 'gas': '0x100000'})
+        kept.append(chain.snapshot)
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    assert [snapshot.get_storage(COUNTER, 0) for snapshot in kept] == list(range(1, 41))
+    assert node.from_hex(rpc('eth_getStorageAt', COUNTER, '0x0')) == 40
+
+
+def test_concurrent_deploys_from_one_sender_get_distinct_nonces(chain):
+    start = threading.Barrier(20)
+    hashes = []
+
+    def deploy():
+        start.wait()
+        hashes.append(rpc('eth_sendTransaction', {'from': SENDER, 'data': COUNTER_CODE, 'gas': '0x100000'}))
+
+    senders = [threading.Thread(target=deploy) for _ in range(20)]
+    for thread in senders:
+        thread.start()
+    for thread in senders:
+        thread.join()
+
+    assert len(set(hashes)) == 20
+    receipts = [rpc('eth_getTransactionReceipt', tx_hash) for tx_hash in hashes]
+    assert len({receipt['contractAddress'] for receipt in receipts}) == 20
+    assert node.from_hex(rpc('eth_getTransactionCount', SENDER, 'latest')) == 20
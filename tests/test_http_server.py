@@ -0,0 +1,29 @@
+"""Async JSON-RPC server: malformed request heads are refused with 400"""
+
+import asyncio
+
+import pytest
+
+from conftest import node
+
+
+async def _exchange(request: bytes) -> bytes:
+    server = node.AsyncRPCServer(workers=1)
+    server._pending = asyncio.Semaphore(1)
+    listener = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0)
+    try:
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+        writer.write(request)
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.executor.shutdown(wait=False)
+
+
+@pytest.mark.parametrize('length', ['-1', 'ten'])
+def test_bad_content_length_is_400(length):
+    request = f'POST / HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}'.encode()
+    assert asyncio.run(_exchange(request)).startswith(b'HTTP/1.1 400 Bad Request\r\n')
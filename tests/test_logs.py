@@ -0,0 +1,114 @@
+"""eth_getLogs through the inverted log index and the bloom scan"""
+
+import pytest
+
+from conftest import EMITTER, OTHER_EMITTER, SENDER, emit, node, rpc, topic
+
+
+def test_keccak256_is_ethereum_keccak():
+    assert node.keccak256(b'').hex() == 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470'
+
+
+@pytest.fixture
+def logs_chain(chain):
+    for i in range(6):
+        emit(topic0=1 + i % 2, topic1=100 + i, to=EMITTER if i < 4 else OTHER_EMITTER)
+    return chain
+
+
+def _topics(logs):
+    return [(log['address'], int(log['topics'][0], 16), int(log['topics'][1], 16)) for log in logs]
+
+
+def test_index_path_by_address_and_topic0(logs_chain):
+    assert logs_chain._log_index_keys(logs_chain.parse_log_query({'address': OTHER_EMITTER})) is not None
+    logs = rpc('eth_getLogs', {'fromBlock': '0x0', 'address': OTHER_EMITTER})
+    assert _topics(logs) == [(OTHER_EMITTER, 1, 104), (OTHER_EMITTER, 2, 105)]
+
+    logs = rpc('eth_getLogs', {'fromBlock': '0x0', 'address': EMITTER, 'topics': [topic(2)]})
+    assert _topics(logs) == [(EMITTER, 2, 101), (EMITTER, 2, 103)]
+
+
+def test_bloom_path_by_second_topic(logs_chain):
+    query = {'fromBlock': '0x0', 'topics': [None, [topic(102), topic(105)]]}
+    assert logs_chain._log_index_keys(logs_chain.parse_log_query(query)) is None
+    assert _topics(rpc('eth_getLogs', query)) == [(EMITTER, 1, 102), (OTHER_EMITTER, 2, 105)]
+
+
+def test_block_range_and_blooms(logs_chain):
+    logs = rpc('eth_getLogs', {'fromBlock': '0x2', 'toBlock': '0x3', 'topics': [None, None]})
+    assert [log['blockNumber'] for log in logs] == ['0x2', '0x3']
+    block = logs_chain.blocks[2]
+    bloom = node.from_hex(block['logsBloom'])
+    for log in logs_chain._block_logs(block):
+        for item in [log['address']] + log['topics']:
+            mask = node.bloom_bits(bytes.fromhex(item[2:]))
+            assert bloom & mask == mask
+
+
+def test_empty_address_list_is_no_filter(logs_chain):
+    assert len(rpc('eth_getLogs', {'fromBlock': '0x0', 'address': []})) == 6
+    assert len(rpc('eth_getLogs', {'fromBlock': '0x0', 'address': [], 'topics': [topic(1)]})) == 3
+
+
+def test_bloom_candidates_chunked_match_pure_python(monkeypatch, tmp_path):
+    masks = [node.bloom_bits(bytes([i])) for i in range(8)]
+    blooms = [masks[i % 8] | masks[(i * 3) % 8] for i in range(300)]
+    groups = [[masks[1], masks[6]], [masks[3]]]
+    expected = [n for n, bloom in enumerate(blooms)
+                if all(any(bloom & m == m for m in group) for group in groups)]
+
+    monkeypatch.setattr(node, 'BLOOM_SCAN_CHUNK', 64)
+    for index in (node.LogBloomIndex(), node.LogBloomIndex(str(tmp_path / 'blooms.dat'))):
+        for bloom in blooms:
+            index.append(bloom)
+        assert index.candidates(0, 299, groups) == expected
+        assert index.candidates(70, 140, groups) == [n for n in expected if 70 <= n <= 140]
+
+
+@pytest.mark.parametrize('vectorised', [True, False])
+def test_unfiltered_candidates_skip_empty_blooms(monkeypatch, tmp_path, vectorised):
+    if not vectorised:
+        monkeypatch.setattr(node, 'np', None)
+    mask = node.bloom_bits(b'\x01')
+    for index in (node.LogBloomIndex(), node.LogBloomIndex(str(tmp_path / 'blooms.dat'))):
+        for bloom in (0, mask, 0, 0, mask):
+            index.append(bloom)
+        assert index.candidates(0, 4, []) == [1, 4]
+
+
+def test_unfiltered_query_decodes_only_blocks_with_logs(chain):
+    emit(1)
+    rpc('eth_sendTransaction', {'from': SENDER, 'to': '0x' + '99' * 20, 'value': '0x1'})  # No logs
+    emit(2)
+    assert chain.bloom_index.candidates(0, 3, []) == [1, 3]
+    assert [log['blockNumber'] for log in rpc('eth_getLogs', {'fromBlock': '0x0'})] == ['0x1', '0x3']
+
+
+def test_bloom_scans_are_capped_by_block_range(logs_chain, monkeypatch):
+    monkeypatch.setattr(node, 'MAX_LOG_BLOCK_RANGE', 3)
+    with pytest.raises(node.RPCError) as error:
+        rpc('eth_getLogs', {'fromBlock': '0x0', 'toBlock': '0x3'})
+    assert error.value.code == -32005
+    assert len(rpc('eth_getLogs', {'fromBlock': '0x1', 'toBlock': '0x3'})) == 3
+    # The log index answers address queries in O(results), whatever the range
+    assert len(rpc('eth_getLogs', {'fromBlock': '0x0', 'address': EMITTER})) == 4
+
+
+def test_result_limit_counts_matching_logs(logs_chain, monkeypatch):
+    monkeypatch.setattr(node, 'MAX_LOG_RESULTS', 1)
+    # Two indexed positions for EMITTER/topic0 1, one of which matches topic1
+    query = {'fromBlock': '0x0', 'address': EMITTER, 'topics': [topic(1), topic(102)]}
+    assert _topics(rpc('eth_getLogs', query)) == [(EMITTER, 1, 102)]
+    with pytest.raises(node.RPCError) as error:
+        rpc('eth_getLogs', {'fromBlock': '0x0', 'address': EMITTER, 'topics': [topic(1)]})
+    assert error.value.code == -32005
+
+
+@pytest.mark.parametrize('method', ['eth_getLogs', 'eth_newFilter'])
+@pytest.mark.parametrize('bad', [{'address': '0x1234'}, {'address': 5}, {'topics': ['0xzz']},
+                                 {'topics': [[topic(1), 'nope']]}, {'fromBlock': 'soon'}, {'toBlock': 7}])
+def test_malformed_filter_is_invalid_params(logs_chain, method, bad):
+    with pytest.raises(node.RPCError) as excinfo:
+        rpc(method, {'fromBlock': '0x0', **bad})
+    assert excinfo.value.code == -32602
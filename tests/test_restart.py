@@ -0,0 +1,93 @@
+"""Data-directory chains: indexes after a restart, after losing them, and rebuilt"""
+
+import os
+import sys
+
+import pytest
+
+from conftest import EMITTER, OTHER_EMITTER, SENDER, emit, node, rpc, topic
+
+INDEX_FILES = ('address_index.journal', 'log_index.journal', 'blooms.dat', 'hashes.db')
+
+
+@pytest.fixture
+def stored_chain(make_chain, tmp_path):
+    chain = make_chain(tmp_path)
+    hashes = [emit(i, 100 + i, to=EMITTER if i % 2 else OTHER_EMITTER) for i in range(6)]
+    return chain, hashes
+
+
+def _answers(hashes: list, monkeypatch) -> dict:
+    """What the indexed RPC methods say about the chain, bypassing the response cache"""
+    monkeypatch.setattr(node, 'response_cache', node.ResponseCache(node.RESPONSE_CACHE_BYTES))
+    receipt = rpc('eth_getTransactionReceipt', hashes[2])
+    return {
+        'by_address': rpc('eth_getLogs', {'fromBlock': '0x0', 'address': EMITTER}),
+        'by_topic0': rpc('eth_getLogs', {'fromBlock': '0x0', 'topics': [topic(4)]}),
+        'by_bloom': rpc('eth_getLogs', {'fromBlock': '0x0', 'topics': [None, [topic(101), topic(104)]]}),
+        'history': rpc('fco_getTransactionsByAddress', SENDER, None, 4),
+        'history_other': rpc('fco_getTransactionsByAddress', OTHER_EMITTER),
+        'receipt': receipt,
+        'by_block_hash': rpc('eth_getLogs', {'blockHash': receipt['blockHash']}),
+    }
+
+
+def test_indexes_survive_a_restart(stored_chain, make_chain, tmp_path, monkeypatch):
+    _, hashes = stored_chain
+    before = _answers(hashes, monkeypatch)
+    assert [len(before[key]) for key in ('by_address', 'by_topic0', 'by_bloom', 'by_block_hash')] == [3, 1, 2, 1]
+    assert before['receipt']['transactionHash'] == hashes[2]
+
+    restarted = make_chain(tmp_path)
+    assert restarted.get_latest_block()['number'] == 6
+    assert _answers(hashes, monkeypatch) == before
+
+    # The restarted writer keeps indexing where the stored chain ended
+    hashes.append(emit(7, to=EMITTER))
+    logs = rpc('eth_getLogs', {'fromBlock': '0x7', 'address': EMITTER})
+    assert [log['transactionHash'] for log in logs] == [hashes[-1]]
+
+
+def test_lost_indexes_are_rebuilt_from_the_block_log(stored_chain, make_chain, tmp_path, monkeypatch):
+    _, hashes = stored_chain
+    before = _answers(hashes, monkeypatch)
+    for name in INDEX_FILES:
+        os.remove(tmp_path / name)
+
+    restarted = make_chain(tmp_path)
+    assert _answers(hashes, monkeypatch) == before
+
+    restarted.rebuild_indexes()
+    assert _answers(hashes, monkeypatch) == before
+
+
+def test_blocks_past_the_state_journal_are_dropped(stored_chain, make_chain, tmp_path, monkeypatch):
+    chain, hashes = stored_chain
+    balance = rpc('eth_getBalance', SENDER, 'latest')
+    # Crash after block 7 reached the block log but before its state was journaled
+    monkeypatch.setattr(chain.state_journal, 'append', lambda number, delta: None)
+    lost = emit(9)
+    assert chain.get_latest_block()['number'] == 7
+
+    restarted = make_chain(tmp_path)
+    monkeypatch.setattr(node, 'response_cache', node.ResponseCache(node.RESPONSE_CACHE_BYTES))
+    assert restarted.get_latest_block()['number'] == 6
+    assert rpc('eth_getBalance', SENDER, 'latest') == balance
+    assert rpc('eth_getTransactionReceipt', lost) is None
+
+    replacement = emit(10)
+    assert rpc('eth_getTransactionReceipt', replacement)['blockNumber'] == '0x7'
+    assert [log['transactionHash'] for log in rpc('eth_getLogs', {'fromBlock': '0x7'})] == [replacement]
+
+
+def test_json_codec_flag_reads_a_chain_written_by_the_default_codec(stored_chain, tmp_path, monkeypatch):
+    _, hashes = stored_chain
+    before = _answers(hashes, monkeypatch)
+    for name in ('json_encode', 'json_decode'):
+        monkeypatch.setattr(node, name, getattr(node, name))
+    monkeypatch.setattr(sys, 'argv', ['node', '--data-dir', str(tmp_path), '--rebuild-indexes',
+                                           '--json-codec', 'json'])
+    node.main()
+    assert (node.json_encode, node.json_decode) == node.JSON_CODECS['json']
+    monkeypatch.setattr(node, 'blockchain', node.Blockchain(str(tmp_path)))
+    assert _answers(hashes, monkeypatch) == before
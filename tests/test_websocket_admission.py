@@ -0,0 +1,62 @@
+"""WebSocket admission before the handshake: 429 per client, 503 server-wide"""
+
+from http import HTTPStatus
+
+import websocket_server
+from websocket_server import FanaticoWebSocketServer
+
+
+class Handshake:
+    """Stands in for the protocol object process_request sees"""
+
+    def __init__(self, peer: str):
+        self.remote_address = (peer, 40000)
+
+
+def _admit(server: FanaticoWebSocketServer, peer: str, forwarded_for: str = None):
+    headers = {'X-Forwarded-For': forwarded_for} if forwarded_for else {}
+    response = server.process_request(Handshake(peer), '/', headers)
+    return None if response is None else response[0]
+
+
+def test_per_ip_rate_is_429_and_spares_other_clients(monkeypatch):
+    monkeypatch.setattr(websocket_server, 'ADMISSION_BURST_PER_IP', 3)
+    monkeypatch.setattr(websocket_server, 'ADMISSION_RATE_PER_IP', 0.001)
+    server = FanaticoWebSocketServer()
+    assert [_admit(server, '10.0.0.1') for _ in range(4)] == [None, None, None, HTTPStatus.TOO_MANY_REQUESTS]
+    assert _admit(server, '10.0.0.2') is None
+    assert server.refused == {'ip_rate': 1}
+    # Refused handshakes do not drain the server-wide bucket
+    assert int(server._admission_tokens) == websocket_server.ADMISSION_BURST - 4
+
+
+def test_forwarded_clients_get_their_own_buckets(monkeypatch):
+    monkeypatch.setattr(websocket_server, 'ADMISSION_BURST_PER_IP', 1)
+    monkeypatch.setattr(websocket_server, 'ADMISSION_RATE_PER_IP', 0.001)
+    server = FanaticoWebSocketServer()
+    assert _admit(server, '127.0.0.1', '203.0.113.1') is None
+    assert _admit(server, '127.0.0.1', '203.0.113.2') is None
+    assert _admit(server, '127.0.0.1', '203.0.113.1') == HTTPStatus.TOO_MANY_REQUESTS
+    # An untrusted peer's header is ignored: it is one client
+    assert _admit(server, '198.51.100.7', '203.0.113.3') is None
+    assert _admit(server, '198.51.100.7', '203.0.113.4') == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_global_rate_is_503_backstop(monkeypatch):
+    monkeypatch.setattr(websocket_server, 'ADMISSION_BURST', 3)
+    monkeypatch.setattr(websocket_server, 'ADMISSION_RATE', 0.001)
+    server = FanaticoWebSocketServer()
+    statuses = [_admit(server, f'10.0.1.{i}') for i in range(4)]
+    assert statuses == [None, None, None, HTTPStatus.SERVICE_UNAVAILABLE]
+    assert server.refused == {'rate': 1}
+
+
+def test_capacity_refusals(monkeypatch):
+    server = FanaticoWebSocketServer()
+    server.connections_per_ip['10.0.2.1'] = websocket_server.MAX_CONNECTIONS_PER_IP
+    assert _admit(server, '10.0.2.1') == HTTPStatus.TOO_MANY_REQUESTS
+    monkeypatch.setattr(websocket_server, 'MAX_CONNECTIONS', 0)
+    status, headers, _ = server.process_request(Handshake('10.0.2.2'), '/', {})
+    assert status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert 1 <= int(dict(headers)['Retry-After']) <= websocket_server.RETRY_AFTER_MAX
+    assert server.refused == {'per_ip': 1, 'max_connections': 1}
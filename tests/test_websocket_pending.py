@@ -0,0 +1,63 @@
+"""Coalesced newPendingTransactions delivery"""
+
+import asyncio
+import json
+
+from websocket_server import FanaticoWebSocketServer
+from test_websocket_rpc import FakeConnection
+
+
+async def _subscribe(server, connection, sender, params) -> str:
+    await server._serve_message(connection, sender, None, json.dumps(
+        {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newPendingTransactions', params]}))
+    await asyncio.sleep(0.01)
+    return json.loads(connection.frames.pop(0))['result']
+
+
+def _notifications(connection: FakeConnection) -> list:
+    return [json.loads(frame)['params'] for frame in connection.frames]
+
+
+def test_pending_batches_flush_when_full_or_when_the_window_closes():
+    async def run():
+        server = FanaticoWebSocketServer()
+        connections = [FakeConnection() for _ in range(3)]
+        senders = [server.add_connection(connection) for connection in connections]
+        batched = [await _subscribe(server, connections[i], senders[i], {'batchMs': 100, 'batchSize': 3})
+                   for i in range(2)]
+        full = await _subscribe(server, connections[2], senders[2], {'batchMs': 100, 'fullTransactions': True})
+        assert len(server.pending_batchers) == 2  # One batcher per setting, shared by its subscribers
+
+        for n in range(4):
+            await server.broadcast_pending_transaction(f'0x{n:064x}', {'hash': f'0x{n:064x}', 'nonce': hex(n)})
+        await asyncio.sleep(0.01)
+        early = [_notifications(connection) for connection in connections]
+        await asyncio.sleep(0.2)
+        late = [_notifications(connection) for connection in connections]
+        await server.stop()
+        return batched, full, early, late
+
+    batched, full, early, late = asyncio.run(run())
+    hashes = [f'0x{n:064x}' for n in range(4)]
+    for sub_id, notifications in zip(batched, early):
+        assert notifications == [{'subscription': sub_id, 'result': hashes[:3]}]
+    assert early[2] == []
+    for sub_id, notifications in zip(batched, late):
+        assert notifications == [{'subscription': sub_id, 'result': hashes[:3]},
+                                 {'subscription': sub_id, 'result': hashes[3:]}]
+    assert late[2] == [{'subscription': full, 'result': [{'hash': h, 'nonce': hex(n)} for n, h in enumerate(hashes)]}]
+
+
+def test_invalid_batch_options_are_rejected():
+    async def run():
+        server = FanaticoWebSocketServer()
+        connection = FakeConnection()
+        sender = server.add_connection(connection)
+        await server._serve_message(connection, sender, None, json.dumps(
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe',
+             'params': ['newPendingTransactions', {'batchMs': 0}]}))
+        await asyncio.sleep(0.01)
+        await server.stop()
+        return json.loads(connection.frames[0])
+
+    assert asyncio.run(run())['error']['code'] == -32602
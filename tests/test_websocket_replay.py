@@ -0,0 +1,143 @@
+"""Resuming newHeads/logs subscriptions from a block: order, gaps and duplicates"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import websocket_server
+from websocket_server import FanaticoWebSocketServer
+from test_websocket_rpc import FakeConnection
+
+EMITTER = '0x' + '33' * 20
+
+
+def _block(number: int) -> dict:
+    return {'number': hex(number), 'hash': '0x' + f'{number:064x}', 'parentHash': '0x' + f'{number - 1:064x}',
+            'timestamp': hex(1000 + number)}
+
+
+def _log(number: int) -> dict:
+    return {'address': EMITTER, 'topics': [], 'data': '0x', 'blockNumber': hex(number), 'logIndex': '0x0'}
+
+
+async def _seal(server: FanaticoWebSocketServer, *numbers: int):
+    for number in numbers:
+        await server.broadcast_block(_block(number), [_log(number)])
+
+
+async def _subscribe(server, connection, sender, sub_type: str, from_block: int) -> dict:
+    params = [sub_type, {'fromBlock': hex(from_block)}]
+    await server._serve_message(connection, sender, None, json.dumps(
+        {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': params}))
+    await asyncio.sleep(0.05)
+    return json.loads(connection.frames.pop(0))
+
+
+def _numbers(connection: FakeConnection, sub_type: str) -> list:
+    key = 'number' if sub_type == 'newHeads' else 'blockNumber'
+    return [int(json.loads(frame)['params']['result'][key], 16) for frame in connection.frames]
+
+
+def _run(scenario, *args):
+    async def run():
+        server = FanaticoWebSocketServer()
+        connection = FakeConnection()
+        sender = server.add_connection(connection)
+        try:
+            return await scenario(server, connection, sender, *args)
+        finally:
+            await server.stop()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('sub_type', ['newHeads', 'logs'])
+def test_replay_then_live_in_order(monkeypatch, sub_type):
+    # Replay yields after every frame, so live blocks arrive while it is still running
+    monkeypatch.setattr(websocket_server, 'DEGRADE_QUEUE_SIZE', 1)
+
+    async def scenario(server, connection, sender):
+        await _seal(server, 1, 2, 3, 4)
+        await server._serve_message(connection, sender, None, json.dumps(
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': [sub_type, {'fromBlock': '0x2'}]}))
+        await _seal(server, 5)
+        await asyncio.sleep(0.05)
+        await _seal(server, 6)
+        await asyncio.sleep(0.05)
+        assert 'result' in json.loads(connection.frames.pop(0))
+        return _numbers(connection, sub_type)
+
+    assert _run(scenario) == [2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize('from_block', [1, 5])
+def test_gap_is_refused(from_block):
+    async def scenario(server, connection, sender):
+        server.replay_window = websocket_server.ReplayWindow(max_blocks=2)
+        await _seal(server, 1, 2, 3)  # Window holds 2..3
+        response = await _subscribe(server, connection, sender, 'newHeads', from_block)
+        return response, server.subscription_manager.subscriptions
+
+    response, subscriptions = _run(scenario)
+    assert response['error'] == {'code': -32000, 'message': 'fromBlock not in replay window; use eth_getLogs'}
+    assert subscriptions == {}
+
+
+def test_empty_window_is_refused():
+    async def scenario(server, connection, sender):
+        return await _subscribe(server, connection, sender, 'logs', 7)
+
+    assert _run(scenario)['error']['code'] == -32000
+
+
+@pytest.mark.parametrize('sub_type', ['newHeads', 'logs'])
+def test_no_duplicates_below_from_block(sub_type):
+    async def scenario(server, connection, sender):
+        await _seal(server, 1, 2, 3)
+        response = await _subscribe(server, connection, sender, sub_type, 4)
+        # A late or repeated broadcast of a block the client already has
+        await server.broadcast_block(_block(3), [_log(3)])
+        await _seal(server, 4)
+        await asyncio.sleep(0.05)
+        return response, _numbers(connection, sub_type)
+
+    response, numbers = _run(scenario)
+    assert 'result' in response
+    assert numbers == [4]
+
+
+def test_replay_waits_for_its_own_batch_response():
+    release = threading.Event()
+
+    def call(data) -> bytes:
+        release.wait(5)
+        return json.dumps({'jsonrpc': '2.0', 'id': data['id'], 'result': '0x3'}).encode()
+
+    async def run():
+        server = FanaticoWebSocketServer(rpc_session=lambda websocket: call)
+        connection = FakeConnection()
+        sender = server.add_connection(connection)
+        await _seal(server, 1, 2, 3)
+        batch = json.dumps([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'eth_subscribe', 'params': ['newHeads', {'fromBlock': '0x2'}]},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'eth_blockNumber', 'params': []},
+        ])
+        pending = asyncio.ensure_future(server._serve_message(connection, sender, call, batch))
+        await asyncio.sleep(0.05)
+        # Another pipelined message completes while the batch is still waiting on its RPC call
+        await server._serve_message(connection, sender, call, json.dumps(
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'eth_unsubscribe', 'params': ['0x0']}))
+        await asyncio.sleep(0.05)
+        release.set()
+        await pending
+        await asyncio.sleep(0.05)
+        await server.stop()
+        return [json.loads(frame) for frame in connection.frames]
+
+    frames = asyncio.run(run())
+    assert frames[0]['id'] == 3
+    assert isinstance(frames[1], list) and frames[1][0]['id'] == 1
+    sub_id = frames[1][0]['result']
+    assert [(frame['params']['subscription'], frame['params']['result']['number']) for frame in frames[2:]] == \
+        [(sub_id, '0x2'), (sub_id, '0x3')]
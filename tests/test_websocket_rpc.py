@@ -0,0 +1,52 @@
+"""JSON-RPC over the WebSocket server: pipelining and load shedding"""
+
+import asyncio
+import json
+import threading
+
+import websocket_server
+from websocket_server import FanaticoWebSocketServer
+
+
+class FakeConnection:
+    """Stands in for a websocket connection; keeps what it is sent"""
+    remote_address = ('127.0.0.1', 0)
+
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        self.frames.append(frame)
+
+    async def close(self, code=None, reason=None):
+        pass
+
+
+def test_requests_are_shed_when_the_rpc_queue_is_full(monkeypatch):
+    monkeypatch.setattr(websocket_server, 'SHED_QUEUE_DEPTH', 2)
+    release = threading.Event()
+
+    def call(data) -> bytes:
+        release.wait(5)
+        return json.dumps({'jsonrpc': '2.0', 'result': '0x1', 'id': data['id']}).encode()
+
+    async def run():
+        server = FanaticoWebSocketServer(rpc_session=lambda websocket: call)
+        connection = FakeConnection()
+        requests = [json.dumps({'jsonrpc': '2.0', 'method': 'eth_blockNumber', 'id': i}) for i in range(3)]
+        pending = [asyncio.ensure_future(server.handle_message(connection, request, call))
+                   for request in requests[:2]]
+        await asyncio.sleep(0.05)
+        shed = json.loads(await server.handle_message(connection, requests[2], call))
+        batch_shed = json.loads(await server.handle_message(connection, '[' + requests[2] + ']', call))
+        release.set()
+        answered = [json.loads(frame) for frame in await asyncio.gather(*pending)]
+        stats = server.get_stats()['rpc']
+        await server.stop()
+        return shed, batch_shed, answered, stats
+
+    shed, batch_shed, answered, stats = asyncio.run(run())
+    assert shed == {'jsonrpc': '2.0', 'id': 2, 'error': {'code': -32005, 'message': 'server overloaded, retry later'}}
+    assert batch_shed['error']['code'] == -32005 and batch_shed['id'] is None
+    assert [response['result'] for response in answered] == ['0x1', '0x1']
+    assert stats == {'queued': 0, 'shed': 2}
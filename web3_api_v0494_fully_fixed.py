@@ -11,13 +11,42 @@ CRITICAL FIX: Implements actual EVM bytecode interpreter
 
 import json
 import logging
+import re
 import hashlib
+import mmap
+import os
+import sqlite3
+import struct
 import time
+import threading
+import queue
+import uuid
 import rlp
 import argparse
-from flask import Flask, request, jsonify
-from typing import Dict, List, Optional, Tuple, Any
+import asyncio
+import http.client
+import multiprocessing
+import signal
+import socket
+from collections import OrderedDict, ChainMap
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from bisect import bisect_left, bisect_right
+from flask import Flask, Response, request
+from typing import Dict, List, Optional, Tuple, Any, Callable
 from dataclasses import dataclass, field
+from Crypto.Hash import keccak as _keccak  # pycryptodome: blooms and topics must be real Keccak-256
+
+try:
+    import numpy as np
+except ImportError:  # Bloom range scans fall back to pure Python
+    np = None
+
+try:
+    import orjson
+except ImportError:  # JSON goes through the standard library codec
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -32,6 +61,66 @@ CHAIN_ID = 999999999  # Fanatico L1 Chain ID
 BASE_FEE = 20 * 10**9  # 20 Gwei base fee
 GAS_LIMIT_BLOCK = 15000000
 
+# Log query limits
+MAX_LOG_RESULTS = 10000
+MAX_LOG_BLOCK_RANGE = 100000  # blocks a query not answered by the log index may scan
+BLOOM_SCAN_CHUNK = 65536  # blocks tested against a query per vectorised step
+EMPTY_BLOOM = '0x' + '0' * 512
+
+# Async HTTP server
+MAX_REQUEST_BODY = 5 * 1024 * 1024  # bytes
+MAX_HEADER_BYTES = 64 * 1024
+KEEPALIVE_TIMEOUT = 75  # seconds an idle keep-alive connection is kept open
+EXECUTOR_WORKERS = 8  # threads running RPC handlers (EVM work)
+MAX_PENDING_REQUESTS = 512  # requests queued for the executor before reads stop
+
+# Admission control (compute units: RPCMethod.cost, plus metered eth_call gas)
+RATE_LIMIT_CU_PER_SECOND = 0  # per client IP; 0 disables rate limiting
+RATE_LIMIT_BURST_SECONDS = 5  # bucket size, in seconds of refill
+GAS_PER_COMPUTE_UNIT = 1000  # eth_call gas charged as one extra compute unit
+MAX_TRACKED_CLIENTS = 100000  # token buckets kept (least recently used are dropped)
+TRUSTED_PROXIES = ('127.0.0.1', '::1')  # peers whose X-Forwarded-For is believed (add more with --trusted-proxy)
+SHED_QUEUE_DEPTH = 2048  # requests waiting for an executor slot before new ones are refused
+
+# JSON-RPC batches
+MAX_BATCH_SIZE = 1000  # requests per batch array
+MAX_BATCH_COST = 5000  # summed RPCMethod.cost per batch
+BATCH_WORKERS = 8  # threads running the read entries of batches in parallel
+
+# Block production (single writer thread)
+WRITE_QUEUE_SIZE = 10000  # submitted transactions waiting for the writer
+MAX_BLOCK_TRANSACTIONS = 500  # queued transactions sealed into one block
+SNAPSHOT_MAX_LAYERS = 32  # per-block delta layers before a snapshot is flattened
+
+# Block storage
+BLOCK_CACHE_SIZE = 1024  # decoded blocks kept in memory (most recent / most used)
+
+# Response caches
+RESPONSE_CACHE_BYTES = 64 * 1024 * 1024  # encoded immutable results (sealed blocks, receipts, code)
+CALL_CACHE_SIZE = 100000  # cached eth_call results
+CALL_CACHE_MAX_ITEM = 64 * 1024  # calldata + result bytes above which a call is not cached
+SINGLE_FLIGHT_MIN_COST = 10  # reads at least this costly (eth_call, eth_getLogs, ...) are coalesced
+
+# Read-worker processes (--read-workers)
+FOLLOW_INTERVAL = 0.02  # seconds between checks for newly sealed blocks
+
+# Polling filters (eth_newFilter & co.)
+FILTER_TTL = 300  # seconds a filter may go unpolled before it is uninstalled
+FILTER_SWEEP_INTERVAL = 10  # seconds between expiry sweeps
+MAX_FILTERS = 10000
+
+# Event bus (sealed blocks and mempool admissions, for filters and WebSocket)
+# Sized for the slowest consumer (a broker client on a replica, or a stalled
+# WebSocket pump) to ride out ~10s behind at a few thousand mempool
+# admissions per second; consumers further behind skip ahead.
+EVENT_BUS_SIZE = 65536  # events retained
+EVENT_BUS_BYTES = 64 * 1024 * 1024  # estimated payload bytes retained
+EVENT_OVERHEAD = 512  # estimated bytes per event besides transaction input
+
+# Transaction history paging
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX = 1000
+
 # EVM Opcodes - Essential for execution
 OPCODES = {
     # Stop and Arithmetic
@@ -210,6 +299,76 @@ def from_hex(hex_str):
         hex_str = hex_str[2:]
     return int(hex_str, 16) if hex_str else 0
 
+_HEX_ADDRESS = re.compile(r'0x[0-9a-fA-F]{40}')
+_HEX_TOPIC = re.compile(r'0x[0-9a-fA-F]{64}')
+
+def keccak256(data: bytes) -> bytes:
+    """Keccak-256 digest"""
+    return _keccak.new(digest_bits=256, data=data).digest()
+
+def bloom_bits(item: bytes) -> int:
+    """2048-bit bloom mask for a single address or topic (yellow paper M3:2048)"""
+    digest = keccak256(item)
+    mask = 0
+    for i in (0, 2, 4):
+        mask |= 1 << (((digest[i] << 8) | digest[i + 1]) & 2047)
+    return mask
+
+def logs_bloom(logs: List[Dict]) -> int:
+    """Compute the bloom of a list of logs as an integer"""
+    bloom = 0
+    for log in logs:
+        bloom |= bloom_bits(bytes.fromhex(log['address'][2:]))
+        for topic in log['topics']:
+            bloom |= bloom_bits(bytes.fromhex(topic[2:]))
+    return bloom
+
+def bloom_to_hex(bloom: int) -> str:
+    """Format a bloom integer as a 256-byte hex string"""
+    return '0x' + format(bloom, '0512x')
+
+# JSON codecs: name -> (encode to bytes, decode from bytes)
+def _json_encode(value) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode()
+
+JSON_CODECS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    'json': (_json_encode, json.loads),
+}
+
+if orjson is not None:
+    _LONG_NUMBER = re.compile(rb'\d{19,}')
+
+    def _orjson_encode(value) -> bytes:
+        try:
+            return orjson.dumps(value)
+        except TypeError:  # Integers beyond 64 bits
+            return _json_encode(value)
+
+    def _orjson_decode(data: bytes):
+        if _LONG_NUMBER.search(data):
+            return json.loads(data)  # orjson would turn integers beyond 64 bits into floats
+        return orjson.loads(data)
+
+    JSON_CODECS['orjson'] = (_orjson_encode, _orjson_decode)
+
+DEFAULT_JSON_CODEC = 'orjson' if orjson is not None else 'json'
+json_encode, json_decode = JSON_CODECS[DEFAULT_JSON_CODEC]
+
+def set_json_codec(name: str):
+    """Switch the codec used for requests, responses and the block log"""
+    global json_encode, json_decode
+    json_encode, json_decode = JSON_CODECS[name]
+
+class RPCError(Exception):
+    """JSON-RPC error with an explicit error code"""
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+# Gas used by eth_call executions on the current thread (for compute-unit charging)
+evm_meter = threading.local()
+
 def calculate_contract_address(sender: str, nonce: int) -> str:
     """Calculate contract address using CREATE opcode (RLP encoding)"""
     sender_bytes = bytes.fromhex(sender.replace('0x', ''))
@@ -235,20 +394,41 @@ class ExecutionContext:
     reverted: bool = False
     return_data: bytes = b''
     logs: List[Dict] = field(default_factory=list)
+    volatile: bool = False  # read the block environment (TIMESTAMP, NUMBER)
+
+class TrackedDict(dict):
+    """dict that remembers which keys were written since the last take_delta()"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dirty = set()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.dirty.add(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.dirty.add(key)
+
+    def take_delta(self) -> dict:
+        """New values (0 for deleted keys) of every key written since the last call"""
+        delta = {key: self.get(key, 0) for key in self.dirty}
+        self.dirty = set()
+        return delta
 
 class SimpleStorage:
     """Simple storage implementation"""
-    def __init__(self):
-        self.data = {}
+    def __init__(self, data=None):
+        self.data = TrackedDict() if data is None else data
 
     def store(self, address: str, slot: int, value: int):
         """Store value at address:slot"""
         key = f"{address.lower()}:{slot}"
-        if value == 0:
+        if value == 0 and not isinstance(self.data, ChainMap):
             if key in self.data:
                 del self.data[key]
         else:
-            self.data[key] = value
+            self.data[key] = value  # In a snapshot view, 0 shadows older layers
         logger.debug(f"Storage store: {key} = {value}")
 
     def load(self, address: str, slot: int) -> int:
@@ -262,18 +442,29 @@ class RealEVM:
     """
     Real EVM implementation with bytecode execution
     v0.4.9.3 - Actually executes bytecode instead of hardcoded responses
+
+    The block writer owns the only mutable instance; eth_call runs on a
+    throwaway instance layered over a sealed StateSnapshot (state=...),
+    so its writes never leak into chain state.
     """
-    def __init__(self):
+    def __init__(self, state: Optional['StateSnapshot'] = None):
+        self.volatile = False  # last call() read the block environment
+        if state is not None:
+            self.storage = SimpleStorage(state.storage.new_child())
+            self.contracts = state.contracts.new_child()
+            self.balances = state.balances.new_child()
+            self.nonces = state.nonces.new_child()
+            return
         self.storage = SimpleStorage()
-        self.contracts = {}  # address -> bytecode
-        self.balances = {
+        self.contracts = TrackedDict()  # address -> bytecode
+        self.balances = TrackedDict({
             '0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb7': 10000 * 10**18,  # 10000 FCO
             '0x5aAeb6053f3E94C9b9A09f33669435E7Ef1BeAed': 10000 * 10**18,
             '0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359': 10000 * 10**18,
             '0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB': 10000 * 10**18,
             '0xD1220A0cf4B5b0E3D6f8c8e5b5f5b5b0E3D6f8c8': 10000 * 10**18,
-        }
-        self.nonces = {}
+        })
+        self.nonces = TrackedDict()
 
     def execute_bytecode(self, ctx: ExecutionContext) -> Tuple[bool, bytes, int, List[Dict]]:
         """
@@ -543,7 +734,7 @@ class RealEVM:
                 length = ctx.stack.pop()
                 topics = []
                 for _ in range(num_topics):
-                    topics.append(hex(ctx.stack.pop()))
+                    topics.append('0x' + format(ctx.stack.pop(), '064x'))
 
                 # Get log data from memory
                 if offset + length <= len(ctx.memory):
@@ -565,9 +756,11 @@ class RealEVM:
                 ctx.stack.append(BASE_FEE)
 
             elif name == 'TIMESTAMP':
+                ctx.volatile = True
                 ctx.stack.append(int(time.time()))
 
             elif name == 'NUMBER':
+                ctx.volatile = True
                 ctx.stack.append(1)  # Block number
 
             elif name == 'GASLIMIT':
@@ -626,15 +819,18 @@ class RealEVM:
 
         # Execute bytecode
         success, return_data, gas_used, logs = self.execute_bytecode(ctx)
+        self.volatile = ctx.volatile
+        evm_meter.gas = getattr(evm_meter, 'gas', 0) + gas_used
 
         if success and return_data:
             return '0x' + return_data.hex()
         else:
             return '0x'
 
-    def execute_transaction(self, tx, base_fee: int) -> Tuple[bool, int, Optional[str]]:
+    def execute_transaction(self, tx, base_fee: int) -> Tuple[bool, int, Optional[str], List[Dict]]:
         """
         Execute a transaction with proper bytecode execution
+        Returns: (success, gas_used, contract_address, logs)
         """
         # Calculate gas price
         if hasattr(tx, 'type') and tx.type == 2:
@@ -651,7 +847,7 @@ class RealEVM:
 
         sender_balance = self.get_balance(tx.from_address)
         if sender_balance < total_cost:
-            return False, 0, None
+            return False, 0, None, []
 
         # Contract deployment
         if not tx.to_address:
@@ -669,7 +865,7 @@ class RealEVM:
             try:
                 code_bytes = bytes.fromhex(bytecode)
             except ValueError:
-                return False, 0, None
+                return False, 0, None, []
 
             # Create execution context for constructor
             ctx = ExecutionContext(
@@ -700,16 +896,16 @@ class RealEVM:
                 self.deduct_gas(tx.from_address, gas_used * effective_gas_price)
 
                 logger.info(f"Contract deployed at {contract_address}, gas used: {gas_used}")
-                return True, gas_used, contract_address
+                return True, gas_used, contract_address, logs
             else:
-                return False, gas_used, None
+                return False, gas_used, None, []
 
         # Regular transaction or contract call
         else:
             # Transfer value
             if tx.value > 0:
                 if not self.transfer_value(tx.from_address, tx.to_address, tx.value):
-                    return False, 0, None
+                    return False, 0, None, []
 
             # Check if it's a contract call
             if tx.to_address.lower() in self.contracts and tx.input != '0x':
@@ -727,7 +923,7 @@ class RealEVM:
                 try:
                     code_bytes = bytes.fromhex(bytecode)
                 except ValueError:
-                    return False, 0, None
+                    return False, 0, None, []
 
                 # Create execution context
                 ctx = ExecutionContext(
@@ -747,12 +943,12 @@ class RealEVM:
                 # Deduct gas
                 self.deduct_gas(tx.from_address, gas_used * effective_gas_price)
 
-                return success, gas_used, None
+                return success, gas_used, None, logs if success else []
             else:
                 # Simple transfer
                 gas_used = 21000
                 self.deduct_gas(tx.from_address, gas_used * effective_gas_price)
-                return True, gas_used, None
+                return True, gas_used, None, []
 
     def get_balance(self, address: str) -> int:
         """Get account balance"""
@@ -809,32 +1005,961 @@ class Transaction:
     max_fee_per_gas: int = 0
     max_priority_fee_per_gas: int = 0
 
+def pack_position(block_number: int, index: int) -> int:
+    """Pack (block number, index within block) into one sortable integer"""
+    return (block_number << 24) | index
+
+def unpack_position(position: int) -> Tuple[int, int]:
+    """Inverse of pack_position"""
+    return position >> 24, position & 0xFFFFFF
+
+class PostingIndex:
+    """
+    Append-only posting lists: key -> packed (block, index) positions.
+    Entries are only ever appended in block order, so a position inside a
+    list is stable forever and can be handed out as a pagination cursor.
+
+    With a path, every append is also written to a line-oriented journal
+    ("<key> <position>", plus "h <block>" once a block is fully indexed)
+    that is replayed on open, or tailed with follow() by a read worker.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.postings: Dict[str, array] = {}
+        self.path = path
+        self.indexed_height = -1
+        self._journal = None
+        self._offset = 0  # bytes of the journal applied by follow()
+
+    def open(self, head: int):
+        """Replay the journal, dropping anything indexed past head"""
+        if not self.path:
+            return
+        stale = False
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        stale = True  # Torn final write
+                        break
+                    key, value = line.split()
+                    value = int(value)
+                    if key == 'h':
+                        if value > head:
+                            stale = True
+                            break
+                        self.indexed_height = value
+                    elif unpack_position(value)[0] > head:
+                        stale = True
+                        break
+                    else:
+                        self.append(key, value)
+        if stale:
+            self._rewrite()
+        self._journal = open(self.path, 'a')
+
+    def follow(self):
+        """Apply journal lines the writer process has appended since the last call"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1  # Never apply a half-written line
+        for line in chunk[:end].decode().splitlines():
+            key, value = line.split()
+            if key == 'h':
+                self.indexed_height = int(value)
+            else:
+                self.append(key, int(value))
+        self._offset += end
+
+    def _rewrite(self):
+        """Rewrite the journal from the in-memory postings"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            entries = sorted(
+                (position, key) for key, postings in self.postings.items() for position in postings
+            )
+            for position, key in entries:
+                f.write(f"{key} {position}\n")
+            if self.indexed_height >= 0:
+                f.write(f"h {self.indexed_height}\n")
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        """Drop every posting (and truncate the journal)"""
+        self.postings = {}
+        self.indexed_height = -1
+        if self._journal:
+            self._journal.close()
+            self._journal = open(self.path, 'w')
+
+    def append(self, key: str, position: int):
+        """Append a position to the posting list for key"""
+        postings = self.postings.get(key)
+        if postings is None:
+            postings = self.postings[key] = array('Q')
+        postings.append(position)
+        if self._journal:
+            self._journal.write(f"{key} {position}\n")
+
+    def mark_indexed(self, block_number: int):
+        """Record that block_number is fully indexed and flush the journal"""
+        self.indexed_height = block_number
+        if self._journal:
+            self._journal.write(f"h {block_number}\n")
+            self._journal.flush()
+
+    def get(self, key: str) -> array:
+        """Get the posting list for key (empty if unknown)"""
+        return self.postings.get(key, array('Q'))
+
+    def range(self, key: str, from_block: int, to_block: int) -> array:
+        """Positions for key that fall within [from_block, to_block]"""
+        postings = self.get(key)
+        lo = bisect_left(postings, pack_position(from_block, 0))
+        hi = bisect_right(postings, pack_position(to_block, 0xFFFFFF))
+        return postings[lo:hi]
+
+    def __len__(self):
+        return len(self.postings)
+
+class LogBloomIndex:
+    """
+    Per-block logsBloom values packed into one matrix (row = block number)
+    so a range of blocks can be tested against a query with a few
+    vectorised bitwise ops, without decoding any block.
+
+    With a path the rows are appended to a flat file (256 bytes per block)
+    that is memory-mapped for queries instead of being held in memory.
+    """
+    WORDS = 32  # 2048 bits as 32 x uint64
+    ROW_SIZE = 256
+
+    def __init__(self, path: Optional[str] = None, read_only: bool = False):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._map = None
+        self._mapped_rows = 0
+        if path:
+            self._file = open(path, 'rb' if read_only else 'ab+')
+            size = os.path.getsize(path)
+            if size % self.ROW_SIZE and not read_only:
+                self._file.truncate(size - size % self.ROW_SIZE)  # Torn final write
+            self.count = size // self.ROW_SIZE
+        elif np is not None:
+            self.matrix = np.zeros((1024, self.WORDS), dtype=np.uint64)
+        else:
+            self.blooms: List[int] = []
+
+    @classmethod
+    def _pack(cls, bloom: int):
+        return np.frombuffer(bloom.to_bytes(256, 'big'), dtype='>u8').astype(np.uint64)
+
+    @classmethod
+    def _mask_words(cls, mask: int) -> List[Tuple[int, int]]:
+        """(word index, word) for the non-zero 64-bit words of a bloom mask"""
+        raw = mask.to_bytes(cls.ROW_SIZE, 'big')
+        words = [(i, int.from_bytes(raw[i * 8:i * 8 + 8], 'big')) for i in range(cls.WORDS)]
+        return [(i, word) for i, word in words if word]
+
+    def append(self, bloom: int):
+        """Append the bloom of the next block"""
+        if self._file:
+            self._file.write(bloom.to_bytes(self.ROW_SIZE, 'big'))
+            self._file.flush()
+        elif np is None:
+            self.blooms.append(bloom)
+        else:
+            if self.count == len(self.matrix):
+                grown = np.zeros((len(self.matrix) * 2, self.WORDS), dtype=np.uint64)
+                grown[:self.count] = self.matrix
+                self.matrix = grown
+            self.matrix[self.count] = self._pack(bloom)
+        self.count += 1
+
+    def refresh(self):
+        """Pick up rows appended by the writer process (read_only files)"""
+        self.count = os.path.getsize(self.path) // self.ROW_SIZE
+
+    def reset(self):
+        """Drop every bloom"""
+        if self._file:
+            self._map = None
+            self._mapped_rows = 0
+            self._file.truncate(0)
+        elif np is not None:
+            self.matrix = np.zeros((1024, self.WORDS), dtype=np.uint64)
+        else:
+            self.blooms = []
+        self.count = 0
+
+    def _mapped(self):
+        """Memory map of the bloom file, remapped when it has grown"""
+        if self._mapped_rows < self.count:
+            if np is not None:
+                self._map = np.memmap(self.path, dtype='>u8', mode='r', shape=(self.count, self.WORDS))
+            else:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_rows = self.count
+        return self._map
+
+    def _bloom(self, number: int) -> int:
+        """Bloom of a single block as an integer (pure Python path)"""
+        if self._file:
+            offset = number * self.ROW_SIZE
+            return int.from_bytes(self._mapped()[offset:offset + self.ROW_SIZE], 'big')
+        return self.blooms[number]
+
+    def candidates(self, from_block: int, to_block: int, groups: List[List[int]]) -> List[int]:
+        """
+        Block numbers in [from_block, to_block] whose bloom may match.
+        groups is a conjunction of disjunctions: a block is a candidate if,
+        for every group, at least one of the group's masks is fully set.
+        Blocks without logs (an empty bloom) are never candidates, so a
+        query with no groups only visits blocks that have logs.
+        """
+        to_block = min(to_block, self.count - 1)
+        if from_block > to_block:
+            return []
+
+        if np is None:
+            candidates = []
+            for number in range(from_block, to_block + 1):
+                bloom = self._bloom(number)
+                if bloom and all(any(bloom & m == m for m in group) for group in groups):
+                    candidates.append(number)
+            return candidates
+
+        # A mask sets at most 3 bits, so only the words holding them are tested
+        group_words = [[self._mask_words(mask) for mask in group] for group in groups]
+        matrix = self._mapped() if self._file else self.matrix
+        found = []
+        for start in range(from_block, to_block + 1, BLOOM_SCAN_CHUNK):
+            rows = matrix[start:min(start + BLOOM_SCAN_CHUNK, to_block + 1)]
+            selected = rows.any(axis=1)
+            for group in group_words:
+                group_hit = np.zeros(len(rows), dtype=bool)
+                for words in group:
+                    hit = np.ones(len(rows), dtype=bool)
+                    for index, word in words:
+                        word = np.uint64(word)
+                        hit &= (rows[:, index] & word) == word
+                    group_hit |= hit
+                selected &= group_hit
+                if not selected.any():
+                    break
+            found.extend((np.nonzero(selected)[0] + start).tolist())
+        return found
+
+class BlockStore:
+    """
+    Append-only block log. Each sealed block (receipts included) is one
+    JSON record in blocks.dat, and blocks.idx holds a fixed-width
+    (offset, length) entry per block number. The index is memory-mapped,
+    so any block is one lookup plus one read away; only the most recently
+    used BLOCK_CACHE_SIZE blocks are kept decoded.
+
+    Only the block writer appends; readers use positional reads (pread)
+    and never wait on an in-progress append.
+
+    Without a directory blocks are simply kept in a list. A read_only store
+    follows a log another process is appending to (see refresh()).
+    """
+    INDEX_ENTRY = struct.Struct('>QI')  # offset, length
+
+    def __init__(self, directory: Optional[str] = None, read_only: bool = False):
+        self.directory = directory
+        self._cache: 'OrderedDict[int, dict]' = OrderedDict()
+        self._index_map = None
+        self._mapped_count = 0
+        self._lock = threading.Lock()
+        if not directory:
+            self._blocks: List[dict] = []
+            return
+
+        mode = 'rb' if read_only else 'ab+'
+        self._data = open(os.path.join(directory, 'blocks.dat'), mode)
+        self._index = open(os.path.join(directory, 'blocks.idx'), mode)
+        index_size = os.path.getsize(self._index.name)
+        self._count = index_size // self.INDEX_ENTRY.size
+        if read_only:
+            return
+        if index_size % self.INDEX_ENTRY.size:
+            self._index.truncate(self._count * self.INDEX_ENTRY.size)  # Torn final write
+
+        # Drop data written after the last indexed block
+        data_end = 0
+        if self._count:
+            offset, length = self._entry(self._count - 1)
+            data_end = offset + length
+        if os.path.getsize(self._data.name) > data_end:
+            self._data.truncate(data_end)
+
+    def __len__(self):
+        return self._count if self.directory else len(self._blocks)
+
+    def refresh(self):
+        """Pick up blocks appended by the writer process (read_only stores)"""
+        self._count = os.path.getsize(self._index.name) // self.INDEX_ENTRY.size
+
+    def _entry(self, number: int) -> Tuple[int, int]:
+        """(offset, length) of a block record from the memory-mapped index"""
+        index_map = self._index_map
+        if self._mapped_count <= number:
+            index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            self._index_map = index_map
+            self._mapped_count = len(index_map) // self.INDEX_ENTRY.size
+        return self.INDEX_ENTRY.unpack_from(index_map, number * self.INDEX_ENTRY.size)
+
+    def append(self, block: dict):
+        """Append the next block"""
+        if not self.directory:
+            self._blocks.append(block)
+            return
+        record = json_encode(block)
+        offset = self._data.seek(0, os.SEEK_END)
+        self._data.write(record)
+        self._data.flush()
+        self._index.write(self.INDEX_ENTRY.pack(offset, len(record)))
+        self._index.flush()
+        self._remember(self._count, block)
+        self._count += 1
+
+    def truncate(self, count: int):
+        """Drop every block from number count on (writer start-up only)"""
+        if not self.directory:
+            del self._blocks[count:]
+            return
+        offset = self._entry(count)[0] if count < self._count else None
+        self._index_map = None
+        self._mapped_count = 0
+        self._index.truncate(count * self.INDEX_ENTRY.size)
+        if offset is not None:
+            self._data.truncate(offset)
+        self._count = min(self._count, count)
+        with self._lock:
+            for number in [n for n in self._cache if n >= count]:
+                del self._cache[number]
+
+    def _remember(self, number: int, block: dict):
+        with self._lock:  # Guards the LRU only, never held across I/O
+            self._cache[number] = block
+            self._cache.move_to_end(number)
+            if len(self._cache) > BLOCK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def __getitem__(self, number: int) -> dict:
+        if not self.directory:
+            return self._blocks[number]
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError('block number out of range')
+        with self._lock:
+            block = self._cache.get(number)
+            if block is not None:
+                self._cache.move_to_end(number)
+                return block
+        offset, length = self._entry(number)
+        block = json_decode(os.pread(self._data.fileno(), length, offset))
+        self._remember(number, block)
+        return block
+
+    def __iter__(self):
+        """Stream every block in order"""
+        for number in range(len(self)):
+            yield self[number]
+
+class HashIndex:
+    """
+    hash -> packed position map (block hashes, transaction hashes).
+    Backed by a sqlite table when a path is given so it does not have to
+    live in memory; entries are committed once per indexed block. The
+    writer has its own connection and every reader thread gets one of its
+    own, so (with WAL) lookups never wait for the writer.
+    """
+    def __init__(self, path: Optional[str], table: str):
+        self.path = path
+        self.table = table
+        self.indexed_height = -1
+        self._conn = None
+        self._readers = threading.local()
+        self._entries: Dict[str, int] = {}
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS {table} (hash TEXT PRIMARY KEY, position INTEGER)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS index_heights (name TEXT PRIMARY KEY, height INTEGER)')
+            row = self._conn.execute('SELECT height FROM index_heights WHERE name = ?', (table,)).fetchone()
+            if row:
+                self.indexed_height = row[0]
+            self._conn.commit()
+
+    def put(self, key: str, position: int):
+        if self._conn is None:
+            self._entries[key] = position
+            return
+        self._conn.execute(f'INSERT OR REPLACE INTO {self.table} VALUES (?, ?)', (key, position))
+
+    def get(self, key: str) -> Optional[int]:
+        if self._conn is None:
+            return self._entries.get(key)
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = self._readers.conn = sqlite3.connect(self.path, check_same_thread=False)
+        row = conn.execute(f'SELECT position FROM {self.table} WHERE hash = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def mark_indexed(self, block_number: int):
+        """Record that block_number is fully indexed and commit"""
+        self.indexed_height = block_number
+        if self._conn is not None:
+            self._conn.execute('INSERT OR REPLACE INTO index_heights VALUES (?, ?)',
+                               (self.table, block_number))
+            self._conn.commit()
+
+    def reset(self):
+        self.indexed_height = -1
+        self._entries = {}
+        if self._conn is not None:
+            self._conn.execute(f'DELETE FROM {self.table}')
+            self._conn.execute('DELETE FROM index_heights WHERE name = ?', (self.table,))
+            self._conn.commit()
+
+@dataclass
+class LogQuery:
+    """Normalized eth_getLogs filter"""
+    from_block: int
+    to_block: int
+    addresses: Optional[set] = None  # None = any address
+    topics: List[Optional[set]] = field(default_factory=list)  # None = wildcard position
+
+    def bloom_groups(self) -> List[List[int]]:
+        """Bloom masks for this query as a conjunction of disjunctions"""
+        groups = []
+        if self.addresses:
+            groups.append([bloom_bits(bytes.fromhex(a[2:])) for a in self.addresses])
+        for alternatives in self.topics:
+            if alternatives:
+                groups.append([bloom_bits(bytes.fromhex(t[2:])) for t in alternatives])
+        return groups
+
+    def matches(self, log: dict) -> bool:
+        """Exact match of a single log against this query"""
+        if self.addresses is not None and log['address'] not in self.addresses:
+            return False
+        log_topics = log['topics']
+        for i, alternatives in enumerate(self.topics):
+            if alternatives is None:
+                continue
+            if i >= len(log_topics) or log_topics[i] not in alternatives:
+                return False
+        return True
+
+def log_index_keys(log: dict) -> List[str]:
+    """Inverted log index keys for a log: address, topic0 and address+topic0"""
+    address = log['address']
+    keys = ['a:' + address]
+    if log['topics']:
+        topic0 = log['topics'][0].lower()
+        keys.append('t:' + topic0)
+        keys.append('at:' + address + ':' + topic0)
+    return keys
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """
+    Immutable world state as of one sealed block. Each mapping is a chain
+    of per-block delta layers (newest first) that are never mutated after
+    publication, so any number of readers can use a snapshot while the
+    writer builds the next block.
+    """
+    head: dict
+    balances: ChainMap
+    nonces: ChainMap
+    contracts: ChainMap
+    storage: ChainMap
+
+    def get_balance(self, address: str) -> int:
+        return self.balances.get(address.lower(), 0)
+
+    def get_nonce(self, address: str) -> int:
+        return self.nonces.get(address.lower(), 0)
+
+    def get_code(self, address: str) -> str:
+        return self.contracts.get(address.lower()) or '0x'
+
+    def get_storage(self, address: str, slot: int) -> int:
+        return self.storage.get(f"{address.lower()}:{slot}", 0)
+
+STATE_MAPS = ('balances', 'nonces', 'contracts', 'storage')
+
+class CallCache:
+    """
+    eth_call results keyed by (to, from, data, value). A call can only
+    read the code and storage of the contract it targets, so a result
+    computed at block n stays valid until a later block writes that
+    contract; the snapshot publisher reports written contracts through
+    invalidate() before the new snapshot becomes visible. Calls that read
+    the block environment (TIMESTAMP, NUMBER) are not cached.
+    """
+    def __init__(self, max_entries: int = CALL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, Tuple[int, str]]' = OrderedDict()  # key -> (block, result)
+        self._written: Dict[str, int] = {}  # contract -> last block that wrote its code or storage
+        self._contract_stats: Dict[str, List[int]] = {}  # contract -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            stats = self._contract_stats.setdefault(key[0], [0, 0])
+            entry = self._entries.get(key)
+            if entry is not None and self._written.get(key[0], -1) <= entry[0]:
+                self._entries.move_to_end(key)
+                stats[0] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # Contract written since
+            stats[1] += 1
+            return None
+
+    def put(self, key: tuple, block_number: int, result: str):
+        if len(key[2]) + len(result) > CALL_CACHE_MAX_ITEM:
+            return
+        with self._lock:
+            self._entries[key] = (block_number, result)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, block_number: int, contracts):
+        """Block block_number wrote the code or storage of contracts"""
+        if not contracts:
+            return
+        with self._lock:
+            for contract in contracts:
+                self._written[contract] = block_number
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            hits = sum(stats[0] for stats in self._contract_stats.values())
+            misses = sum(stats[1] for stats in self._contract_stats.values())
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'hits': hits,
+                'misses': misses,
+                'hitRatio': round(hits / (hits + misses), 4) if hits + misses else 0,
+                'contracts': {
+                    contract: {'hits': h, 'misses': m, 'hitRatio': round(h / (h + m), 4)}
+                    for contract, (h, m) in self._contract_stats.items()
+                }
+            }
+
+class StateJournal:
+    """
+    Append-only log of world-state changes, one JSON line per sealed
+    block: {"n": number, "full": bool, "balances": {...}, "nonces": ...}.
+    A full record holds the whole state, later records only the keys the
+    block wrote (0 = deleted). The writer appends a block's record after
+    the block and its indexes are on disk, so read-worker processes that
+    tail the journal can serve block n as soon as its record appears.
+    On restart the writer replays the journal and compacts it into one
+    full record.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0  # bytes already read by read()
+        self._file = None
+
+    def read(self) -> List[dict]:
+        """Complete records appended since the previous call"""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1  # Never return a half-written record
+        self.offset += end
+        return [json.loads(line) for line in chunk[:end].splitlines()]
+
+    def rewrite(self, number: int, state: Dict[str, dict]):
+        """Replace the journal with a single full record"""
+        if self._file:
+            self._file.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps(dict(state, n=number, full=True), separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a')
+
+    def append(self, number: int, delta: Dict[str, dict]):
+        """Append the state written by block number"""
+        self._file.write(json.dumps(dict(delta, n=number, full=False), separators=(',', ':')) + '\n')
+        self._file.flush()
+
+class EventBus:
+    """
+    In-process stream of chain events, kept in a bounded ring buffer:
+
+        ('block', number)                 a sealed block; consumers load it from
+                                          the BlockStore (Blockchain.block_event)
+        ('pendingTransaction', tx)        a transaction admitted to the mempool,
+                                          in RPC form (pending_transaction_view)
+
+    publish() is O(1) (a slot assignment and a notify) so it can run on the
+    block-production thread; consumers each keep their own cursor (the last
+    sequence number they read) and do their fan-out on their own threads.
+
+    The ring is bounded both by count (EVENT_BUS_SIZE) and by the estimated
+    bytes of its payloads (EVENT_BUS_BYTES), so a burst of large calldata
+    cannot pin memory; block events are just a number. A consumer that
+    falls behind the retained window skips to the oldest retained event and
+    is told how many it missed.
+    """
+    def __init__(self, size: int = EVENT_BUS_SIZE, max_bytes: int = EVENT_BUS_BYTES):
+        self.size = size
+        self.max_bytes = max_bytes
+        self.seq = 0  # sequence number of the last published event
+        self.bytes = 0  # estimated payload bytes retained
+        self._floor = 1  # oldest sequence number not evicted for max_bytes
+        self._ring: List[Optional[tuple]] = [None] * size
+        self._sizes = [0] * size
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _payload_size(kind: str, payload: Any) -> int:
+        if kind == 'pendingTransaction':
+            return EVENT_OVERHEAD + len(payload.get('input') or '')
+        return EVENT_OVERHEAD
+
+    def publish(self, kind: str, payload: Any):
+        size = self._payload_size(kind, payload)
+        with self._cond:
+            self.seq += 1
+            slot = self.seq % self.size
+            self.bytes += size - self._sizes[slot]
+            self._ring[slot] = (self.seq, kind, payload)
+            self._sizes[slot] = size
+            self._floor = max(self._floor, self.seq - self.size + 1)
+            while self.bytes > self.max_bytes and self._floor < self.seq:
+                evicted = self._floor % self.size
+                self.bytes -= self._sizes[evicted]
+                self._ring[evicted] = None
+                self._sizes[evicted] = 0
+                self._floor += 1
+            self._cond.notify_all()
+
+    def read(self, cursor: int, limit: Optional[int] = None) -> Tuple[int, List[tuple], int]:
+        """Events after cursor: (new cursor, [(seq, kind, payload)], events missed)"""
+        seq = self.seq
+        first = max(cursor + 1, self._floor, seq - self.size + 1, 1)
+        last = seq if limit is None else min(seq, first + limit - 1)
+        events = [self._ring[n % self.size] for n in range(first, last + 1)]
+        # A slot not yet written, or overwritten or evicted while copying, is not ours: stop before it
+        for i, event in enumerate(events):
+            if event is None or event[0] != first + i:
+                del events[i:]
+                break
+        return first + len(events) - 1, events, first - cursor - 1
+
+    def wait(self, cursor: int, timeout: Optional[float] = None) -> bool:
+        """Block until an event after cursor is published; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.seq > cursor, timeout)
+
+def pending_transaction_view(tx_hash: str, tx_data: dict) -> dict:
+    """RPC (hex) form of a mempool transaction"""
+    return {
+        'hash': tx_hash,
+        'from': tx_data['from_address'],
+        'to': tx_data.get('to_address'),
+        'value': to_hex(tx_data.get('value', 0)),
+        'gas': to_hex(tx_data.get('gas_limit', 0)),
+        'gasPrice': to_hex(tx_data.get('gas_price', 0)),
+        'input': tx_data.get('input', '0x'),
+        'nonce': to_hex(tx_data.get('nonce') or 0),
+        'blockHash': None,
+        'blockNumber': None,
+        'transactionIndex': None
+    }
+
+def block_header(block: dict) -> dict:
+    """RPC (hex) form of a stored block's header, as used for newHeads"""
+    return {
+        'number': to_hex(block['number']),
+        'hash': block['hash'],
+        'parentHash': block['parentHash'],
+        'timestamp': to_hex(block['timestamp']),
+        'gasUsed': to_hex(block.get('gasUsed', 0)),
+        'gasLimit': to_hex(block.get('gasLimit', GAS_LIMIT_BLOCK)),
+        'baseFeePerGas': block.get('baseFeePerGas', to_hex(BASE_FEE)),
+        'logsBloom': block.get('logsBloom', EMPTY_BLOOM)
+    }
+
 class Blockchain:
-    """Simple blockchain implementation"""
-    def __init__(self):
+    """
+    Simple blockchain implementation.
+
+    Concurrency model: a single writer thread owns block production and
+    every mutation of EVM state (transactions are handed to it through
+    submit_transaction). When a block is sealed the writer publishes a new
+    StateSnapshot by swapping self.snapshot; readers only ever use a
+    published snapshot and never take a lock shared with the writer.
+
+    With a data directory the writer also journals every block's state
+    changes (StateJournal). A read_only instance, used by read-worker
+    processes, never produces blocks: it tails the block log, indexes and
+    state journal that the writer process leaves on disk and publishes its
+    own snapshots from them.
+
+    Sealed blocks and mempool admissions are published to self.events
+    (EventBus) for filters, WebSocket subscribers and other consumers.
+    """
+    def __init__(self, data_dir: Optional[str] = None, read_only: bool = False):
+        if read_only and not data_dir:
+            raise ValueError('a read-only chain needs the data directory of a writer')
         self.evm = RealEVM()
-        self.blocks = []
+        self.data_dir = data_dir
+        self.read_only = read_only
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        self.blocks = BlockStore(data_dir, read_only=read_only)
         self.pending_transactions = []
         self.current_base_fee = BASE_FEE
-        self.transaction_receipts = {}  # Store receipts by tx hash
-
-        # Genesis block
+        self.tx_index = HashIndex(self._data_path('hashes.db'), 'transactions')  # tx hash -> position
+        self.block_hash_index = HashIndex(self._data_path('hashes.db'), 'blocks')  # block hash -> number
+        self.address_index = PostingIndex(self._data_path('address_index.journal'))  # address -> transactions
+        self.log_index = PostingIndex(self._data_path('log_index.journal'))  # address/topic0 -> logs
+        self.bloom_index = LogBloomIndex(self._data_path('blooms.dat'), read_only=read_only)  # block number -> logsBloom
+        self.state_journal = StateJournal(self._data_path('state.journal')) if data_dir else None
+        self.events = EventBus()
+        self.filters = FilterManager(self)
+        self.snapshot: Optional[StateSnapshot] = None
+        self.call_cache = CallCache()
+        self._write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._writer_loop, name='block-writer', daemon=True)
+
+        if read_only:
+            self.follow()
+            if self.snapshot is None:
+                raise RuntimeError(f'no published state in {data_dir}')
+            threading.Thread(target=self._follow_loop, name='chain-follower', daemon=True).start()
+            return
+
+        # Genesis block (unless resuming a stored chain)
+        if len(self.blocks):
+            self._restore_state()
+            logger.info(f"Resuming stored chain at block {self.blocks[-1]['number']}")
+            self._open_indexes()
+            self._publish_snapshot(self.blocks[-1])
+            self._writer.start()
+            return
         genesis = {
             'number': 0,
             'hash': '0x' + '0' * 64,
             'parentHash': '0x' + '0' * 64,
             'timestamp': int(time.time()),
             'transactions': [],
-            'baseFeePerGas': to_hex(self.current_base_fee)
+            'baseFeePerGas': to_hex(self.current_base_fee),
+            'logsBloom': EMPTY_BLOOM
         }
         self.blocks.append(genesis)
+        self._open_indexes()
+        self._publish_snapshot(genesis)
+        self._writer.start()
+
+    def _data_path(self, name: str) -> Optional[str]:
+        """Path of a file inside the data directory (None when running in memory)"""
+        return os.path.join(self.data_dir, name) if self.data_dir else None
+
+    def _open_indexes(self):
+        """Load persisted indexes and catch them up with the chain head"""
+        head = self.get_latest_block()['number']
+        self.address_index.open(head)
+        self.log_index.open(head)
+        if self.bloom_index.count > head + 1:
+            self.bloom_index.reset()
+        for index in (self.tx_index, self.block_hash_index):
+            if index.indexed_height > head:
+                index.reset()  # Holds blocks dropped by _restore_state
+        start = min(self.address_index.indexed_height, self.log_index.indexed_height,
+                    self.tx_index.indexed_height, self.block_hash_index.indexed_height,
+                    self.bloom_index.count - 1) + 1
+        for number in range(start, head + 1):
+            self._index_block(self.blocks[number])
 
     def get_latest_block(self):
-        """Get the latest block"""
-        return self.blocks[-1]
+        """Get the latest published block"""
+        snapshot = self.snapshot
+        return snapshot.head if snapshot else self.blocks[-1]
+
+    def _working_state(self) -> Dict[str, TrackedDict]:
+        """The mutable state maps, by StateSnapshot field name"""
+        return dict(zip(STATE_MAPS, (self.evm.balances, self.evm.nonces,
+                                     self.evm.contracts, self.evm.storage.data)))
+
+    def _publish_snapshot(self, head: dict, flatten: bool = False):
+        """
+        Publish the working state as of head. Only the keys written since
+        the previous block are copied (as a new layer); every
+        SNAPSHOT_MAX_LAYERS blocks the layers are flattened. The writer
+        also journals the keys for read workers.
+        """
+        previous = self.snapshot
+        flatten = flatten or previous is None
+        layers, deltas = {}, {}
+        for name, working in self._working_state().items():
+            delta = deltas[name] = working.take_delta()
+            if flatten or len(getattr(previous, name).maps) >= SNAPSHOT_MAX_LAYERS:
+                layers[name] = ChainMap(dict(working))
+            elif delta:
+                layers[name] = ChainMap(delta, *getattr(previous, name).maps)
+            else:
+                layers[name] = getattr(previous, name)
+        self.call_cache.invalidate(head['number'], {key.split(':')[0] for key in deltas['storage']}
+                                   | set(deltas['contracts']))
+        if self.state_journal is not None and not self.read_only:
+            if previous is None:
+                self.state_journal.rewrite(head['number'], {name: dict(working)
+                                                            for name, working in self._working_state().items()})
+            else:
+                self.state_journal.append(head['number'], deltas)
+        self.snapshot = StateSnapshot(head, **layers)  # Atomic pointer swap
+
+    def _apply_state_record(self, record: dict):
+        """Apply one StateJournal record to the working state"""
+        for name, working in self._working_state().items():
+            if record['full']:
+                working.clear()
+            for key, value in record[name].items():
+                if value:
+                    working[key] = value
+                elif key in working:
+                    del working[key]
+
+    def _restore_state(self):
+        """
+        Replay the state journal of a stored chain (writer start-up). A
+        crash between appending a block and journaling its state leaves the
+        block log ahead of the journal; those blocks are dropped so the
+        chain never serves state that does not match its head.
+        """
+        head = self.blocks[-1]['number']
+        number = -1
+        for record in self.state_journal.read():
+            if record['n'] > head:
+                break
+            self._apply_state_record(record)
+            number = record['n']
+        if number < 0:
+            raise RuntimeError(f'{self.data_dir} holds blocks up to {head} but no state journal; '
+                               f'cannot restore state')
+        if number < head:
+            logger.warning(f"State journal ends at block {number}, chain head is {head}; "
+                           f"dropping blocks {number + 1}..{head}")
+            self.blocks.truncate(number + 1)
+
+    def follow(self):
+        """
+        Catch up with blocks the writer process has sealed (read-only
+        chains). Blocks, indexes and the state journal are all appended by
+        the writer before a block's state record, so once the record is
+        read everything else for that block is on disk.
+        """
+        records = self.state_journal.read()
+        if not records:
+            return
+        previous = self.snapshot.head['number'] if self.snapshot else None
+        self.blocks.refresh()
+        self.bloom_index.refresh()
+        self.address_index.follow()
+        self.log_index.follow()
+        flatten = False
+        for record in records:
+            self._apply_state_record(record)
+            flatten = flatten or record['full']
+        self._publish_snapshot(self.blocks[records[-1]['n']], flatten=flatten)
+        if previous is not None:
+            for number in range(previous + 1, records[-1]['n'] + 1):
+                self.events.publish('block', number)
+
+    def _follow_loop(self):
+        while True:
+            time.sleep(FOLLOW_INTERVAL)
+            try:
+                self.follow()
+            except Exception as e:
+                logger.error(f"Chain follower error: {e}")
+
+    def submit_transaction(self, tx_data: dict) -> Future:
+        """
+        Hand a transaction to the block writer. The future resolves to
+        (tx_hash, included) once the block containing it is sealed. A
+        'nonce' of None is filled in by the writer from current state.
+        """
+        if self.read_only:
+            raise RPCError(-32000, 'read-only node: transactions go to the writer')
+        future = Future()
+        self._write_queue.put((tx_data, future))
+        return future
+
+    def _writer_loop(self):
+        """Block writer: drain submitted transactions and seal them into blocks"""
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < MAX_BLOCK_TRANSACTIONS:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                hashes = []
+                next_nonce: Dict[str, int] = {}  # sender -> nonce of its next transaction in this batch
+                for tx_data, _ in batch:
+                    sender = tx_data['from_address'].lower()
+                    if sender not in next_nonce:
+                        next_nonce[sender] = self.evm.get_nonce(sender)
+                    if tx_data.get('nonce') is None:
+                        tx_data['nonce'] = next_nonce[sender]
+                    next_nonce[sender] = max(next_nonce[sender], tx_data['nonce'] + 1)
+                    hashes.append(self.add_transaction(tx_data))
+                block = self.create_block()
+                included = {receipt['transactionHash'] for receipt in block['transactions']}
+                for (_, future), tx_hash in zip(batch, hashes):
+                    future.set_result((tx_hash, tx_hash in included))
+            except Exception as e:
+                logger.error(f"Block writer error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def call(self, from_address: str, to_address: str, data: str, value: int = 0) -> str:
+        """eth_call against the latest published snapshot (cached per contract)"""
+        snapshot = self.snapshot
+        to_address = to_address.lower()
+        if to_address not in snapshot.contracts:
+            return '0x'
+        key = (to_address, (from_address or '').lower(), data.lower(), value)
+        result = self.call_cache.get(key)
+        if result is not None:
+            return result
+        evm = RealEVM(state=snapshot)
+        result = evm.call(from_address, to_address, data, value)
+        if not evm.volatile:
+            self.call_cache.put(key, snapshot.head['number'], result)
+        return result
+
+    def add_transaction(self, tx_data: dict) -> str:
+        """Admit a transaction to the pending pool and return its hash (writer only)"""
+        tx_hash = '0x' + hashlib.sha3_256(json.dumps(tx_data).encode()).hexdigest()
+        self.pending_transactions.append(tx_data)
+        self.events.publish('pendingTransaction', pending_transaction_view(tx_hash, tx_data))
+        return tx_hash
 
     def create_block(self):
-        """Create a new block with pending transactions"""
+        """Create a new block with pending transactions (writer only)"""
         latest = self.get_latest_block()
 
         block = {
@@ -849,62 +1974,975 @@ class Blockchain:
 
         # Process pending transactions
         total_gas_used = 0
+        block_bloom = 0
+        log_index = 0
         for tx_data in self.pending_transactions[:]:
             tx = Transaction(**tx_data)
-            success, gas_used, contract_address = self.evm.execute_transaction(tx, self.current_base_fee)
+            success, gas_used, contract_address, logs = self.evm.execute_transaction(tx, self.current_base_fee)
 
             if success:
                 tx_hash = '0x' + hashlib.sha3_256(json.dumps(tx_data).encode()).hexdigest()
+                receipt_logs = []
+                for log in logs:
+                    receipt_logs.append({
+                        'address': log['address'].lower(),
+                        'topics': log['topics'],
+                        'data': log['data'],
+                        'blockNumber': to_hex(block['number']),
+                        'transactionHash': tx_hash,
+                        'transactionIndex': to_hex(len(block['transactions'])),
+                        'blockHash': None,  # Filled in once the block is sealed
+                        'logIndex': to_hex(log_index),
+                        'removed': False
+                    })
+                    log_index += 1
+                bloom = logs_bloom(receipt_logs)
+                block_bloom |= bloom
                 receipt = {
                     'transactionHash': tx_hash,
+                    'transactionIndex': to_hex(len(block['transactions'])),
+                    'from': tx.from_address,
+                    'to': tx.to_address,
                     'status': '0x1',
                     'blockNumber': to_hex(block['number']),
                     'gasUsed': to_hex(gas_used),
                     'contractAddress': contract_address,
-                    'logs': []
+                    'logs': receipt_logs,
+                    'logsBloom': bloom_to_hex(bloom)
                 }
-                # Store receipt for later retrieval
-                self.transaction_receipts[tx_hash] = receipt
                 block['transactions'].append(receipt)
                 total_gas_used += gas_used
                 self.pending_transactions.remove(tx_data)
 
         block['gasUsed'] = total_gas_used
+        block['logsBloom'] = bloom_to_hex(block_bloom)
         block['hash'] = '0x' + hashlib.sha3_256(json.dumps(block).encode()).hexdigest()
+        for receipt in block['transactions']:
+            receipt['blockHash'] = block['hash']
+            for log in receipt['logs']:
+                log['blockHash'] = block['hash']
 
         self.blocks.append(block)
+        self._index_block(block)
+        self._publish_snapshot(block)
+        self.events.publish('block', block['number'])
         return block
 
+    def _index_block(self, block: dict):
+        """Update the secondary indexes for a sealed block"""
+        number = block['number']
+        if number >= self.bloom_index.count:
+            self.bloom_index.append(from_hex(block.get('logsBloom', EMPTY_BLOOM)))
+
+        if number > self.block_hash_index.indexed_height:
+            self.block_hash_index.put(block['hash'], number)
+            self.block_hash_index.mark_indexed(number)
+
+        if number > self.tx_index.indexed_height:
+            for index, receipt in enumerate(block['transactions']):
+                self.tx_index.put(receipt['transactionHash'], pack_position(number, index))
+            self.tx_index.mark_indexed(number)
+
+        if number > self.address_index.indexed_height:
+            for index, receipt in enumerate(block['transactions']):
+                position = pack_position(number, index)
+                touched = {receipt.get('from'), receipt.get('to'), receipt.get('contractAddress')}
+                for address in touched:
+                    if address:
+                        self.address_index.append(address.lower(), position)
+            self.address_index.mark_indexed(number)
+
+        if number > self.log_index.indexed_height:
+            for log in self._block_logs(block):
+                position = pack_position(number, from_hex(log['logIndex']))
+                for key in log_index_keys(log):
+                    self.log_index.append(key, position)
+            self.log_index.mark_indexed(number)
+
+    def rebuild_indexes(self):
+        """
+        Backfill every secondary index (address and log posting lists,
+        blooms, block/tx hashes) from the stored blocks in a single
+        streaming pass (e.g. after the index files were lost or the
+        key layout changed).
+        """
+        for index in (self.address_index, self.log_index, self.bloom_index,
+                      self.tx_index, self.block_hash_index):
+            index.reset()
+        for block in self.blocks:
+            self._index_block(block)
+        logger.info(f"Rebuilt indexes for {len(self.blocks)} blocks: "
+                    f"{len(self.address_index)} addresses, {len(self.log_index)} log keys")
+
+    def block_event(self, number: int) -> Tuple[dict, List[dict]]:
+        """Header and logs of a sealed block, for a ('block', number) event"""
+        block = self.blocks[number]
+        return block_header(block), self._block_logs(block)
+
+    @staticmethod
+    def _block_logs(block: dict) -> List[dict]:
+        """All logs of a block in logIndex order"""
+        return [log for receipt in block['transactions'] for log in receipt.get('logs', [])]
+
+    def get_transactions_by_address(self, address: str, cursor: Optional[str] = None,
+                                    limit: int = HISTORY_PAGE_DEFAULT) -> dict:
+        """
+        Page through all transactions touching address, newest first.
+        The cursor is the posting-list position to continue from, so every
+        page costs O(limit) regardless of how deep into the history it is.
+        """
+        postings = self.address_index.get(address.lower())
+        # Ignore entries of a block that is sealed but not yet published
+        published = bisect_right(postings, pack_position(self.get_latest_block()['number'], 0xFFFFFF))
+        try:
+            limit = from_hex(limit) if isinstance(limit, str) else int(limit)
+        except ValueError:
+            raise RPCError(-32602, f'Invalid params: limit {limit!r}')
+        limit = max(1, min(limit, HISTORY_PAGE_MAX))
+
+        try:
+            end = published if cursor is None else from_hex(cursor)
+        except ValueError:
+            end = -1
+        if not 0 <= end <= published:
+            raise RPCError(-32602, f'Invalid params: cursor {cursor!r}')
+        start = max(0, end - limit)
+
+        transactions = []
+        for position in reversed(postings[start:end]):
+            block_number, index = unpack_position(position)
+            transactions.append(self.blocks[block_number]['transactions'][index])
+
+        return {
+            'transactions': transactions,
+            'nextCursor': to_hex(start) if start > 0 else None
+        }
+
+    def get_transaction_receipt(self, tx_hash: str) -> Optional[dict]:
+        """Look up a sealed transaction's receipt by hash"""
+        position = self.tx_index.get(tx_hash)
+        if position is None:
+            return None
+        block_number, index = unpack_position(position)
+        if block_number > self.get_latest_block()['number']:
+            return None  # Sealed but not yet published
+        return self.blocks[block_number]['transactions'][index]
+
+    def resolve_block_number(self, tag, default: str = 'latest') -> int:
+        """Resolve a block tag or hex number to a block number"""
+        if tag is None:
+            tag = default
+        if tag in ('latest', 'pending', 'safe', 'finalized'):
+            return self.get_latest_block()['number']
+        if tag == 'earliest':
+            return 0
+        return from_hex(tag)
+
+    def parse_log_query(self, filter_params: dict) -> LogQuery:
+        """
+        Normalize an eth_getLogs / eth_newFilter filter object. A malformed
+        block, address or topic is an invalid-params error (-32602).
+        """
+        def checked(value, pattern: re.Pattern, name: str) -> str:
+            if not isinstance(value, str) or not pattern.fullmatch(value):
+                raise RPCError(-32602, f'Invalid params: {name} {value!r}')
+            return value.lower()
+
+        if filter_params.get('blockHash'):
+            number = self.block_hash_index.get(checked(filter_params['blockHash'], _HEX_TOPIC, 'blockHash'))
+            if number is None:
+                raise RPCError(-32000, 'unknown block')
+            from_block = to_block = number
+        else:
+            blocks = []
+            for name in ('fromBlock', 'toBlock'):
+                try:
+                    blocks.append(self.resolve_block_number(filter_params.get(name)))
+                except (ValueError, AttributeError):
+                    raise RPCError(-32602, f'Invalid params: {name} {filter_params.get(name)!r}')
+            from_block, to_block = blocks
+
+        addresses = filter_params.get('address')
+        if addresses is not None:
+            if isinstance(addresses, str):
+                addresses = [addresses]
+            if not isinstance(addresses, list):
+                raise RPCError(-32602, f'Invalid params: address {addresses!r}')
+            # [] = any address, as in geth
+            addresses = {checked(a, _HEX_ADDRESS, 'address') for a in addresses} or None
+
+        topics = []
+        for topic in filter_params.get('topics') or []:
+            if topic is None:
+                topics.append(None)
+            elif isinstance(topic, list):
+                topics.append({checked(t, _HEX_TOPIC, 'topic') for t in topic} if topic else None)
+            else:
+                topics.append({checked(topic, _HEX_TOPIC, 'topic')})
+
+        return LogQuery(from_block, to_block, addresses, topics)
+
+    def _log_index_keys(self, query: LogQuery) -> Optional[List[str]]:
+        """Inverted index keys that exactly cover a query (None if not indexable)"""
+        topic0 = query.topics[0] if query.topics else None
+        if query.addresses and topic0:
+            return ['at:' + a + ':' + t for a in query.addresses for t in topic0]
+        if query.addresses:
+            return ['a:' + a for a in query.addresses]
+        if topic0:
+            return ['t:' + t for t in topic0]
+        return None
+
+    def get_logs(self, query: LogQuery) -> List[dict]:
+        """
+        Run a log query. Address/topic0 queries are answered from the
+        inverted log index in O(results); anything else tests block blooms
+        over the whole range first and only decodes the candidate blocks.
+        """
+        to_block = min(query.to_block, self.get_latest_block()['number'])
+        keys = self._log_index_keys(query)
+        if keys is not None:
+            positions = []
+            for key in keys:
+                positions.extend(self.log_index.range(key, query.from_block, to_block))
+            positions.sort()
+
+            results = []
+            block_number, block_logs = None, None
+            for position in positions:
+                number, log_index = unpack_position(position)
+                if number != block_number:
+                    block_number, block_logs = number, self._block_logs(self.blocks[number])
+                log = block_logs[log_index]
+                if query.matches(log):
+                    results.append(log)
+                    if len(results) > MAX_LOG_RESULTS:
+                        raise RPCError(-32005, f'query returned more than {MAX_LOG_RESULTS} results')
+            return results
+
+        if to_block - query.from_block + 1 > MAX_LOG_BLOCK_RANGE:
+            raise RPCError(-32005, f'query spans more than {MAX_LOG_BLOCK_RANGE} blocks; '
+                                   f'narrow the range or filter by address or topic0')
+        results = []
+        for number in self.bloom_index.candidates(query.from_block, to_block,
+                                                  query.bloom_groups()):
+            for receipt in self.blocks[number]['transactions']:
+                for log in receipt['logs']:
+                    if query.matches(log):
+                        results.append(log)
+                        if len(results) > MAX_LOG_RESULTS:
+                            raise RPCError(-32005, f'query returned more than {MAX_LOG_RESULTS} results')
+        return results
+
+@dataclass
+class PollFilter:
+    """Server-side filter state; cursor is the last block (or event seq) delivered"""
+    id: str
+    type: str  # 'logs', 'blocks', 'pendingTransactions'
+    cursor: int
+    params: Optional[dict] = None
+    last_poll: float = field(default_factory=time.time)
+
+class FilterManager:
+    """
+    Polling filters for eth_newFilter / eth_newBlockFilter /
+    eth_newPendingTransactionFilter. Each filter keeps a cursor into the
+    block (or pending tx) stream so a poll only touches what is new.
+    Filters that are not polled for FILTER_TTL seconds are uninstalled.
+    """
+    def __init__(self, blockchain: 'Blockchain'):
+        self.blockchain = blockchain
+        self.filters: Dict[str, PollFilter] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def _install(self, filter_type: str, cursor: int, params: Optional[dict] = None) -> str:
+        with self._lock:
+            self._sweep()
+            if len(self.filters) >= MAX_FILTERS:
+                raise RPCError(-32000, f'too many filters (max {MAX_FILTERS})')
+            filter_id = '0x' + uuid.uuid4().hex[:32]
+            self.filters[filter_id] = PollFilter(filter_id, filter_type, cursor, params)
+            return filter_id
+
+    def _sweep(self):
+        """Uninstall filters that have been idle longer than FILTER_TTL"""
+        now = time.time()
+        if now - self._last_sweep < FILTER_SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        expired = [fid for fid, f in self.filters.items() if now - f.last_poll > FILTER_TTL]
+        for fid in expired:
+            del self.filters[fid]
+        if expired:
+            logger.info(f"Expired {len(expired)} idle filters")
+
+    def _get(self, filter_id: str) -> PollFilter:
+        """Look up a filter and mark it polled (caller holds _lock)"""
+        self._sweep()
+        poll_filter = self.filters.get(filter_id)
+        if poll_filter is None:
+            raise RPCError(-32000, 'filter not found')
+        poll_filter.last_poll = time.time()
+        return poll_filter
+
+    def new_log_filter(self, filter_params: dict) -> str:
+        """eth_newFilter: deliver logs from fromBlock (default: next block) onwards"""
+        query = self.blockchain.parse_log_query(filter_params)
+        head = self.blockchain.get_latest_block()['number']
+        cursor = query.from_block - 1 if filter_params.get('fromBlock') not in (None, 'latest') else head
+        return self._install('logs', cursor, filter_params)
+
+    def new_block_filter(self) -> str:
+        """eth_newBlockFilter"""
+        return self._install('blocks', self.blockchain.get_latest_block()['number'])
+
+    def new_pending_transaction_filter(self) -> str:
+        """eth_newPendingTransactionFilter"""
+        return self._install('pendingTransactions', self.blockchain.events.seq)
+
+    def uninstall(self, filter_id: str) -> bool:
+        """eth_uninstallFilter"""
+        with self._lock:
+            return self.filters.pop(filter_id, None) is not None
+
+    def get_changes(self, filter_id: str) -> list:
+        """
+        eth_getFilterChanges: everything since the previous poll. The cursor
+        is read and advanced under the lock, so concurrent polls of one
+        filter get disjoint ranges; the work for a range runs outside it.
+        A log filter claims at most MAX_LOG_BLOCK_RANGE blocks per poll (one
+        created with an old fromBlock catches up over several polls) and
+        hands its range back if the query fails, so no block is skipped.
+        """
+        chain = self.blockchain
+        with self._lock:
+            poll_filter = self._get(filter_id)
+            head = chain.get_latest_block()['number']
+            start = poll_filter.cursor + 1
+            if poll_filter.type == 'pendingTransactions':
+                poll_filter.cursor, events, _ = chain.events.read(poll_filter.cursor)
+            else:
+                if poll_filter.type == 'logs':
+                    head = min(head, start + MAX_LOG_BLOCK_RANGE - 1)
+                poll_filter.cursor = max(poll_filter.cursor, head)
+
+        if poll_filter.type == 'blocks':
+            return [chain.blocks[n]['hash'] for n in range(start, head + 1)]
+
+        if poll_filter.type == 'pendingTransactions':
+            return [tx['hash'] for _, kind, tx in events if kind == 'pendingTransaction']
+
+        query = chain.parse_log_query(poll_filter.params)
+        from_block = start
+        to_block = min(head, query.to_block)
+        if from_block > to_block:
+            return []
+        query.from_block, query.to_block = from_block, to_block
+        try:
+            return chain.get_logs(query)
+        except Exception:
+            with self._lock:
+                if poll_filter.cursor == head:  # Not polled since: the next poll retries the range
+                    poll_filter.cursor = start - 1
+            raise
+
+    def get_logs(self, filter_id: str) -> list:
+        """eth_getFilterLogs: all logs matching a log filter"""
+        with self._lock:
+            poll_filter = self._get(filter_id)
+        if poll_filter.type != 'logs':
+            raise RPCError(-32000, 'filter not found')
+        return self.blockchain.get_logs(self.blockchain.parse_log_query(poll_filter.params))
+
 # Global blockchain instance
 blockchain = None
 
-@app.route('/', methods=['POST'])
-def handle_rpc():
-    """Main RPC handler"""
-    global blockchain
-
+# (host, port) of the writer process when running as a read worker
+writer_address: Optional[Tuple[str, int]] = None
+_writer_connections = threading.local()
+
+def forward_to_writer(data: dict) -> dict:
+    """Relay a single request to the writer process and return its response"""
+    body = json_encode(data)
+    for attempt in range(2):
+        conn = getattr(_writer_connections, 'conn', None)
+        if conn is None:
+            conn = _writer_connections.conn = http.client.HTTPConnection(*writer_address, timeout=60)
+        try:
+            conn.request('POST', '/', body, {'Content-Type': 'application/json'})
+            return json_decode(conn.getresponse().read())
+        except (ConnectionError, http.client.HTTPException):
+            conn.close()
+            _writer_connections.conn = None  # Stale keep-alive connection: reconnect once
+            if attempt:
+                raise
+
+def handle_rpc_body(body: bytes, budget: Optional['TokenBucket'] = None) -> Tuple[int, bytes]:
+    """
+    Run a raw JSON-RPC request body (single request or batch) and return
+    (HTTP status, encoded response). Shared by every HTTP front end;
+    budget is the caller's rate-limit bucket (None = unlimited).
+    """
     try:
-        data = request.get_json()
+        data = json_decode(body) if body else None
         if not data:
-            return jsonify({'error': 'Invalid request'}), 400
-
-        # Handle batch requests
-        if isinstance(data, list):
-            responses = []
-            for req in data:
-                response = process_single_request(req)
-                responses.append(response)
-            return jsonify(responses)
-        else:
-            response = process_single_request(data)
-            return jsonify(response)
+            return 400, json_encode({'error': 'Invalid request'})
+        return 200, dispatch_rpc(data, budget)
 
     except Exception as e:
         logger.error(f"Error handling request: {e}")
-        return jsonify({'error': str(e)}), 500
+        return 500, json_encode({'error': str(e)})
+
+def dispatch_rpc(data, budget: Optional['TokenBucket'] = None) -> bytes:
+    """
+    Run a decoded JSON-RPC request or batch and return the encoded
+    response. Used by handle_rpc_body and by the WebSocket server, which
+    decodes messages itself.
+    """
+    # Handle batch requests
+    if isinstance(data, list):
+        error = check_batch(data)
+        if error:
+            return json_encode(error)
+        return encode_batch(run_batch(data, budget))
+    return encode_response(process_single_request(data, budget))
+
+class RawJSON(bytes):
+    """An already-encoded JSON value, written into responses verbatim"""
+
+def _envelope_parts(response: dict) -> tuple:
+    """Byte strings that make up an encoded response envelope"""
+    result = response.get('result')
+    if isinstance(result, RawJSON):
+        req_id = response['id']
+        encoded_id = str(req_id).encode() if type(req_id) is int else json_encode(req_id)
+        return b'{"jsonrpc":"2.0","result":', result, b',"id":', encoded_id, b'}'
+    return json_encode(response),
+
+def encode_response(response: dict) -> bytes:
+    """Encode a response envelope, splicing in a RawJSON result as-is"""
+    return b''.join(_envelope_parts(response))
+
+def encode_batch(responses: list) -> bytes:
+    """
+    Encode batch responses. Pre-encoded results are spliced in with a
+    single join over every envelope's parts (one copy of each result); a
+    batch without any is cheaper to encode in one call.
+    """
+    if not any(isinstance(response.get('result'), RawJSON) for response in responses):
+        return json_encode(responses)
+    parts = []
+    for response in responses:
+        parts.append(b',')
+        parts.extend(_envelope_parts(response))
+    parts[0] = b'['
+    parts.append(b']')
+    return b''.join(parts)
+
+def _batch_method(req) -> Optional['RPCMethod']:
+    return RPC_METHODS.get(req.get('method')) if isinstance(req, dict) else None
+
+def check_batch(batch: list) -> Optional[dict]:
+    """Error response for a batch over MAX_BATCH_SIZE or MAX_BATCH_COST, else None"""
+    if len(batch) > MAX_BATCH_SIZE:
+        message = f'batch too large ({len(batch)} requests, max {MAX_BATCH_SIZE})'
+    else:
+        cost = sum(rpc.cost for rpc in map(_batch_method, batch) if rpc)
+        if cost <= MAX_BATCH_COST:
+            return None
+        message = f'batch too expensive (cost {cost}, max {MAX_BATCH_COST})'
+    return {'jsonrpc': '2.0', 'error': {'code': -32005, 'message': message}, 'id': None}
+
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='rpc-batch')
+
+def run_batch(batch: list, budget: Optional['TokenBucket'] = None) -> list:
+    """
+    Execute a batch, returning responses in request order. Consecutive
+    read entries run in parallel on the batch executor; a write (or a
+    writer-only method such as a filter poll) waits for everything before
+    it and runs on its own, so a batch sees its own writes in order.
+    """
+    responses = [None] * len(batch)
+    reads = []  # (position, future) of the current run of reads
+
+    def finish_reads():
+        for position, future in reads:
+            responses[position] = future.result()
+        reads.clear()
+
+    for position, req in enumerate(batch):
+        rpc = _batch_method(req)
+        if rpc is not None and (rpc.kind == 'write' or rpc.writer_only):
+            finish_reads()
+            responses[position] = process_single_request(req, budget)
+        else:
+            reads.append((position, _batch_executor.submit(process_single_request, req, budget)))
+    finish_reads()
+    return responses
+
+@app.route('/', methods=['POST'])
+def handle_rpc():
+    """Main RPC handler (Flask development server path)"""
+    client = client_address(request.remote_addr, request.headers.get('X-Forwarded-For'))
+    status, body = handle_rpc_body(request.get_data(),
+                                   rate_limiter.bucket(client, request.headers.get('X-API-Key')))
+    return Response(body, status=status, mimetype='application/json')
+
+# Method registry
+@dataclass(frozen=True)
+class Param:
+    """Declared JSON-RPC positional parameter"""
+    name: str
+    types: Tuple[type, ...] = (str,)
+    required: bool = True
+
+# Latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class MethodStats:
+    """Call count, error count and latency histogram for one RPC method"""
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket = +Inf
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False):
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.total_seconds += seconds
+            self.buckets[bucket] += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+                cumulative += count
+                histogram['+Inf' if bound == float('inf') else str(bound)] = cumulative
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'avgMs': round(self.total_seconds / self.calls * 1000, 3) if self.calls else 0,
+                'latencyHistogram': histogram
+            }
+
+class ResponseCache:
+    """
+    LRU cache of encoded results that can never change (sealed blocks,
+    receipts, deployed code), bounded by total encoded size. Keys are
+    tuples whose first item names the method, for per-method hit ratios.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: 'OrderedDict[tuple, RawJSON]' = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[RawJSON]:
+        with self._lock:
+            raw = self._entries.get(key)
+            counts = self._misses if raw is None else self._hits
+            counts[key[0]] = counts.get(key[0], 0) + 1
+            if raw is not None:
+                self._entries.move_to_end(key)
+            return raw
+
+    def put(self, key: tuple, value: Any) -> RawJSON:
+        """Encode and cache value, returning the encoded form"""
+        raw = RawJSON(json_encode(value))
+        if len(raw) > self.max_bytes:
+            return raw
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = raw
+            self.size += len(raw)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+        return raw
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            methods = {}
+            for name in set(self._hits) | set(self._misses):
+                hits, misses = self._hits.get(name, 0), self._misses.get(name, 0)
+                methods[name] = {'hits': hits, 'misses': misses,
+                                 'hitRatio': round(hits / (hits + misses), 4)}
+            return {'entries': len(self._entries), 'bytes': self.size,
+                    'maxBytes': self.max_bytes, 'methods': methods}
+
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight reads: while a call for a key is
+    running, callers with the same key wait for it and share its result
+    instead of executing again. A result that was waited for is shared
+    encoded, so it is serialised once; an uncontended one is returned as is.
+    """
+    def __init__(self):
+        self.executions_saved = 0
+        self._calls: Dict[tuple, list] = {}  # key -> [future, waiters]
+        self._lock = threading.Lock()
+
+    def do(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [Future(), 0]
+            else:
+                call[1] += 1
+                self.executions_saved += 1
+        future = call[0]
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._calls[key]  # Later callers execute again
+            waiters = call[1]
+        if waiters and not isinstance(result, RawJSON):
+            result = RawJSON(json_encode(result))
+        future.set_result(result)
+        return result
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {'inFlight': len(self._calls), 'executionsSaved': self.executions_saved}
+
+single_flight = SingleFlight()
+
+class TokenBucket:
+    """Compute units refilled at rate per second up to burst; charges may leave it in debt"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.burst = rate * RATE_LIMIT_BURST_SECONDS
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class RateLimiter:
+    """
+    Compute-unit token buckets per client IP and per API key. A request is
+    admitted if its bucket holds the method's cost; work that is only
+    known afterwards (eth_call gas) is charged on top and can push the
+    bucket into debt, which delays that client's next requests.
+    """
+    def __init__(self, cu_per_second: float = RATE_LIMIT_CU_PER_SECOND,
+                 api_keys: Optional[Dict[str, float]] = None):
+        self.cu_per_second = cu_per_second
+        self.api_keys = api_keys or {}  # key -> compute units per second (0 = unlimited)
+        self.rejected = 0
+        self.shed = 0  # refused by the server because the executor queue was full
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, client: str, api_key: Optional[str] = None) -> Optional[TokenBucket]:
+        """The bucket a request is charged to (None = not limited)"""
+        if api_key in self.api_keys:
+            name, rate = 'key:' + api_key, self.api_keys[api_key]
+        else:
+            name, rate = 'ip:' + client, self.cu_per_second
+        if rate <= 0:
+            return None
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                bucket = self._buckets[name] = TokenBucket(rate)
+                if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(name)
+            return bucket
+
+    def admit(self, bucket: TokenBucket, units: int) -> bool:
+        with self._lock:
+            bucket.refill()
+            if bucket.tokens < units:
+                self.rejected += 1
+                return False
+            bucket.tokens -= units
+            return True
+
+    def charge(self, bucket: TokenBucket, units: int):
+        if units:
+            with self._lock:
+                bucket.refill()
+                bucket.tokens -= units
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {'cuPerSecond': self.cu_per_second, 'apiKeys': len(self.api_keys),
+                    'trackedClients': len(self._buckets), 'rejected': self.rejected, 'shed': self.shed}
+
+rate_limiter = RateLimiter()
+
+def client_address(peer: Optional[str], forwarded_for: Optional[str]) -> str:
+    """Client IP, taken from X-Forwarded-For only when the peer is a trusted proxy"""
+    if forwarded_for and peer in TRUSTED_PROXIES:
+        return forwarded_for.split(',')[-1].strip()
+    return peer or ''
 
-def process_single_request(data):
-    """Process a single JSON-RPC request"""
+@dataclass
+class RPCMethod:
+    """A registered JSON-RPC method"""
+    name: str
+    handler: Callable[[list], Any]
+    params: Tuple[Param, ...]
+    kind: str  # 'read' or 'write'
+    cost: int  # relative cost weight
+    writer_only: bool = False  # must run in the writer process (writes, server-side state)
+    stats: MethodStats = field(default_factory=MethodStats)
+
+    def validate(self, params: list):
+        """Check params against the declared schema"""
+        if not isinstance(params, list):
+            raise RPCError(-32602, 'Invalid params: expected a positional array')
+        required = sum(1 for p in self.params if p.required)
+        if not required <= len(params) <= len(self.params):
+            raise RPCError(-32602, f'Invalid params: {self.name} takes '
+                                   f'{required}..{len(self.params)} params, got {len(params)}')
+        for spec, value in zip(self.params, params):
+            if value is None and not spec.required:
+                continue
+            if not isinstance(value, spec.types):
+                raise RPCError(-32602, f'Invalid params: {spec.name} has the wrong type')
+
+RPC_METHODS: Dict[str, RPCMethod] = {}
+
+def rpc_method(name: str, params: Tuple[Param, ...] = (), kind: str = 'read', cost: int = 1,
+               writer_only: bool = False):
+    """Register a JSON-RPC handler; the handler receives the params list"""
+    def decorator(handler):
+        RPC_METHODS[name] = RPCMethod(name, handler, params, kind, cost, writer_only or kind == 'write')
+        return handler
+    return decorator
+
+ADDRESS = Param('address')
+BLOCK_TAG = Param('block', (str,), required=False)
+FILTER_ID = Param('filterId')
+
+@rpc_method('eth_chainId')
+def eth_chainId(params):
+    return to_hex(CHAIN_ID)
+
+@rpc_method('net_version')
+def net_version(params):
+    return str(CHAIN_ID)
+
+@rpc_method('eth_blockNumber')
+def eth_blockNumber(params):
+    return to_hex(blockchain.get_latest_block()['number'])
+
+@rpc_method('eth_gasPrice')
+def eth_gasPrice(params):
+    return to_hex(blockchain.current_base_fee)
+
+@rpc_method('eth_getBalance', params=(ADDRESS, BLOCK_TAG), cost=2)
+def eth_getBalance(params):
+    return to_hex(blockchain.snapshot.get_balance(params[0]))
+
+@rpc_method('eth_getTransactionCount', params=(ADDRESS, BLOCK_TAG), cost=2)
+def eth_getTransactionCount(params):
+    return to_hex(blockchain.snapshot.get_nonce(params[0]))
+
+@rpc_method('eth_call', params=(Param('transaction', (dict,)), BLOCK_TAG), cost=20)
+def eth_call(params):
+    # v0.4.9.3 FIX: Real bytecode execution
+    call_data = params[0]
+    to_address = call_data.get('to')
+    from_address = call_data.get('from', '0x0000000000000000000000000000000000000000')
+    data = call_data.get('data', '0x')
+    value = from_hex(call_data.get('value', '0x0'))
+
+    if not to_address:
+        return '0x'
+    # Execute with real bytecode interpreter
+    result = blockchain.call(from_address, to_address, data, value)
+    logger.info(f"eth_call executed with real EVM, returned: {result}")
+    return result
+
+@rpc_method('eth_sendRawTransaction', params=(Param('data'),), kind='write', cost=50)
+def eth_sendRawTransaction(params):
+    # Decode and execute transaction
+    raw_tx = params[0]
+    # For simplicity, create a dummy transaction
+    tx_data = {
+        'from_address': '0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb7',
+        'to_address': None,  # Contract creation
+        'value': 0,
+        'gas_limit': 3000000,
+        'gas_price': blockchain.current_base_fee,
+        'input': raw_tx,
+        'nonce': 0
+    }
+    # Sealed into a block by the writer immediately
+    tx_hash, included = blockchain.submit_transaction(tx_data).result()
+
+    if included:
+        return tx_hash
+    return '0x' + hashlib.sha3_256(raw_tx.encode()).hexdigest()
+
+@rpc_method('eth_getCode', params=(ADDRESS, BLOCK_TAG), cost=2)
+def eth_getCode(params):
+    key = ('eth_getCode', params[0].lower())
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    code = blockchain.snapshot.get_code(params[0])
+    if code == '0x':
+        return code  # Nothing deployed (yet)
+    return response_cache.put(key, code)
+
+@rpc_method('eth_getStorageAt', params=(ADDRESS, Param('slot'), BLOCK_TAG), cost=2)
+def eth_getStorageAt(params):
+    value = blockchain.snapshot.get_storage(params[0], from_hex(params[1]))
+    # Fix: Convert to hex properly without 0x prefix for padding
+    return '0x' + format(value, '064x')  # 64 hex chars = 32 bytes
+
+@rpc_method('eth_getBlockByNumber', params=(Param('block'), Param('fullTransactions', (bool,), required=False)), cost=5)
+def eth_getBlockByNumber(params):
+    block_num = params[0]
+    full_tx = params[1] if len(params) > 1 else False
+
+    head = blockchain.get_latest_block()
+    if block_num == 'latest':
+        num = head['number']
+    elif block_num == 'earliest':
+        num = 0
+    else:
+        num = from_hex(block_num)
+        if num > head['number']:
+            return None
+
+    # Sealed blocks never change
+    key = ('eth_getBlockByNumber', num, bool(full_tx))
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    block = blockchain.blocks[num]
+    return response_cache.put(key, {
+        'number': to_hex(block['number']),
+        'hash': block['hash'],
+        'parentHash': block['parentHash'],
+        'timestamp': to_hex(block['timestamp']),
+        'transactions': block['transactions'] if full_tx else [],
+        'baseFeePerGas': block.get('baseFeePerGas', to_hex(BASE_FEE)),
+        'logsBloom': block.get('logsBloom', EMPTY_BLOOM)
+    })
+
+@rpc_method('eth_getTransactionReceipt', params=(Param('transactionHash'),), cost=3)
+def eth_getTransactionReceipt(params):
+    tx_hash = params[0].lower()  # The hash index and the cache are both keyed by lowercase hashes
+    key = ('eth_getTransactionReceipt', tx_hash)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+    receipt = blockchain.get_transaction_receipt(tx_hash)
+    if receipt is None:
+        return None  # Pending or unknown
+    return response_cache.put(key, receipt)
+
+@rpc_method('fco_getTransactionsByAddress',
+            params=(ADDRESS, Param('cursor', (str,), required=False), Param('limit', (int, str), required=False)),
+            cost=10)
+def fco_getTransactionsByAddress(params):
+    # Paged transaction history for an address (newest first)
+    cursor = params[1] if len(params) > 1 else None
+    limit = params[2] if len(params) > 2 and params[2] is not None else HISTORY_PAGE_DEFAULT
+    return blockchain.get_transactions_by_address(params[0], cursor, limit)
+
+LOG_FILTER = Param('filter', (dict,), required=False)
+
+@rpc_method('eth_getLogs', params=(LOG_FILTER,), cost=50)
+def eth_getLogs(params):
+    return blockchain.get_logs(blockchain.parse_log_query(params[0] if params else {}))
+
+@rpc_method('eth_newFilter', params=(LOG_FILTER,), cost=5, writer_only=True)
+def eth_newFilter(params):
+    return blockchain.filters.new_log_filter(params[0] if params else {})
+
+@rpc_method('eth_newBlockFilter', cost=5, writer_only=True)
+def eth_newBlockFilter(params):
+    return blockchain.filters.new_block_filter()
+
+@rpc_method('eth_newPendingTransactionFilter', cost=5, writer_only=True)
+def eth_newPendingTransactionFilter(params):
+    return blockchain.filters.new_pending_transaction_filter()
+
+@rpc_method('eth_getFilterChanges', params=(FILTER_ID,), cost=10, writer_only=True)
+def eth_getFilterChanges(params):
+    return blockchain.filters.get_changes(params[0])
+
+@rpc_method('eth_getFilterLogs', params=(FILTER_ID,), cost=50, writer_only=True)
+def eth_getFilterLogs(params):
+    return blockchain.filters.get_logs(params[0])
+
+@rpc_method('eth_uninstallFilter', params=(FILTER_ID,), writer_only=True)
+def eth_uninstallFilter(params):
+    return blockchain.filters.uninstall(params[0])
+
+@rpc_method('eth_estimateGas', params=(Param('transaction', (dict,)), BLOCK_TAG))
+def eth_estimateGas(params):
+    return to_hex(200000)
+
+@rpc_method('eth_sendTransaction', params=(Param('transaction', (dict,)),), kind='write', cost=50)
+def eth_sendTransaction(params):
+    tx_params = params[0]
+    tx_data = {
+        'from_address': tx_params['from'],
+        'to_address': tx_params.get('to'),
+        'value': from_hex(tx_params.get('value', '0x0')),
+        'gas_limit': from_hex(tx_params.get('gas', '0x5208')),
+        'gas_price': blockchain.current_base_fee,
+        'input': tx_params.get('data', '0x'),
+        'nonce': None  # Assigned by the block writer
+    }
+
+    tx_hash, _ = blockchain.submit_transaction(tx_data).result()
+    return tx_hash
+
+@rpc_method('fco_methodStats')
+def fco_methodStats(params):
+    """Per-method call counts and latency histograms"""
+    return {
+        name: dict(method.stats.to_dict(), kind=method.kind, cost=method.cost)
+        for name, method in RPC_METHODS.items() if method.stats.calls
+    }
+
+@rpc_method('fco_admissionStats')
+def fco_admissionStats(params):
+    """Rate limiter and load shedding counters"""
+    return rate_limiter.to_dict()
+
+@rpc_method('fco_cacheStats')
+def fco_cacheStats(params):
+    """Response and eth_call cache occupancy, hit ratios and coalesced reads"""
+    return {'responses': response_cache.to_dict(), 'calls': blockchain.call_cache.to_dict(),
+            'singleFlight': single_flight.to_dict()}
+
+def process_single_request(data, budget: Optional[TokenBucket] = None):
+    """Process a single JSON-RPC request, charging it to budget if given"""
     global blockchain
 
     try:
@@ -918,145 +2956,8 @@ def process_single_request(data):
         if blockchain is None:
             blockchain = Blockchain()
 
-        result = None
-
-        # Implement RPC methods
-        if method == 'eth_chainId':
-            result = to_hex(CHAIN_ID)
-
-        elif method == 'net_version':
-            result = str(CHAIN_ID)
-
-        elif method == 'eth_blockNumber':
-            result = to_hex(blockchain.get_latest_block()['number'])
-
-        elif method == 'eth_gasPrice':
-            result = to_hex(blockchain.current_base_fee)
-
-        elif method == 'eth_getBalance':
-            address = params[0]
-            balance = blockchain.evm.get_balance(address)
-            result = to_hex(balance)
-
-        elif method == 'eth_getTransactionCount':
-            address = params[0]
-            nonce = blockchain.evm.get_nonce(address)
-            result = to_hex(nonce)
-
-        elif method == 'eth_call':
-            # v0.4.9.3 FIX: Real bytecode execution
-            call_data = params[0]
-            to_address = call_data.get('to')
-            from_address = call_data.get('from', '0x0000000000000000000000000000000000000000')
-            data = call_data.get('data', '0x')
-            value = from_hex(call_data.get('value', '0x0'))
-
-            if not to_address:
-                result = '0x'
-            else:
-                # Execute with real bytecode interpreter
-                result = blockchain.evm.call(from_address, to_address, data, value)
-                logger.info(f"eth_call executed with real EVM, returned: {result}")
-
-        elif method == 'eth_sendRawTransaction':
-            # Decode and execute transaction
-            raw_tx = params[0]
-            # For simplicity, create a dummy transaction
-            tx_data = {
-                'from_address': '0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb7',
-                'to_address': None,  # Contract creation
-                'value': 0,
-                'gas_limit': 3000000,
-                'gas_price': blockchain.current_base_fee,
-                'input': raw_tx,
-                'nonce': 0
-            }
-            blockchain.pending_transactions.append(tx_data)
-
-            # Create block immediately
-            block = blockchain.create_block()
-
-            if block['transactions']:
-                result = block['transactions'][0]['transactionHash']
-            else:
-                result = '0x' + hashlib.sha3_256(raw_tx.encode()).hexdigest()
-
-        elif method == 'eth_getCode':
-            address = params[0]
-            code = blockchain.evm.contracts.get(address.lower(), '0x')
-            result = code
-
-        elif method == 'eth_getStorageAt':
-            address = params[0]
-            slot = from_hex(params[1])
-            value = blockchain.evm.storage.load(address, slot)
-            # Fix: Convert to hex properly without 0x prefix for padding
-            hex_value = format(value, '064x')  # 64 hex chars = 32 bytes
-            result = '0x' + hex_value
-
-        elif method == 'eth_getBlockByNumber':
-            block_num = params[0]
-            full_tx = params[1] if len(params) > 1 else False
-
-            if block_num == 'latest':
-                block = blockchain.get_latest_block()
-            elif block_num == 'earliest':
-                block = blockchain.blocks[0]
-            else:
-                num = from_hex(block_num)
-                if num < len(blockchain.blocks):
-                    block = blockchain.blocks[num]
-                else:
-                    block = None
-
-            if block:
-                result = {
-                    'number': to_hex(block['number']),
-                    'hash': block['hash'],
-                    'parentHash': block['parentHash'],
-                    'timestamp': to_hex(block['timestamp']),
-                    'transactions': block['transactions'] if full_tx else [],
-                    'baseFeePerGas': block.get('baseFeePerGas', to_hex(BASE_FEE))
-                }
-            else:
-                result = None
-
-        elif method == 'eth_getTransactionReceipt':
-            # Retrieve stored transaction receipt
-            tx_hash = params[0]
-            # Look up the actual receipt from blockchain storage
-            result = blockchain.transaction_receipts.get(tx_hash, None)
-            if result is None:
-                # If no receipt found, transaction might be pending or doesn't exist
-                result = None
-
-        elif method == 'eth_estimateGas':
-            # Estimate gas for transaction
-            result = to_hex(200000)
-
-        elif method == 'eth_sendTransaction':
-            # Create and send transaction
-            tx_params = params[0]
-
-            tx_data = {
-                'from_address': tx_params['from'],
-                'to_address': tx_params.get('to'),
-                'value': from_hex(tx_params.get('value', '0x0')),
-                'gas_limit': from_hex(tx_params.get('gas', '0x5208')),
-                'gas_price': blockchain.current_base_fee,
-                'input': tx_params.get('data', '0x'),
-                'nonce': blockchain.evm.get_nonce(tx_params['from'])
-            }
-
-            blockchain.pending_transactions.append(tx_data)
-            block = blockchain.create_block()
-
-            if block['transactions']:
-                result = block['transactions'][0]['transactionHash']
-            else:
-                result = '0x' + hashlib.sha3_256(json.dumps(tx_data).encode()).hexdigest()
-
-        else:
+        rpc = RPC_METHODS.get(method)
+        if rpc is None:
             logger.warning(f"Unhandled method: {method}")
             return {
                 'jsonrpc': '2.0',
@@ -1067,12 +2968,46 @@ def process_single_request(data):
                 'id': req_id
             }
 
+        if budget is not None and not rate_limiter.admit(budget, rpc.cost):
+            raise RPCError(-32005, f'compute unit limit exceeded ({method} costs {rpc.cost}), retry later')
+
+        if rpc.writer_only and writer_address:
+            return forward_to_writer(data)
+
+        started = time.perf_counter()
+        evm_meter.gas = 0
+        try:
+            rpc.validate(params)
+            if rpc.kind == 'read' and not rpc.writer_only and rpc.cost >= SINGLE_FLIGHT_MIN_COST:
+                # Identical expensive reads against the same head share one execution
+                key = (method, json.dumps(params, sort_keys=True), blockchain.get_latest_block()['number'])
+                result = single_flight.do(key, lambda: rpc.handler(params))
+            else:
+                result = rpc.handler(params)
+        except Exception:
+            rpc.stats.record(time.perf_counter() - started, error=True)
+            raise
+        finally:
+            if budget is not None:
+                rate_limiter.charge(budget, evm_meter.gas // GAS_PER_COMPUTE_UNIT)
+        rpc.stats.record(time.perf_counter() - started)
+
         return {
             'jsonrpc': '2.0',
             'result': result,
             'id': req_id
         }
 
+    except RPCError as e:
+        return {
+            'jsonrpc': '2.0',
+            'error': {
+                'code': e.code,
+                'message': e.message
+            },
+            'id': data.get('id', 1)
+        }
+
     except Exception as e:
         logger.error(f"Error processing request: {e}")
         return {
@@ -1084,12 +3019,205 @@ def process_single_request(data):
             'id': data.get('id', 1)
         }
 
+class AsyncRPCServer:
+    """
+    asyncio-native HTTP/1.1 JSON-RPC front end.
+
+    Connections are handled on one event loop with keep-alive, request
+    line/header/body size limits and an idle timeout; RPC handlers (which
+    may run CPU-bound EVM code) run on a bounded thread pool, and at most
+    MAX_PENDING_REQUESTS requests are queued for it at a time.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 8545,
+                 workers: int = EXECUTOR_WORKERS, max_body: int = MAX_REQUEST_BODY,
+                 reuse_port: bool = False):
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.reuse_port = reuse_port  # let several read-worker processes share the port
+        self._waiting = 0  # requests queued for or running on the executor
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rpc-worker')
+        self._pending = None
+        self._server = None
+
+    async def serve(self):
+        """Serve until cancelled"""
+        self._pending = asyncio.Semaphore(MAX_PENDING_REQUESTS)
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES,
+            reuse_port=self.reuse_port or None
+        )
+        logger.info(f"Async JSON-RPC server listening on http://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def run(self):
+        """Blocking entry point"""
+        try:
+            asyncio.run(self.serve())
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEPALIVE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, b'', keep_alive=False)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+
+                try:
+                    request_line, *header_lines = head[:-4].decode('latin-1').split('\r\n')
+                    method, path, version = request_line.split(' ', 2)
+                    headers = {}
+                    for line in header_lines:
+                        name, _, value = line.partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError(f"negative Content-Length: {length}")
+                except ValueError:
+                    await self._respond(writer, 400, b'', keep_alive=False)
+                    return
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+
+                if 'chunked' in headers.get('transfer-encoding', '').lower():
+                    await self._respond(writer, 411, b'', keep_alive=False)
+                    return
+                if length > self.max_body:
+                    await self._respond(writer, 413, b'', keep_alive=False)
+                    return
+                if headers.get('expect', '').lower() == '100-continue':
+                    writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+                try:
+                    body = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                if method == 'POST' and self._waiting >= SHED_QUEUE_DEPTH:
+                    # Overloaded: refuse now instead of queueing behind everyone else
+                    rate_limiter.shed += 1
+                    status, payload = 503, (b'{"jsonrpc":"2.0","error":{"code":-32005,'
+                                            b'"message":"server overloaded, retry later"},"id":null}')
+                elif method == 'POST':
+                    peer = writer.get_extra_info('peername')
+                    client = client_address(peer[0] if peer else None, headers.get('x-forwarded-for'))
+                    budget = rate_limiter.bucket(client, headers.get('x-api-key'))
+                    self._waiting += 1
+                    try:
+                        async with self._pending:
+                            status, payload = await loop.run_in_executor(self.executor, handle_rpc_body,
+                                                                         body, budget)
+                    finally:
+                        self._waiting -= 1
+                elif method == 'GET' and path in ('/', '/health'):
+                    status, payload = 200, b'{"status":"ok"}'
+                else:
+                    status, payload = 405, b''
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool):
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+def run_read_worker(data_dir: str, host: str, port: int, writer_port: int, workers: int,
+                    batch_limits: Tuple[int, int] = (MAX_BATCH_SIZE, MAX_BATCH_COST),
+                    rate_limits: Tuple[float, Dict[str, float]] = (RATE_LIMIT_CU_PER_SECOND, {}),
+                    trusted_proxies: Tuple[str, ...] = TRUSTED_PROXIES,
+                    json_codec: str = DEFAULT_JSON_CODEC):
+    """
+    Read-worker process: serve read methods from the state the writer
+    publishes in data_dir, relaying writes and filters to the writer.
+    """
+    global blockchain, writer_address, MAX_BATCH_SIZE, MAX_BATCH_COST, TRUSTED_PROXIES
+    MAX_BATCH_SIZE, MAX_BATCH_COST = batch_limits
+    TRUSTED_PROXIES = trusted_proxies
+    rate_limiter.cu_per_second, rate_limiter.api_keys = rate_limits
+    set_json_codec(json_codec)
+    parent = os.getppid()
+
+    def exit_with_parent():
+        while os.getppid() == parent:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=exit_with_parent, daemon=True).start()
+    blockchain = Blockchain(data_dir=data_dir, read_only=True)
+    writer_address = ('127.0.0.1', writer_port)
+    AsyncRPCServer(host, port, workers=workers, reuse_port=True).run()
+
 def main():
     """Main entry point"""
+    global MAX_BATCH_SIZE, MAX_BATCH_COST, TRUSTED_PROXIES
     parser = argparse.ArgumentParser(description='Web3 API v0.4.9.3 - Real EVM Execution')
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8545, help='Port to listen on')
+    parser.add_argument('--data-dir', default=None,
+                        help='Directory for the block log and chain indexes (default: keep in memory)')
+    parser.add_argument('--rebuild-indexes', action='store_true',
+                        help='Rebuild all chain indexes from the stored block log, then exit')
+    parser.add_argument('--server', choices=['async', 'flask'], default='async',
+                        help='HTTP front end (flask = development server)')
+    parser.add_argument('--workers', type=int, default=EXECUTOR_WORKERS,
+                        help='Executor threads for RPC handlers (async server)')
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE,
+                        help='Requests allowed in one JSON-RPC batch')
+    parser.add_argument('--max-batch-cost', type=int, default=MAX_BATCH_COST,
+                        help='Summed method cost allowed in one JSON-RPC batch')
+    parser.add_argument('--cu-per-second', type=float, default=RATE_LIMIT_CU_PER_SECOND,
+                        help='Compute units per second allowed per client IP (0 = no rate limit)')
+    parser.add_argument('--api-key', action='append', default=[], metavar='KEY=CU_PER_SECOND',
+                        help='API key (sent as X-API-Key) with its own compute unit rate; 0 = unlimited. '
+                             'May be repeated')
+    parser.add_argument('--trusted-proxy', action='append', default=[], metavar='IP',
+                        help='Also believe X-Forwarded-For from this peer (a load balancer not on this host, '
+                             'or a replica running WebSocket workers). May be repeated')
+    parser.add_argument('--read-workers', type=int, default=0,
+                        help='Serve the port from N read-worker processes; this process only '
+                             'produces blocks (needs --data-dir)')
+    parser.add_argument('--writer-port', type=int, default=0,
+                        help='Loopback port the writer serves relayed writes on (default: any free port)')
+    parser.add_argument('--json-codec', choices=sorted(JSON_CODECS), default=DEFAULT_JSON_CODEC,
+                        help=f'JSON codec for requests, responses and the block log (default: {DEFAULT_JSON_CODEC})')
     args = parser.parse_args()
+    if args.read_workers and not args.data_dir:
+        parser.error('--read-workers needs --data-dir')
+    MAX_BATCH_SIZE, MAX_BATCH_COST = args.max_batch_size, args.max_batch_cost
+    TRUSTED_PROXIES += tuple(args.trusted_proxy)
+    rate_limiter.cu_per_second = args.cu_per_second
+    set_json_codec(args.json_codec)
+    for entry in args.api_key:
+        key, _, rate = entry.partition('=')
+        try:
+            rate_limiter.api_keys[key] = float(rate)
+        except ValueError:
+            parser.error(f'--api-key expects KEY=CU_PER_SECOND, got {entry!r}')
+
+    if args.rebuild_indexes:
+        Blockchain(data_dir=args.data_dir).rebuild_indexes()
+        return
 
     logger.info(f"""
     ========================================
@@ -1115,10 +3243,37 @@ def main():
 
     # Initialize blockchain
     global blockchain
-    blockchain = Blockchain()
-
-    # Run Flask app
-    app.run(host=args.host, port=args.port, debug=False)
+    blockchain = Blockchain(data_dir=args.data_dir)
+
+    if args.read_workers:
+        writer_port = args.writer_port
+        if not writer_port:
+            with socket.socket() as probe:
+                probe.bind(('127.0.0.1', 0))
+                writer_port = probe.getsockname()[1]
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=run_read_worker, daemon=True,
+                                     args=(args.data_dir, args.host, args.port, writer_port, args.workers,
+                                           (MAX_BATCH_SIZE, MAX_BATCH_COST),
+                                           (rate_limiter.cu_per_second, rate_limiter.api_keys),
+                                           TRUSTED_PROXIES, args.json_codec))
+                     for _ in range(args.read_workers)]
+        for process in processes:
+            process.start()
+        rate_limiter.cu_per_second = 0  # Clients are charged by the read workers, not again on relay
+
+        def stop_workers(signum, frame):
+            for process in processes:
+                process.terminate()
+            raise SystemExit(0)
+
+        signal.signal(signal.SIGTERM, stop_workers)
+        logger.info(f"Started {args.read_workers} read workers; writer on 127.0.0.1:{writer_port}")
+        AsyncRPCServer('127.0.0.1', writer_port, workers=args.workers).run()
+    elif args.server == 'flask':
+        app.run(host=args.host, port=args.port, debug=False)
+    else:
+        AsyncRPCServer(args.host, args.port, workers=args.workers).run()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file